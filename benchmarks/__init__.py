@@ -0,0 +1,7 @@
+"""
+Benchmarks for the draw engines
+
+Run with `python -m benchmarks run` and check a change against a stored
+baseline with `python -m benchmarks compare benchmarks/baselines/baseline.json`.
+`python -m benchmarks scale` times the engines on synthetic leagues of growing size.
+"""
@@ -0,0 +1,155 @@
+"""
+Benchmark command line
+
+    python -m benchmarks run [--engines a,b] [--draws N] [--output FILE]
+    python -m benchmarks compare BASELINE [CURRENT] [--threshold 0.25]
+    python -m benchmarks scale [--engines a,b] [--sizes 36,72,144,1008] [--output FILE]
+
+compare without CURRENT reruns the baseline's engines on the same seeds.
+It exits with status 1 if any metric regressed.
+"""
+
+import argparse
+import json
+import sys
+
+from .scaling import SCALING_ENGINES, SIZES, run_scaling
+from .suite import ENGINES, benchmark_engine, compare, host_info, run_suite
+
+
+def print_results(results):
+    """Print one line per engine"""
+
+    print(f"{'engine':<24}{'draws/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{'attempts':>10}{'fails':>7}{'peak KiB':>10}")
+    for name, summary in results['engines'].items():
+        peak = summary['peak_memory_kib']
+        peak = f"{peak:.0f}" if peak is not None else "-"
+        print(f"{name:<24}{summary['draws_per_second']:>10.2f}{summary['p50_ms']:>10.1f}"
+              f"{summary['p99_ms']:>10.1f}{summary['attempts_mean']:>10.2f}"
+              f"{summary['failures']:>7}{peak:>10}")
+
+
+def command_run(args) -> int:
+    engines = args.engines.split(",") if args.engines else None
+    results = run_suite(engines, args.draws, args.first_seed, args.memory_draws,
+                        progress=lambda name: print(f"Benchmarking {name}...", file=sys.stderr))
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+def command_compare(args) -> int:
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    if args.current:
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+    else:
+        # Rerun exactly the baseline's cases
+        current = {'host': host_info(), 'engines': {}}
+        for name, summary in baseline['engines'].items():
+            if name not in ENGINES:
+                print(f"Skipping {name}: no longer registered", file=sys.stderr)
+                continue
+            print(f"Benchmarking {name}...", file=sys.stderr)
+            memory_draws = args.memory_draws if summary['peak_memory_kib'] is not None else 0
+            current['engines'][name] = benchmark_engine(
+                ENGINES[name], summary['draws'], summary['first_seed'], memory_draws)
+
+    print_results(current)
+
+    recorded, timed = baseline.get('host'), current.get('host')
+    if recorded != timed:
+        print(f"\nWarning: the baseline was recorded on {recorded or 'an unknown host'}; timings "
+              "from another machine or Python are not comparable", file=sys.stderr)
+
+    regressions = compare(baseline, current, args.threshold)
+    if not regressions:
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+        return 0
+
+    print("\nRegressions:")
+    for r in regressions:
+        print(f"  {r.engine}: {r.metric} {r.baseline:.4g} -> {r.current:.4g} ({r.change:+.0%})")
+    return 1
+
+
+def command_scale(args) -> int:
+    engines = args.engines.split(",") if args.engines else None
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = run_scaling(engines, sizes, args.draws, args.time_limit, args.first_seed,
+                          progress=lambda name: print(f"Benchmarking {name}...", file=sys.stderr),
+                          num_pots=args.pots, matches_per_team=args.matches,
+                          concentration=args.concentration)
+
+    print(f"{'engine':<24}{'teams':>7}{'draws':>7}{'fails':>7}{'mean ms':>12}{'attempts':>10}")
+    for name, engine in results['engines'].items():
+        for size in engine['sizes']:
+            if 'skipped' in size:
+                print(f"{name:<24}{size['teams']:>7}  skipped: {size['skipped']}")
+                continue
+            print(f"{name:<24}{size['teams']:>7}{size['draws']:>7}{size['failures']:>7}"
+                  f"{size['mean_ms']:>12.1f}{size['attempts_mean']:>10.2f}")
+        exponent = engine['growth_exponent']
+        if exponent is not None:
+            print(f"{name:<24}  time grows as teams^{exponent:.2f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Draw engine benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="benchmark the engines")
+    run.add_argument("--engines", help="comma-separated engine names (default: "
+                     + ",".join(name for name, engine in ENGINES.items() if engine.default) + ")")
+    run.add_argument("--draws", type=int, help="draws per engine (default: per engine)")
+    run.add_argument("--first-seed", type=int, default=0)
+    run.add_argument("--memory-draws", type=int, default=3,
+                     help="draws traced for peak memory (0 to skip)")
+    run.add_argument("--output", help="write the results as JSON")
+    run.set_defaults(handler=command_run)
+
+    check = commands.add_parser("compare", help="compare against a baseline")
+    check.add_argument("baseline")
+    check.add_argument("current", nargs="?", help="results JSON (default: rerun the baseline's cases)")
+    check.add_argument("--threshold", type=float, default=0.25,
+                       help="allowed relative slowdown (default: 0.25)")
+    check.add_argument("--memory-draws", type=int, default=3)
+    check.set_defaults(handler=command_compare)
+
+    scale = commands.add_parser("scale", help="time the engines on synthetic leagues of growing size")
+    scale.add_argument("--engines", help="comma-separated engine names (default: "
+                       + ",".join(SCALING_ENGINES) + ")")
+    scale.add_argument("--sizes", default=",".join(str(size) for size in SIZES),
+                       help="comma-separated league sizes in teams")
+    scale.add_argument("--draws", type=int, default=3, help="draws per engine and size")
+    scale.add_argument("--time-limit", type=float, default=30.0,
+                       help="seconds per size; larger sizes are skipped once one draw takes longer")
+    scale.add_argument("--pots", type=int, default=4)
+    scale.add_argument("--matches", type=int, default=8, help="matches per team")
+    scale.add_argument("--concentration", type=float, default=1.0,
+                       help="country concentration (0 = even, higher = fewer big countries)")
+    scale.add_argument("--first-seed", type=int, default=0)
+    scale.add_argument("--output", help="write the results as JSON")
+    scale.set_defaults(handler=command_scale)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
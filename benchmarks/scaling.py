@@ -0,0 +1,172 @@
+"""
+Scaling benchmarks
+Times the engines on synthetic leagues of growing size
+"""
+
+import math
+import random
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from src.champions_league_draw import ChampionsLeagueDraw
+from src.champions_league_draw_sequential import SequentialChampionsLeagueDraw
+from src.constraints import DrawConstraints
+from src.events import DrawResult
+from src.synthetic import concentration_index, generate_league
+
+from .suite import host_info, percentile
+
+
+FORMAT_VERSION = 1
+
+# League sizes, in teams; all split into four equal pots
+SIZES = (36, 72, 144, 1008)
+
+# Search nodes per match the solver methods may use before giving up;
+# the engines' default of 5000 is tuned for 36 teams
+STEPS_PER_MATCH = 10
+
+
+def search_budget(num_teams: int, constraints: DrawConstraints) -> int:
+    """max_steps for a solver method, scaled with the number of matches"""
+
+    return max(5000, STEPS_PER_MATCH * num_teams * constraints.matches_per_team // 2)
+
+
+ScalingFactory = Callable[[List, DrawConstraints, int], Callable[[], DrawResult]]
+
+SCALING_ENGINES: Dict[str, ScalingFactory] = {}
+
+
+def register_scaling(name: str):
+    """
+    Register a scaling case. The decorated factory takes the teams, their
+    constraints and a seed and returns a callable performing one draw.
+    """
+
+    def decorator(factory):
+        SCALING_ENGINES[name] = factory
+        return factory
+
+    return decorator
+
+
+def _solver(method: str) -> ScalingFactory:
+    def factory(teams, constraints, seed):
+        draw = ChampionsLeagueDraw(teams, rng=random.Random(seed), constraints=constraints)
+        max_steps = search_budget(len(teams), constraints)
+        return lambda: draw.perform_draw(method=method, max_attempts=10, max_steps=max_steps)
+    return factory
+
+
+register_scaling("backtrack")(_solver("backtrack"))
+register_scaling("two_phase")(_solver("two_phase"))
+register_scaling("pot_pairs")(_solver("pot_pairs"))
+
+
+@register_scaling("sequential")
+def _sequential(teams, constraints, seed):
+    draw = SequentialChampionsLeagueDraw(teams, constraints, rng=random.Random(seed))
+    return draw.perform_draw_sequential
+
+
+def growth_exponent(points: Sequence) -> Optional[float]:
+    """
+    Least-squares slope of log(time) against log(teams) for (teams, time)
+    points: about 1 for linear scaling, 2 for quadratic
+    """
+
+    points = [(math.log(n), math.log(t)) for n, t in points if t > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if not spread:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def scale_engine(name: str, sizes: Iterable[int] = SIZES, draws: int = 3, time_limit: float = 30.0,
+                 first_seed: int = 0, progress: Optional[Callable[[str], None]] = None,
+                 **league) -> Dict:
+    """
+    Time one engine at every size.
+
+    Each size gets a league generated from first_seed with the league
+    keyword arguments (see generate_league) and up to draws draws; the
+    draws stop early once they have taken time_limit seconds. Once a
+    single draw takes longer than time_limit, the larger sizes are
+    skipped.
+    """
+
+    factory = SCALING_ENGINES[name]
+    sizes = sorted(sizes)
+    results = []
+    too_slow = None
+
+    for num_teams in sizes:
+        if too_slow is not None:
+            results.append({'teams': num_teams,
+                            'skipped': f"a draw of {too_slow} teams took over {time_limit:g}s"})
+            continue
+        if progress is not None:
+            progress(f"{name} at {num_teams} teams")
+
+        teams, constraints = generate_league(num_teams, rng=random.Random(first_seed), **league)
+        latencies = []
+        attempts = []
+        failures = 0
+        for seed in range(first_seed, first_seed + draws):
+            run = factory(teams, constraints, seed)
+            start = time.perf_counter()
+            result = run()
+            latencies.append(time.perf_counter() - start)
+            attempts.append(result.metrics.attempts)
+            if not result:
+                failures += 1
+            if sum(latencies) > time_limit:
+                break
+
+        total = sum(latencies)
+        results.append({
+            'teams': num_teams,
+            'countries': len({team.country for team in teams}),
+            'concentration_index': concentration_index(teams),
+            'draws': len(latencies),
+            'failures': failures,
+            'draws_per_second': len(latencies) / total if total else 0.0,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'mean_ms': total / len(latencies) * 1000,
+            'attempts_mean': sum(attempts) / len(attempts),
+        })
+        if min(latencies) > time_limit:
+            too_slow = num_teams
+
+    measured = [(r['teams'], r['mean_ms']) for r in results if 'skipped' not in r]
+    return {'sizes': results, 'growth_exponent': growth_exponent(measured)}
+
+
+def run_scaling(names: Optional[Iterable[str]] = None, sizes: Iterable[int] = SIZES, draws: int = 3,
+                time_limit: float = 30.0, first_seed: int = 0,
+                progress: Optional[Callable[[str], None]] = None, **league) -> Dict:
+    """Run scale_engine for the named engines (all if None) into a results dict"""
+
+    names = list(SCALING_ENGINES) if names is None else list(names)
+    for name in names:
+        if name not in SCALING_ENGINES:
+            raise ValueError(f"Unknown scaling engine: {name}")
+
+    sizes = sorted(sizes)
+    return {
+        'version': FORMAT_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'host': host_info(),
+        'league': dict(league),
+        'time_limit': time_limit,
+        'engines': {
+            name: scale_engine(name, sizes, draws, time_limit, first_seed, progress, **league)
+            for name in names
+        },
+    }
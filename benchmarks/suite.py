@@ -0,0 +1,240 @@
+"""
+Draw engine benchmark suite
+Times every registered engine over a fixed seed set and compares runs
+"""
+
+import math
+import os
+import platform
+import random
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from src.champions_league_draw import ChampionsLeagueDraw, create_sample_teams
+from src.champions_league_draw_sequential import SequentialChampionsLeagueDraw
+from src.champions_league_draw_sequential import create_sample_teams as create_sequential_teams
+from src.events import DrawResult
+
+
+FORMAT_VERSION = 1
+
+
+class Engine(NamedTuple):
+    """A registered benchmark case"""
+    name: str
+    factory: Callable[[int], Callable[[], DrawResult]]
+    draws: int
+    default: bool
+
+
+ENGINES: Dict[str, Engine] = {}
+
+
+def register_engine(name: str, draws: int = 50, default: bool = True):
+    """
+    Register a benchmark case.
+
+    The decorated factory takes a seed and returns a callable that performs
+    one draw and returns its DrawResult; building the engine is not timed.
+    draws is the size of the case's seed set. Cases with default=False only
+    run when asked for by name.
+    """
+
+    def decorator(factory):
+        ENGINES[name] = Engine(name, factory, draws, default)
+        return factory
+
+    return decorator
+
+
+@register_engine("backtrack")
+def _backtrack(seed: int):
+    draw = ChampionsLeagueDraw(create_sample_teams(), rng=random.Random(seed))
+    return lambda: draw.perform_draw(method="backtrack")
+
+
+@register_engine("two_phase")
+def _two_phase(seed: int):
+    draw = ChampionsLeagueDraw(create_sample_teams(), rng=random.Random(seed))
+    return lambda: draw.perform_draw(method="two_phase")
+
+
+@register_engine("pot_pairs")
+def _pot_pairs(seed: int):
+    draw = ChampionsLeagueDraw(create_sample_teams(), rng=random.Random(seed))
+    return lambda: draw.perform_draw(method="pot_pairs")
+
+
+@register_engine("sequential", draws=10)
+def _sequential(seed: int):
+    draw = SequentialChampionsLeagueDraw(create_sequential_teams(), rng=random.Random(seed))
+    return draw.perform_draw_sequential
+
+
+@register_engine("restart", draws=10, default=False)
+def _restart(seed: int):
+    draw = ChampionsLeagueDraw(create_sample_teams(), rng=random.Random(seed))
+    return lambda: draw.perform_draw(max_attempts=200)
+
+
+@register_engine("sequential_no_lookahead", draws=3, default=False)
+def _sequential_no_lookahead(seed: int):
+    draw = SequentialChampionsLeagueDraw(create_sequential_teams(), lookahead=False,
+                                         rng=random.Random(seed))
+    return draw.perform_draw_sequential
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100) of a non-empty list"""
+
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def peak_memory(run: Callable[[], DrawResult]) -> int:
+    """Peak bytes allocated by Python while performing one draw"""
+
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_engine(engine: Engine, draws: Optional[int] = None, first_seed: int = 0,
+                     memory_draws: int = 3) -> Dict:
+    """
+    Perform one draw per seed and summarize them.
+
+    Latencies are wall times of single draws. Peak memory is measured in a
+    separate pass over the first memory_draws seeds, since tracing
+    allocations slows the draws down.
+    """
+
+    draws = draws if draws is not None else engine.draws
+    seeds = range(first_seed, first_seed + draws)
+    latencies = []
+    attempts = []
+    dead_ends = []
+    failures = 0
+
+    for seed in seeds:
+        run = engine.factory(seed)
+        start = time.perf_counter()
+        result = run()
+        latencies.append(time.perf_counter() - start)
+        attempts.append(result.metrics.attempts)
+        dead_ends.append(result.metrics.dead_ends)
+        if not result:
+            failures += 1
+
+    peak = max((peak_memory(engine.factory(seed)) for seed in seeds[:memory_draws]), default=None)
+    total = sum(latencies)
+
+    return {
+        'first_seed': first_seed,
+        'draws': draws,
+        'failures': failures,
+        'draws_per_second': draws / total if total else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'mean_ms': total / draws * 1000,
+        'attempts_mean': sum(attempts) / draws,
+        'attempts_max': max(attempts),
+        'attempts': {str(k): count for k, count in sorted(Counter(attempts).items())},
+        'restarts_mean': (sum(attempts) - draws) / draws,
+        'dead_ends_mean': sum(dead_ends) / draws,
+        'peak_memory_kib': peak / 1024 if peak is not None else None,
+    }
+
+
+def host_info() -> Dict:
+    """The machine and interpreter a run was timed on; timings only compare within one host"""
+
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run_suite(names: Optional[Iterable[str]] = None, draws: Optional[int] = None,
+              first_seed: int = 0, memory_draws: int = 3,
+              progress: Optional[Callable[[str], None]] = None) -> Dict:
+    """Benchmark the named engines (the default set if None) into a results dict"""
+
+    if names is None:
+        names = [name for name, engine in ENGINES.items() if engine.default]
+
+    results = {}
+    for name in names:
+        if name not in ENGINES:
+            raise ValueError(f"Unknown benchmark engine: {name}")
+        if progress is not None:
+            progress(name)
+        results[name] = benchmark_engine(ENGINES[name], draws, first_seed, memory_draws)
+
+    return {
+        'version': FORMAT_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'host': host_info(),
+        'engines': results,
+    }
+
+
+class Regression(NamedTuple):
+    """A metric that got worse by more than the threshold"""
+    engine: str
+    metric: str
+    baseline: float
+    current: float
+    change: float
+
+
+# Compared metrics and whether a higher value is better
+COMPARED_METRICS = [
+    ('draws_per_second', True),
+    ('p50_ms', False),
+    ('p99_ms', False),
+    ('attempts_mean', False),
+    ('dead_ends_mean', False),
+    ('peak_memory_kib', False),
+]
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = 0.25) -> List[Regression]:
+    """
+    List the metrics of engines present in both runs that got worse by more
+    than threshold (a fraction of the baseline value). Any new failed draw
+    is a regression regardless of the threshold.
+    """
+
+    regressions = []
+    for name, before in baseline['engines'].items():
+        after = current['engines'].get(name)
+        if after is None:
+            continue
+
+        if after['failures'] > before['failures']:
+            regressions.append(Regression(name, 'failures', before['failures'], after['failures'],
+                                          math.inf))
+
+        for metric, higher_is_better in COMPARED_METRICS:
+            old, new = before.get(metric), after.get(metric)
+            if old is None or new is None:
+                continue
+            if not old:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append(Regression(name, metric, old, new, change))
+
+    return regressions
@@ -0,0 +1,87 @@
+"""
+Draw budgets
+Wall-clock deadlines and cooperative cancellation for the draw engines
+"""
+
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from .draw_state import DrawState
+
+
+# Why a draw stopped early, as DrawResult.stopped
+TIMEOUT = "timeout"
+CANCELLED = "cancelled"
+
+# Search nodes between two budget checks inside a search
+CHECK_INTERVAL = 64
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation of a running draw
+
+    cancel() may be called from any thread; the draw notices at its next
+    budget check and returns its best partial draw.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+class Budget:
+    """
+    Time budget of one draw call, and the largest partial draw seen in it
+
+    The deadline is on time.perf_counter(), timeout seconds from now when
+    given. The engines check exhausted() between attempts and picks, and
+    the searches every CHECK_INTERVAL nodes; once it has returned true it
+    keeps doing so, and stopped says why. Without a timeout or token the
+    budget never runs out and only keeps the best partial draw.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, cancel: Optional[CancellationToken] = None):
+        self.deadline = None if timeout is None else time.perf_counter() + timeout
+        self.cancel = cancel
+        self.stopped: Optional[str] = None
+        self.best: List[Tuple[int, int, bool]] = []
+
+    def exhausted(self) -> bool:
+        """True once the deadline has passed or the draw was cancelled"""
+
+        if self.stopped is None:
+            if self.cancel is not None and self.cancel.cancelled:
+                self.stopped = CANCELLED
+            elif self.deadline is not None and time.perf_counter() >= self.deadline:
+                self.stopped = TIMEOUT
+        return self.stopped is not None
+
+    def fork(self) -> "Budget":
+        """A budget with the same deadline and token that keeps its own best partial draw"""
+
+        budget = Budget(cancel=self.cancel)
+        budget.deadline = self.deadline
+        return budget
+
+    def record(self, state: DrawState):
+        """Keep the matches of state if it is the largest partial draw so far"""
+
+        if len(state.trail) > len(self.best):
+            self.best = list(state.trail)
+
+    def restore(self, state: DrawState) -> int:
+        """Leave the best partial draw in state; returns the matches still unplaced"""
+
+        self.record(state)
+        state.reset()
+        for i, j, i_home in self.best:
+            state.add_match(i, j, i_home)
+        return state.num_teams * state.matches_per_team // 2 - len(state.trail)
@@ -0,0 +1,59 @@
+"""
+Live ceremony streaming
+Async and server-sent-event views of the pot-by-pot sequential draw
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator, Dict
+
+from .events import CeremonyEvent
+
+
+def event_to_dict(event: CeremonyEvent) -> Dict:
+    """JSON-serializable form of a ceremony event"""
+
+    data = {'kind': event.kind, 'attempt': event.attempt}
+    if event.pot is not None:
+        data['pot'] = event.pot
+    if event.team is not None:
+        team = event.team
+        data['team'] = {'name': team.name, 'country': team.country, 'pot': team.pot}
+        data['fixtures'] = [
+            {'opponent': opponent.name, 'opponent_country': opponent.country,
+             'opponent_pot': opponent.pot, 'home': is_home}
+            for opponent, is_home in event.fixtures
+        ]
+    if event.result is not None:
+        metrics = event.result.metrics
+        data['success'] = event.result.success
+        data['attempts'] = metrics.attempts
+        data['seconds'] = metrics.seconds
+        if event.result.stopped:
+            data['stopped'] = event.result.stopped
+            data['unplaced'] = event.result.unplaced
+    return data
+
+
+def sse_message(event: CeremonyEvent) -> bytes:
+    """Encode an event as one server-sent-events message, named after its kind"""
+
+    return f"event: {event.kind}\ndata: {json.dumps(event_to_dict(event))}\n\n".encode("utf-8")
+
+
+async def stream_ceremony(draw, max_attempts_per_team: int = 5000,
+                          max_global_attempts: int = 50) -> AsyncIterator[CeremonyEvent]:
+    """
+    Run draw.ceremony() step by step on a worker thread and yield each
+    event as soon as it is ready, keeping the event loop free while a team
+    is being drawn.
+    """
+
+    loop = asyncio.get_running_loop()
+    events = draw.ceremony(max_attempts_per_team, max_global_attempts)
+    finished = object()
+    while True:
+        event = await loop.run_in_executor(None, next, events, finished)
+        if event is finished:
+            return
+        yield event
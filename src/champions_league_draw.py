@@ -4,9 +4,18 @@ Champions League Draw System
 """
 
 import random
-from typing import List, Dict, Tuple
+import time
+from collections.abc import Mapping
+from typing import List, Optional
 from dataclasses import dataclass
-from collections import defaultdict
+
+from .budget import Budget, CancellationToken
+from .constraints import DrawConstraints
+from .draw_state import DrawState, iter_bits
+from .decomposition import PotPairSolver
+from .events import ConsoleObserver, DrawMetrics, DrawResult, Observable
+from .precheck import format_problems
+from .search import complete_draw, solve_two_phase
 
 
 @dataclass
@@ -28,145 +37,200 @@ class Team:
         return f"{self.name} ({self.country})"
 
 
-@dataclass
-class DrawConstraints:
-    """Draw constraints"""
-    matches_per_pot: int = 2
-    home_matches: int = 4
-    away_matches: int = 4
-
-
-class ChampionsLeagueDraw:
-    """Champions League draw manager"""
+class ChampionsLeagueDraw(Observable):
+    """
+    Champions League draw manager
+    
+    Progress is reported through observers (see events.py) rather than
+    printed; subscribe a ConsoleObserver for console output.
+    
+    constraints defaults to the Champions League format; pass one of the
+    presets in constraints.py to draw another competition.
+    """
     
-    def __init__(self, teams: List[Team]):
+    pot_by_pot = False
+    
+    def __init__(self, teams: List[Team], rng: Optional[random.Random] = None,
+                 constraints: Optional[DrawConstraints] = None):
+        super().__init__()
         self.teams = teams
-        self.constraints = DrawConstraints()
-        
-        self.fixtures: Dict[Team, List[Tuple[Team, bool]]] = {team: [] for team in teams}
-        self.opponents_by_pot: Dict[Team, Dict[int, int]] = {
-            team: {1: 0, 2: 0, 3: 0, 4: 0} for team in teams
-        }
-        self.home_away_count: Dict[Team, Dict[str, int]] = {
-            team: {'home': 0, 'away': 0} for team in teams
-        }
-        self.opponents_by_country: Dict[Team, Dict[str, int]] = {
-            team: defaultdict(int) for team in teams
-        }
+        self.constraints = constraints or DrawConstraints()
+        self.rng = rng if rng is not None else random
         
+        self.state = DrawState(teams, self.constraints)
+        self.metrics = DrawMetrics()
+        self.budget = Budget()
+    
+    @property
+    def fixtures(self) -> Mapping:
+        """Team -> [(opponent, is_home), ...]"""
+        return self.state.fixtures_view()
+    
+    @property
+    def opponents_by_pot(self) -> Mapping:
+        """Team -> {pot: opponents drawn from that pot}"""
+        return self.state.opponents_by_pot_view()
+    
+    @property
+    def home_away_count(self) -> Mapping:
+        """Team -> {'home': count, 'away': count}"""
+        return self.state.home_away_view()
+    
+    @property
+    def opponents_by_country(self) -> Mapping:
+        """Team -> {country: opponents drawn from that country}"""
+        return self.state.opponents_by_country_view()
+    
     def can_play_against(self, team1: Team, team2: Team, is_home: bool) -> bool:
         """Check if two teams can play against each other"""
         
-        if team1 == team2:
-            return False
-        
-        # Teams from the same country CANNOT play against each other
-        if team1.country == team2.country:
-            return False
-        
-        # Maximum 2 teams from the same country (for different countries)
-        if self.opponents_by_country[team1][team2.country] >= 2:
-            return False
-        if self.opponents_by_country[team2][team1.country] >= 2:
-            return False
-        
-        for opponent, _ in self.fixtures[team1]:
-            if opponent == team2:
-                return False
-        
-        if self.opponents_by_pot[team1][team2.pot] >= self.constraints.matches_per_pot:
-            return False
-        if self.opponents_by_pot[team2][team1.pot] >= self.constraints.matches_per_pot:
-            return False
-        
-        if is_home and self.home_away_count[team1]['home'] >= self.constraints.home_matches:
-            return False
-        if not is_home and self.home_away_count[team1]['away'] >= self.constraints.away_matches:
-            return False
-        if not is_home and self.home_away_count[team2]['home'] >= self.constraints.home_matches:
-            return False
-        if is_home and self.home_away_count[team2]['away'] >= self.constraints.away_matches:
-            return False
-        
-        return True
+        index = self.state.index
+        return self.state.can_play(index[team1], index[team2], is_home)
     
     def add_match(self, team1: Team, team2: Team, team1_home: bool):
         """Add a match between two teams"""
         
-        self.fixtures[team1].append((team2, team1_home))
-        self.opponents_by_pot[team1][team2.pot] += 1
-        self.opponents_by_country[team1][team2.country] += 1
-        
-        if team1_home:
-            self.home_away_count[team1]['home'] += 1
-        else:
-            self.home_away_count[team1]['away'] += 1
+        index = self.state.index
+        self.state.add_match(index[team1], index[team2], team1_home)
+    
+    def remove_match(self, team1: Team, team2: Team, team1_home: bool):
+        """Remove a match previously added with add_match"""
         
-        self.fixtures[team2].append((team1, not team1_home))
-        self.opponents_by_pot[team2][team1.pot] += 1
-        self.opponents_by_country[team2][team1.country] += 1
+        index = self.state.index
+        self.state.remove_match(index[team1], index[team2], team1_home)
+    
+    def _reset(self):
+        """Clear all matches"""
         
-        if team1_home:
-            self.home_away_count[team2]['away'] += 1
-        else:
-            self.home_away_count[team2]['home'] += 1
+        self.state.reset()
     
-    def perform_draw(self, max_attempts: int = 100) -> bool:
+    def perform_draw(self, max_attempts: int = 100, method: str = "restart",
+                     max_steps: int = 5000, timeout: Optional[float] = None,
+                     cancel: Optional[CancellationToken] = None) -> DrawResult:
         """
         Perform the draw
-        Returns True if successful, False otherwise
+        Returns a DrawResult, true if successful, with the run's metrics
+        
+        method="restart" retries random greedy draws from scratch.
+        method="backtrack" runs a backtracking search with forward checking;
+        each attempt is limited to max_steps search nodes before restarting.
+        method="pot_pairs" solves the draw one pot pair at a time
+        (see decomposition.py), with the same max_steps limit.
+        method="two_phase" draws the opponents first and then assigns
+        home/away by Euler-circuit orientation, with the same max_steps limit.
+        
+        Teams and constraints that break a necessary condition of
+        precheck.py are refused before the first attempt: the result then
+        fails with no attempts and lists the problems.
+        
+        timeout (seconds) and cancel (a budget.CancellationToken) stop the
+        draw early, checked between attempts and every few search nodes.
+        A draw that does not complete leaves its largest partial draw in
+        the engine, listed in the result with the matches still unplaced.
         """
         
+        if method not in ("restart", "backtrack", "pot_pairs", "two_phase"):
+            raise ValueError(f"Unknown draw method: {method}")
+        
+        self.metrics = metrics = DrawMetrics()
+        self.budget = budget = Budget(timeout, cancel)
+        start = time.perf_counter()
+        success = False
+        problems = format_problems(self.state.format)
+        if problems:
+            max_attempts = 0
+        
         for attempt in range(max_attempts):
-            self.fixtures = {team: [] for team in self.teams}
-            self.opponents_by_pot = {
-                team: {1: 0, 2: 0, 3: 0, 4: 0} for team in self.teams
-            }
-            self.home_away_count = {
-                team: {'home': 0, 'away': 0} for team in self.teams
-            }
-            self.opponents_by_country = {
-                team: defaultdict(int) for team in self.teams
-            }
+            if budget.exhausted():
+                break
+            self._reset()
+            metrics.attempts += 1
+            if self.observers:
+                self._emit("on_attempt_started", attempt + 1)
             
-            success = self._attempt_draw()
+            if method == "backtrack":
+                success = self._backtrack_draw(max_steps)
+            elif method == "pot_pairs":
+                success = bool(PotPairSolver(self.state, max_steps, rng=self.rng, budget=budget).solve())
+            elif method == "two_phase":
+                success = bool(solve_two_phase(self.state, max_steps, self.rng, budget))
+            else:
+                success = self._attempt_draw()
+                budget.record(self.state)
             
             if success:
-                print(f"Draw successful after {attempt + 1} attempt(s)")
-                return True
+                if method != "restart" and self.observers:
+                    self._emit_solution()
+                break
+            if budget.stopped:
+                break
+            
+            metrics.dead_ends += 1
+            if method != "restart" and self.observers:
+                self._emit("on_dead_end", None)
         
-        print(f"Unable to complete draw after {max_attempts} attempts")
-        return False
+        partial = ()
+        unplaced = 0
+        if not success and not problems:
+            unplaced = budget.restore(self.state)
+            teams = self.teams
+            partial = tuple((teams[i], teams[j], i_home) for i, j, i_home in self.state.trail)
+        
+        metrics.seconds = time.perf_counter() - start
+        result = DrawResult(success, method, metrics, problems, budget.stopped, partial, unplaced)
+        if self.observers:
+            self._emit("on_draw_finished", result)
+        return result
+    
+    def _emit_solution(self):
+        """Report a draw completed by a solver, match by match in trail order"""
+        
+        teams = self.teams
+        state = self.state
+        for i, j, i_home in state.trail:
+            self._emit("on_match_added", teams[i], teams[j], i_home)
+        for i in range(state.num_teams):
+            self._emit("on_team_completed", teams[i])
     
     def _attempt_draw(self) -> bool:
         """Attempt a complete draw"""
         
-        teams_shuffled = self.teams.copy()
-        random.shuffle(teams_shuffled)
+        state = self.state
+        observers = self.observers
+        metrics = self.metrics
+        teams_shuffled = list(range(state.num_teams))
+        self.rng.shuffle(teams_shuffled)
         
         for team in teams_shuffled:
-            while len(self.fixtures[team]) < 8:
+            while state.degree[team] < state.matches_per_team:
                 possible_opponents = []
+                metrics.pot_scans += state.num_pots
                 
-                for pot in [1, 2, 3, 4]:
-                    if self.opponents_by_pot[team][pot] < self.constraints.matches_per_pot:
-                        pot_teams = [t for t in self.teams if t.pot == pot and t != team]
-                        random.shuffle(pot_teams)
-                        
-                        for opponent in pot_teams:
-                            if self.can_play_against(team, opponent, True):
-                                possible_opponents.append((opponent, True))
-                            elif self.can_play_against(team, opponent, False):
-                                possible_opponents.append((opponent, False))
+                for pot in range(state.num_pots):
+                    home, away = state.candidates(team, pot)
+                    possible_opponents.extend((opponent, True) for opponent in iter_bits(home))
+                    possible_opponents.extend((opponent, False) for opponent in iter_bits(away & ~home))
                 
                 if not possible_opponents:
+                    if observers:
+                        self._emit("on_dead_end", self.teams[team])
                     return False
                 
-                opponent, is_home = random.choice(possible_opponents)
-                self.add_match(team, opponent, is_home)
+                opponent, is_home = self.rng.choice(possible_opponents)
+                state.add_match(team, opponent, is_home)
+                if observers:
+                    self._emit("on_match_added", self.teams[team], self.teams[opponent], is_home)
+            
+            if observers:
+                self._emit("on_team_completed", self.teams[team])
         
         return True
     
+    def _backtrack_draw(self, max_steps: int) -> bool:
+        """Depth-first search that undoes only the last choices on a dead end"""
+        
+        return bool(complete_draw(self.state, max_steps, rng=self.rng, budget=self.budget))
+    
     def display_results(self):
         """Display the draw results"""
         
@@ -198,7 +262,7 @@ class ChampionsLeagueDraw:
         print("CHAMPIONS LEAGUE DRAW RESULTS - POT BY POT")
         print("="*80)
         
-        for pot_num in [1, 2, 3, 4]:
+        for pot_num in self.state.pots:
             print(f"\n{'='*80}")
             print(f"POT {pot_num}")
             print(f"{'='*80}")
@@ -224,34 +288,7 @@ class ChampionsLeagueDraw:
     def verify_constraints(self) -> bool:
         """Verify all constraints are met"""
         
-        errors = []
-        
-        for team in self.teams:
-            if len(self.fixtures[team]) != 8:
-                errors.append(f"{team.name}: {len(self.fixtures[team])} matches instead of 8")
-            
-            home_count = sum(1 for _, is_home in self.fixtures[team] if is_home)
-            away_count = sum(1 for _, is_home in self.fixtures[team] if not is_home)
-            
-            if home_count != 4:
-                errors.append(f"{team.name}: {home_count} home matches instead of 4")
-            if away_count != 4:
-                errors.append(f"{team.name}: {away_count} away matches instead of 4")
-            
-            for pot in [1, 2, 3, 4]:
-                count = self.opponents_by_pot[team][pot]
-                if count != 2:
-                    errors.append(f"{team.name}: {count} opponents from pot {pot} instead of 2")
-            
-            # Check no teams from same country play each other
-            for opponent, _ in self.fixtures[team]:
-                if opponent.country == team.country:
-                    errors.append(f"{team.name} plays against {opponent.name} (same country: {team.country})")
-            
-            # Check maximum 2 opponents from same country
-            for country, count in self.opponents_by_country[team].items():
-                if count > 2:
-                    errors.append(f"{team.name}: {count} opponents from {country} (max 2)")
+        errors = self.state.constraint_errors()
         
         if errors:
             print("\nCONSTRAINT VIOLATIONS:")
@@ -315,6 +352,117 @@ def create_sample_teams() -> List[Team]:
     return teams
 
 
+def create_europa_league_teams() -> List[Team]:
+    """Create the Europa League teams (2024-2025 season), drawn with EUROPA_LEAGUE"""
+    
+    teams = [
+        # Pot 1
+        Team("Roma", "ITA", 1),
+        Team("Manchester United", "ENG", 1),
+        Team("Porto", "POR", 1),
+        Team("Ajax", "NED", 1),
+        Team("Rangers", "SCO", 1),
+        Team("Eintracht Frankfurt", "GER", 1),
+        Team("Lazio", "ITA", 1),
+        Team("Tottenham", "ENG", 1),
+        Team("Slavia Prague", "CZE", 1),
+        
+        # Pot 2
+        Team("Real Sociedad", "ESP", 2),
+        Team("AZ Alkmaar", "NED", 2),
+        Team("Braga", "POR", 2),
+        Team("Olympiacos", "GRE", 2),
+        Team("Lyon", "FRA", 2),
+        Team("PAOK", "GRE", 2),
+        Team("Fenerbahce", "TUR", 2),
+        Team("Maccabi Tel Aviv", "ISR", 2),
+        Team("Ferencvaros", "HUN", 2),
+        
+        # Pot 3
+        Team("Qarabag", "AZE", 3),
+        Team("Galatasaray", "TUR", 3),
+        Team("Viktoria Plzen", "CZE", 3),
+        Team("Bodo/Glimt", "NOR", 3),
+        Team("Union Saint-Gilloise", "BEL", 3),
+        Team("Dynamo Kyiv", "UKR", 3),
+        Team("Midtjylland", "DEN", 3),
+        Team("Malmo", "SWE", 3),
+        Team("Athletic Club", "ESP", 3),
+        
+        # Pot 4
+        Team("Hoffenheim", "GER", 4),
+        Team("Nice", "FRA", 4),
+        Team("Anderlecht", "BEL", 4),
+        Team("Twente", "NED", 4),
+        Team("Besiktas", "TUR", 4),
+        Team("FCSB", "ROU", 4),
+        Team("RFS", "LVA", 4),
+        Team("Ludogorets", "BUL", 4),
+        Team("Elfsborg", "SWE", 4),
+    ]
+    
+    return teams
+
+
+def create_conference_league_teams() -> List[Team]:
+    """
+    Create the Conference League teams (2024-2025 season), drawn with
+    CONFERENCE_LEAGUE: six pots of six, seeded by club coefficient
+    """
+    
+    teams = [
+        # Pot 1
+        Team("Chelsea", "ENG", 1),
+        Team("Copenhagen", "DEN", 1),
+        Team("Gent", "BEL", 1),
+        Team("Fiorentina", "ITA", 1),
+        Team("LASK", "AUT", 1),
+        Team("Real Betis", "ESP", 1),
+        
+        # Pot 2
+        Team("Istanbul Basaksehir", "TUR", 2),
+        Team("Legia Warsaw", "POL", 2),
+        Team("Djurgarden", "SWE", 2),
+        Team("Heidenheim", "GER", 2),
+        Team("Molde", "NOR", 2),
+        Team("Rapid Wien", "AUT", 2),
+        
+        # Pot 3
+        Team("APOEL", "CYP", 3),
+        Team("Panathinaikos", "GRE", 3),
+        Team("Omonia", "CYP", 3),
+        Team("Cercle Brugge", "BEL", 3),
+        Team("Hearts", "SCO", 3),
+        Team("Vitoria SC", "POR", 3),
+        
+        # Pot 4
+        Team("Jagiellonia", "POL", 4),
+        Team("Olimpija Ljubljana", "SVN", 4),
+        Team("Pafos", "CYP", 4),
+        Team("Borac Banja Luka", "BIH", 4),
+        Team("Mlada Boleslav", "CZE", 4),
+        Team("St. Gallen", "SUI", 4),
+        
+        # Pot 5
+        Team("Astana", "KAZ", 5),
+        Team("HJK", "FIN", 5),
+        Team("Lugano", "SUI", 5),
+        Team("Backa Topola", "SRB", 5),
+        Team("Celje", "SVN", 5),
+        Team("Shamrock Rovers", "IRL", 5),
+        
+        # Pot 6
+        Team("Dinamo Minsk", "BLR", 6),
+        Team("Vikingur Reykjavik", "ISL", 6),
+        Team("Petrocub", "MDA", 6),
+        Team("Larne", "NIR", 6),
+        Team("Noah", "ARM", 6),
+        Team("The New Saints", "WAL", 6),
+    ]
+    
+    return teams
+
+
 def main():
     """Main function"""
     
@@ -331,9 +479,10 @@ def main():
     print(f"Maximum 2 opponents from any single country\n")
     
     draw = ChampionsLeagueDraw(teams)
+    draw.add_observer(ConsoleObserver())
     
     print("Starting draw...")
-    success = draw.perform_draw(max_attempts=25000)
+    success = draw.perform_draw(method="backtrack")
     
     if success:
         draw.display_results_by_pot()
@@ -4,9 +4,17 @@ Simulates the real UEFA draw process where teams are drawn pot by pot
 """
 
 from dataclasses import dataclass
-from typing import List, Dict, Tuple, Optional
-from collections import defaultdict
+from collections.abc import Mapping
+from typing import Iterator, List, Optional
 import random
+import time
+
+from .budget import Budget, CancellationToken
+from .constraints import DrawConstraints
+from .draw_state import DrawState, iter_bits
+from .events import CeremonyEvent, ConsoleObserver, DrawMetrics, DrawResult, Observable
+from .feasibility import FeasibilityOracle
+from .precheck import format_problems
 
 
 @dataclass(frozen=True)
@@ -17,216 +25,305 @@ class Team:
     pot: int
 
 
-@dataclass
-class DrawConstraints:
-    """Draw constraints"""
-    matches_per_pot: int = 2
-    home_matches: int = 4
-    away_matches: int = 4
-
-
-class SequentialChampionsLeagueDraw:
+class SequentialChampionsLeagueDraw(Observable):
     """
     Sequential draw system - draws pot by pot like real UEFA ceremony
+    
+    With lookahead enabled (the default), a feasibility oracle is consulted
+    before each pick so that only opponents leaving a completable draw are
+    offered, as in the UEFA draw software.
+    
+    Progress is reported through observers (see events.py); subscribe a
+    ConsoleObserver to print the ceremony.
     """
     
-    def __init__(self, teams: List[Team], constraints: DrawConstraints = None):
+    pot_by_pot = True
+    
+    def __init__(self, teams: List[Team], constraints: DrawConstraints = None,
+                 lookahead: bool = True, rng: Optional[random.Random] = None):
+        super().__init__()
         self.teams = teams
         self.constraints = constraints or DrawConstraints()
+        self.rng = rng if rng is not None else random
+        self.oracle = FeasibilityOracle(rng=rng) if lookahead else None
         
         # Group teams by pot
-        self.teams_by_pot = {1: [], 2: [], 3: [], 4: []}
+        self.teams_by_pot = {pot: [] for pot in sorted({team.pot for team in teams})}
         for team in teams:
             self.teams_by_pot[team.pot].append(team)
         
         # Results
-        self.fixtures = {team: [] for team in teams}
-        self.opponents_by_pot = {team: {1: 0, 2: 0, 3: 0, 4: 0} for team in teams}
-        self.home_away_count = {team: {'home': 0, 'away': 0} for team in teams}
-        self.opponents_by_country = {team: defaultdict(int) for team in teams}
+        self.state = DrawState(teams, self.constraints)
         
         # Current draw state
         self.current_pot = None
         self.current_team = None
         self.draw_history = []
+        self.metrics = DrawMetrics()
+        self.budget = Budget()
+    
+    @property
+    def fixtures(self) -> Mapping:
+        """Team -> [(opponent, is_home), ...]"""
+        return self.state.fixtures_view()
+    
+    @property
+    def opponents_by_pot(self) -> Mapping:
+        """Team -> {pot: opponents drawn from that pot}"""
+        return self.state.opponents_by_pot_view()
+    
+    @property
+    def home_away_count(self) -> Mapping:
+        """Team -> {'home': count, 'away': count}"""
+        return self.state.home_away_view()
+    
+    @property
+    def opponents_by_country(self) -> Mapping:
+        """Team -> {country: opponents drawn from that country}"""
+        return self.state.opponents_by_country_view()
     
     def can_play_against(self, team1: Team, team2: Team, is_home: bool) -> bool:
         """Check if two teams can play against each other"""
         
-        if team1 == team2:
-            return False
-        
-        # Same country cannot play
-        if team1.country == team2.country:
-            return False
-        
-        # Maximum 2 from same foreign country
-        if self.opponents_by_country[team1][team2.country] >= 2:
-            return False
-        if self.opponents_by_country[team2][team1.country] >= 2:
-            return False
-        
-        # Already played
-        for opponent, _ in self.fixtures[team1]:
-            if opponent == team2:
-                return False
-        
-        # Pot distribution
-        if self.opponents_by_pot[team1][team2.pot] >= self.constraints.matches_per_pot:
-            return False
-        if self.opponents_by_pot[team2][team1.pot] >= self.constraints.matches_per_pot:
-            return False
-        
-        # Home/away balance
-        if is_home:
-            if self.home_away_count[team1]['home'] >= self.constraints.home_matches:
-                return False
-            if self.home_away_count[team2]['away'] >= self.constraints.away_matches:
-                return False
-        else:
-            if self.home_away_count[team1]['away'] >= self.constraints.away_matches:
-                return False
-            if self.home_away_count[team2]['home'] >= self.constraints.home_matches:
-                return False
-        
-        return True
+        index = self.state.index
+        return self.state.can_play(index[team1], index[team2], is_home)
     
     def add_match(self, team1: Team, team2: Team, team1_home: bool):
         """Add a match between two teams"""
         
-        self.fixtures[team1].append((team2, team1_home))
-        self.opponents_by_pot[team1][team2.pot] += 1
-        self.opponents_by_country[team1][team2.country] += 1
-        
-        if team1_home:
-            self.home_away_count[team1]['home'] += 1
-        else:
-            self.home_away_count[team1]['away'] += 1
-        
-        # Update opponent
-        self.fixtures[team2].append((team1, not team1_home))
-        self.opponents_by_pot[team2][team1.pot] += 1
-        self.opponents_by_country[team2][team1.country] += 1
-        
-        if team1_home:
-            self.home_away_count[team2]['away'] += 1
-        else:
-            self.home_away_count[team2]['home'] += 1
+        index = self.state.index
+        self.state.add_match(index[team1], index[team2], team1_home)
     
     def draw_team_opponents(self, team: Team, max_attempts: int = 1000) -> bool:
         """
-        Draw all 8 opponents for a specific team
+        Draw all opponents for a specific team
         Returns True if successful
         """
         
         self.current_team = team
         
         for attempt in range(max_attempts):
-            # Save state
-            saved_fixtures = {t: list(self.fixtures[t]) for t in self.teams}
-            saved_opponents_pot = {t: dict(self.opponents_by_pot[t]) for t in self.teams}
-            saved_home_away = {t: dict(self.home_away_count[t]) for t in self.teams}
-            saved_opponents_country = {t: defaultdict(int, self.opponents_by_country[t]) for t in self.teams}
+            if self.budget.exhausted():
+                return False
             
-            # Try to draw 8 matches for this team
-            success = self._attempt_team_draw(team)
+            # Mark the undo trail
+            mark = self.state.checkpoint()
+            
+            # Try to draw every match for this team
+            success = self._attempt_team_draw(self.state.index[team])
             
             if success:
                 return True
+            if self.budget.stopped:
+                self.state.rollback(mark)
+                return False
             
-            # Restore state
-            self.fixtures = saved_fixtures
-            self.opponents_by_pot = saved_opponents_pot
-            self.home_away_count = saved_home_away
-            self.opponents_by_country = saved_opponents_country
+            # Report the dead end before its matches are undone
+            self.metrics.dead_ends += 1
+            if self.observers:
+                self._emit("on_dead_end", team)
+            
+            # Undo only the matches added by this attempt
+            self.state.rollback(mark)
         
         return False
     
-    def _attempt_team_draw(self, team: Team) -> bool:
+    def _attempt_team_draw(self, team: int) -> bool:
         """Attempt to draw all opponents for one team"""
         
-        initial_matches = len(self.fixtures[team])
+        state = self.state
         
-        while len(self.fixtures[team]) < 8:
+        while state.degree[team] < state.matches_per_team:
+            # Every pick scans each pot once
+            self.metrics.pot_scans += state.num_pots
+            
+            if self.oracle is not None:
+                # Only offer opponents that leave a completable draw
+                pick = self._pick_feasible(team)
+                if pick is None:
+                    return False
+                
+                opponent, is_home = pick
+                self._add_pick(team, opponent, is_home)
+                continue
+            
             # Find possible opponents
             possible_opponents = []
             
-            for pot in [1, 2, 3, 4]:
-                if self.opponents_by_pot[team][pot] < self.constraints.matches_per_pot:
-                    pot_teams = [t for t in self.teams_by_pot[pot] if t != team]
-                    random.shuffle(pot_teams)
-                    
-                    for opponent in pot_teams:
-                        # Skip if opponent already has 8 matches
-                        if len(self.fixtures[opponent]) >= 8:
-                            continue
-                        
-                        if self.can_play_against(team, opponent, True):
-                            possible_opponents.append((opponent, True))
-                        elif self.can_play_against(team, opponent, False):
-                            possible_opponents.append((opponent, False))
+            for pot in range(state.num_pots):
+                home, away = state.candidates(team, pot)
+                possible_opponents.extend((opponent, True) for opponent in iter_bits(home))
+                possible_opponents.extend((opponent, False) for opponent in iter_bits(away & ~home))
             
             if not possible_opponents:
                 return False
             
-            opponent, is_home = random.choice(possible_opponents)
-            self.add_match(team, opponent, is_home)
+            opponent, is_home = self.rng.choice(possible_opponents)
+            self._add_pick(team, opponent, is_home)
         
         return True
     
-    def perform_draw_sequential(self, max_attempts_per_team: int = 5000, max_global_attempts: int = 50) -> bool:
+    def _add_pick(self, team: int, opponent: int, is_home: bool):
+        """Add a drawn match and report it"""
+        
+        self.state.add_match(team, opponent, is_home)
+        if self.observers:
+            self._emit("on_match_added", self.teams[team], self.teams[opponent], is_home)
+    
+    def _pick_feasible(self, team: int, max_budget: int = 100000):
+        """
+        Pick a random (opponent, is_home) for team among those that leave a
+        completable draw. Picks the oracle cannot decide are retried with a
+        larger search budget; returns None if nothing could be proven.
+        """
+        
+        state = self.state
+        options = {}
+        for pot in range(state.num_pots):
+            home, away = state.candidates(team, pot)
+            for opponent in iter_bits(home):
+                options.setdefault(opponent, []).append(True)
+            for opponent in iter_bits(away):
+                options.setdefault(opponent, []).append(False)
+        
+        picks = []
+        opponents = list(options)
+        self.rng.shuffle(opponents)
+        for opponent in opponents:
+            orientations = options[opponent]
+            self.rng.shuffle(orientations)
+            picks.extend((opponent, is_home) for is_home in orientations)
+        
+        budget = self.oracle.max_steps
+        while picks and budget <= max_budget:
+            undecided = []
+            for opponent, is_home in picks:
+                if self.budget.exhausted():
+                    return None
+                mark = state.checkpoint()
+                state.add_match(team, opponent, is_home)
+                verdict = self.oracle.is_feasible(state, budget, self.budget)
+                state.rollback(mark)
+                
+                if verdict:
+                    return opponent, is_home
+                if verdict is None:
+                    undecided.append((opponent, is_home))
+            
+            picks = undecided
+            budget *= 4
+        
+        return None
+    
+    def perform_draw_sequential(self, max_attempts_per_team: int = 5000,
+                                max_global_attempts: int = 50, timeout: Optional[float] = None,
+                                cancel: Optional[CancellationToken] = None) -> DrawResult:
         """
         Perform the draw sequentially, pot by pot
-        Returns True if successful
+        Returns a DrawResult, true if successful, with the run's metrics
+        
+        timeout (seconds) and cancel (a budget.CancellationToken) stop the
+        draw early, checked before every pick; the result then lists the
+        largest partial draw, which is left in the engine.
+        """
+        
+        for event in self.ceremony(max_attempts_per_team, max_global_attempts, timeout, cancel):
+            pass
+        return event.result
+    
+    def ceremony(self, max_attempts_per_team: int = 5000, max_global_attempts: int = 50,
+                 timeout: Optional[float] = None,
+                 cancel: Optional[CancellationToken] = None) -> Iterator[CeremonyEvent]:
+        """
+        Perform the draw sequentially, yielding each step as it happens
+        
+        Each team is announced (team_selected, with current_team set to it)
+        before its opponents are drawn and yielded with its fixtures as soon
+        as they are (team_drawn), so a live ceremony can show the first team
+        after one team's solve time. The last event is draw_finished with the DrawResult.
+        Observers are notified exactly as by perform_draw_sequential();
+        the metrics' timings include the time spent between events.
+        Teams failing the pre-check (precheck.py) go straight to a failed
+        draw_finished listing the problems. timeout and cancel stop the
+        draw as in perform_draw_sequential(); the time a consumer holds an
+        event counts against the timeout.
         """
         
+        self.metrics = metrics = DrawMetrics()
+        self.budget = budget = Budget(timeout, cancel)
+        observers = self.observers
+        start = time.perf_counter()
+        success = False
+        problems = format_problems(self.state.format)
+        if problems:
+            max_global_attempts = 0
+        
         for global_attempt in range(max_global_attempts):
-            # Reset everything
-            self.fixtures = {team: [] for team in self.teams}
-            self.opponents_by_pot = {team: {1: 0, 2: 0, 3: 0, 4: 0} for team in self.teams}
-            self.home_away_count = {team: {'home': 0, 'away': 0} for team in self.teams}
-            self.opponents_by_country = {team: defaultdict(int) for team in self.teams}
+            if budget.exhausted():
+                break
             
-            print("\n" + "="*80)
-            print(f"STARTING SEQUENTIAL DRAW - ATTEMPT {global_attempt + 1}")
-            print("="*80)
+            # Reset everything
+            self.state.reset()
+            metrics.attempts += 1
+            if observers:
+                self._emit("on_attempt_started", global_attempt + 1)
+            yield CeremonyEvent("attempt_started", global_attempt + 1)
             
-            all_pots_success = True
+            success = True
             
             # Draw pot by pot
-            for pot_number in [1, 2, 3, 4]:
+            for pot_number in self.teams_by_pot:
                 self.current_pot = pot_number
-                print(f"\n{'='*80}")
-                print(f"POT {pot_number} DRAW")
-                print(f"{'='*80}\n")
+                pot_start = time.perf_counter()
+                if observers:
+                    self._emit("on_pot_started", pot_number)
+                yield CeremonyEvent("pot_started", global_attempt + 1, pot_number)
                 
                 teams_in_pot = list(self.teams_by_pot[pot_number])
-                random.shuffle(teams_in_pot)
+                self.rng.shuffle(teams_in_pot)
                 
                 for team in teams_in_pot:
-                    print(f"\nDrawing {team.name} ({team.country})...")
+                    # Announce the team before its opponents are drawn
+                    self.current_team = team
+                    yield CeremonyEvent("team_selected", global_attempt + 1, pot_number, team)
                     
-                    success = self.draw_team_opponents(team, max_attempts_per_team)
-                    
-                    if not success:
-                        print(f"Failed to draw {team.name}, restarting entire draw...")
-                        all_pots_success = False
+                    if not self.draw_team_opponents(team, max_attempts_per_team):
+                        # Restart the entire draw
+                        success = False
                         break
                     
-                    # Display results for this team immediately
-                    self.display_team_result(team)
+                    self.current_team = None
+                    if observers:
+                        self._emit("on_team_completed", team)
+                    yield CeremonyEvent("team_drawn", global_attempt + 1, pot_number, team,
+                                        tuple(self.fixtures[team]))
                 
-                if not all_pots_success:
+                seconds = time.perf_counter() - pot_start
+                metrics.pot_seconds[pot_number] = metrics.pot_seconds.get(pot_number, 0.0) + seconds
+                if not success:
                     break
+                if observers:
+                    self._emit("on_pot_completed", pot_number, seconds)
+                yield CeremonyEvent("pot_completed", global_attempt + 1, pot_number)
             
-            if all_pots_success:
-                print(f"\n{'='*80}")
-                print("DRAW COMPLETED SUCCESSFULLY!")
-                print(f"{'='*80}\n")
-                return True
-        
-        print(f"\nFailed to complete draw after {max_global_attempts} global attempts")
-        return False
+            if success:
+                break
+            budget.record(self.state)
+            if budget.stopped:
+                break
+        
+        partial = ()
+        unplaced = 0
+        if not success and not problems:
+            unplaced = budget.restore(self.state)
+            teams = self.teams
+            partial = tuple((teams[i], teams[j], i_home) for i, j, i_home in self.state.trail)
+        
+        metrics.seconds = time.perf_counter() - start
+        result = DrawResult(success, "sequential", metrics, problems, budget.stopped, partial, unplaced)
+        if observers:
+            self._emit("on_draw_finished", result)
+        yield CeremonyEvent("draw_finished", metrics.attempts, result=result)
     
     def display_team_result(self, team: Team):
         """Display the draw result for a single team"""
@@ -253,7 +350,7 @@ class SequentialChampionsLeagueDraw:
         print("COMPLETE DRAW RESULTS")
         print("="*80)
         
-        for pot_number in [1, 2, 3, 4]:
+        for pot_number in self.teams_by_pot:
             print(f"\n{'='*80}")
             print(f"POT {pot_number}")
             print(f"{'='*80}")
@@ -264,34 +361,7 @@ class SequentialChampionsLeagueDraw:
     def verify_constraints(self) -> bool:
         """Verify all constraints are met"""
         
-        errors = []
-        
-        for team in self.teams:
-            if len(self.fixtures[team]) != 8:
-                errors.append(f"{team.name}: {len(self.fixtures[team])} matches instead of 8")
-            
-            home_count = sum(1 for _, is_home in self.fixtures[team] if is_home)
-            away_count = sum(1 for _, is_home in self.fixtures[team] if not is_home)
-            
-            if home_count != 4:
-                errors.append(f"{team.name}: {home_count} home matches instead of 4")
-            if away_count != 4:
-                errors.append(f"{team.name}: {away_count} away matches instead of 4")
-            
-            for pot in [1, 2, 3, 4]:
-                count = self.opponents_by_pot[team][pot]
-                if count != 2:
-                    errors.append(f"{team.name}: {count} opponents from pot {pot} instead of 2")
-            
-            # Check same country
-            for opponent, _ in self.fixtures[team]:
-                if opponent.country == team.country:
-                    errors.append(f"{team.name} plays {opponent.name} (same country)")
-            
-            # Check max 2 from same country
-            for country, count in self.opponents_by_country[team].items():
-                if count > 2:
-                    errors.append(f"{team.name}: {count} opponents from {country} (max 2)")
+        errors = self.state.constraint_errors()
         
         if errors:
             print("\n" + "="*80)
@@ -351,6 +421,7 @@ def main():
     print(f"Maximum 2 opponents from any single country")
     
     draw = SequentialChampionsLeagueDraw(teams)
+    draw.add_observer(ConsoleObserver())
     
     success = draw.perform_draw_sequential(max_attempts_per_team=5000)
     
@@ -0,0 +1,151 @@
+"""
+Conditional matchup probabilities
+Chances of every matchup given the part of a draw already made
+"""
+
+import random
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .counting import CompletionCounter, CountLimitExceeded, remaining_matches
+from .draw_state import DrawState
+from .montecarlo import MatchupCounts
+from .sampler import DrawSampler
+from .search import complete_draw, state_key
+
+
+class ConditionalMatchups:
+    """
+    Matchup probabilities over the completions of a partial draw
+
+    Every valid completion of the partial draw counts once, so a
+    probability is the share of completions in which the matchup happens.
+    The completions are sampled: the partial draw is completed once by
+    search (restarting up to max_attempts times with max_steps nodes
+    each), then a DrawSampler walks the completions with the matches
+    already drawn fixed, keeping one draw every thinning steps; its redraw
+    move reshuffles the open matches among a few teams at a time, so the
+    walk is not confined to completions near the first one. Sampling
+    stops after samples draws or time_limit seconds, whichever comes
+    first; MatchupCounts.interval() gives the resulting uncertainty.
+
+    Once at most exact_matches matches are left to draw, the completions
+    are counted instead (counting.CompletionCounter, memoizing at most
+    max_states residuals): draws is then the number of completions and
+    the probabilities are exact. If the count outgrows max_states the
+    completions are sampled after all.
+
+    Counts are cached per partial draw (format and search.state_key), so
+    asking again while a ceremony is paused, or asking about another team,
+    costs one lookup. The cache keeps the cache_size most recent draws.
+    """
+
+    def __init__(self, samples: int = 2000, thinning: int = 50, burn_in: int = 5000,
+                 time_limit: float = 1.0, max_steps: int = 5000, max_attempts: int = 20,
+                 exact_matches: int = 18, max_states: int = 10000, cache_size: int = 256,
+                 rng: Optional[random.Random] = None):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+
+        self.samples = samples
+        self.thinning = thinning
+        self.burn_in = burn_in
+        self.time_limit = time_limit
+        self.max_steps = max_steps
+        self.max_attempts = max_attempts
+        self.exact_matches = exact_matches
+        self.max_states = max_states
+        self.cache_size = cache_size
+        self.rng = rng if rng is not None else random
+        self.cache: "OrderedDict[tuple, MatchupCounts]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.exact = 0
+
+    def clear(self):
+        """Forget every cached answer"""
+
+        self.cache.clear()
+
+    def counts(self, state: DrawState) -> MatchupCounts:
+        """Matchup counts over sampled completions of the partial draw in state"""
+
+        key = (state.format, state_key(state))
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return cached
+
+        self.misses += 1
+        counts = None
+        if remaining_matches(state) <= self.exact_matches:
+            counts = self._count(state)
+        if counts is None:
+            counts = self._sample(state)
+        self.cache[key] = counts
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return counts
+
+    def _count(self, state: DrawState) -> Optional[MatchupCounts]:
+        try:
+            counts = CompletionCounter(self.max_states).matchup_counts(state)
+        except (CountLimitExceeded, OverflowError):
+            return None
+        if not counts.draws:
+            raise ValueError("The partial draw cannot be completed")
+        self.exact += 1
+        return counts
+
+    def _sample(self, state: DrawState) -> MatchupCounts:
+        counts = MatchupCounts(state)
+        drawn = [(i, j) for i, j, _ in state.trail]
+
+        completion = state.copy()
+        for _ in range(self.max_attempts):
+            result = complete_draw(completion, self.max_steps, rng=self.rng)
+            if result is not None:
+                break
+        if result is False:
+            raise ValueError("The partial draw cannot be completed")
+        if result is None:
+            raise RuntimeError(
+                f"No completion found in {self.max_attempts} searches of {self.max_steps} steps")
+
+        sampler = DrawSampler(completion, rng=self.rng, fixed=drawn)
+        if len(drawn) == len(sampler.matches):
+            counts.add(sampler)
+            return counts
+
+        deadline = time.perf_counter() + self.time_limit
+        for draw in sampler.sample(self.samples, self.burn_in, self.thinning):
+            counts.add(draw)
+            if time.perf_counter() > deadline:
+                break
+        return counts
+
+    def probabilities(self, draw, team=None) -> Dict:
+        """
+        Opponent -> probability that team meets it, for every opponent with
+        a non-zero chance. draw is a SequentialChampionsLeagueDraw (or any
+        engine exposing its DrawState as state) or a DrawState; team
+        defaults to the team a paused ceremony has just selected (its
+        team_selected event), before any of its opponents are drawn.
+        """
+
+        state = getattr(draw, 'state', draw)
+        if team is None:
+            team = getattr(draw, 'current_team', None)
+            if team is None:
+                raise ValueError("No team has been selected; pass the team to ask about")
+
+        counts = self.counts(state)
+        row = state.index[team] * state.num_teams
+        return {
+            opponent: counts.matchups[row + j] / counts.draws
+            for j, opponent in enumerate(state.teams)
+            if counts.matchups[row + j]
+        }
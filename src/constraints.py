@@ -0,0 +1,169 @@
+"""
+Draw formats
+Constraint configuration for league-phase draws, compiled into lookup tables
+"""
+
+from array import array
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+
+# Default maximum number of opponents a team may face from any single country
+MAX_OPPONENTS_PER_COUNTRY = 2
+
+
+@dataclass(frozen=True)
+class DrawConstraints:
+    """
+    Draw constraints
+
+    The number of pots is taken from the teams; every team plays
+    matches_per_pot opponents from each pot, home_matches at home and
+    away_matches away. forbidden_pairs lists pairs of countries whose
+    teams may never be drawn together (UEFA's prohibited clashes);
+    protected_pairs lists pairs of teams, by name, kept apart.
+    competition names the tournament in exports.
+    """
+    matches_per_pot: int = 2
+    home_matches: int = 4
+    away_matches: int = 4
+    max_per_country: int = MAX_OPPONENTS_PER_COUNTRY
+    same_country_allowed: bool = False
+    forbidden_pairs: Tuple[Tuple[str, str], ...] = ()
+    protected_pairs: Tuple[Tuple[str, str], ...] = ()
+    competition: str = "UEFA Champions League 2024-2025"
+
+    def __post_init__(self):
+        # Accept lists, but keep the constraints hashable
+        for name in ('forbidden_pairs', 'protected_pairs'):
+            pairs = tuple(tuple(pair) for pair in getattr(self, name))
+            if any(len(pair) != 2 for pair in pairs):
+                raise ValueError(f"{name} must hold pairs")
+            object.__setattr__(self, name, pairs)
+
+    @property
+    def matches_per_team(self) -> int:
+        return self.home_matches + self.away_matches
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable form, read back by from_dict"""
+
+        data = asdict(self)
+        data['forbidden_pairs'] = [list(pair) for pair in self.forbidden_pairs]
+        data['protected_pairs'] = [list(pair) for pair in self.protected_pairs]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DrawConstraints":
+        return cls(**data)
+
+
+# League-phase formats from 2024-2025: 36 teams each
+CHAMPIONS_LEAGUE = DrawConstraints()
+EUROPA_LEAGUE = DrawConstraints(competition="UEFA Europa League 2024-2025")
+CONFERENCE_LEAGUE = DrawConstraints(matches_per_pot=1, home_matches=3, away_matches=3,
+                                    competition="UEFA Conference League 2024-2025")
+
+FORMATS: Dict[str, DrawConstraints] = {
+    'ucl': CHAMPIONS_LEAGUE,
+    'uel': EUROPA_LEAGUE,
+    'uecl': CONFERENCE_LEAGUE,
+}
+
+
+class DrawFormat:
+    """
+    A format compiled for a list of teams, given as (name, country, pot)
+
+    Everything a DrawState needs that does not change during a draw:
+    team ids by pot and country, bitmasks of pot and country members, and
+    for each team the bitmask of opponents it may never meet (itself,
+    same-country teams unless allowed, forbidden countries and protected
+    pairs). The empty-draw domains follow directly from these, so a reset
+    only copies a tuple.
+    """
+
+    def __init__(self, entries: Sequence[Tuple[str, str, int]], constraints: DrawConstraints):
+        self.constraints = constraints
+        self.num_teams = len(entries)
+        self.names: List[str] = [name for name, _, _ in entries]
+        names = self.names
+        team_countries = [country for _, country, _ in entries]
+        team_pots = [pot for _, _, pot in entries]
+
+        self.pots: List[int] = sorted(set(team_pots))
+        self.countries: List[str] = sorted(set(team_countries))
+        pot_index = {pot: p for p, pot in enumerate(self.pots)}
+        country_index = {country: c for c, country in enumerate(self.countries)}
+
+        self.num_pots = len(self.pots)
+        self.num_countries = len(self.countries)
+        self.matches_per_team = constraints.matches_per_team
+        self.quota = constraints.matches_per_pot
+        self.country_cap = constraints.max_per_country
+
+        self.team_pot = array('B', (pot_index[pot] for pot in team_pots))
+        self.team_country = array('H', (country_index[country] for country in team_countries))
+        self.pot_members: List[List[int]] = [[] for _ in self.pots]
+        self.country_members: List[List[int]] = [[] for _ in self.countries]
+        for i in range(self.num_teams):
+            self.pot_members[self.team_pot[i]].append(i)
+            self.country_members[self.team_country[i]].append(i)
+        self.pot_masks: List[int] = [sum(1 << i for i in members) for members in self.pot_members]
+        self.country_masks: List[int] = [sum(1 << i for i in members) for members in self.country_members]
+
+        # Opponents ruled out by the pair rules
+        self.banned: List[int] = [0] * self.num_teams
+        for a, b in constraints.forbidden_pairs:
+            if a in country_index and b in country_index:
+                mask_a = self.country_masks[country_index[a]]
+                mask_b = self.country_masks[country_index[b]]
+                for i in range(self.num_teams):
+                    if mask_a >> i & 1:
+                        self.banned[i] |= mask_b
+                    if mask_b >> i & 1:
+                        self.banned[i] |= mask_a
+        team_ids = {name: i for i, name in enumerate(names)}
+        for a, b in constraints.protected_pairs:
+            if a in team_ids and b in team_ids:
+                self.banned[team_ids[a]] |= 1 << team_ids[b]
+                self.banned[team_ids[b]] |= 1 << team_ids[a]
+
+        # Every opponent a team can never meet, including itself
+        self.excluded: List[int] = []
+        for i in range(self.num_teams):
+            mask = (1 << i) | self.banned[i]
+            if not constraints.same_country_allowed:
+                mask |= self.country_masks[self.team_country[i]]
+            self.excluded.append(mask)
+
+        num_pots = self.num_pots
+        if self.quota > 0 and self.country_cap > 0:
+            self.initial_domain: Tuple[int, ...] = tuple(
+                self.pot_masks[p] & ~self.excluded[i]
+                for i in range(self.num_teams) for p in range(num_pots)
+            )
+        else:
+            self.initial_domain = (0,) * (self.num_teams * num_pots)
+
+    def can_meet(self, i: int, j: int) -> bool:
+        """Check the rules that never change during a draw"""
+
+        return not self.excluded[i] >> j & 1
+
+
+@lru_cache(maxsize=64)
+def _compile(entries: Tuple[Tuple[str, str, int], ...], constraints: DrawConstraints) -> DrawFormat:
+    return DrawFormat(entries, constraints)
+
+
+def compile_format(teams: Sequence, constraints: DrawConstraints) -> DrawFormat:
+    """
+    Compile constraints for a list of teams.
+
+    Compiled formats are cached by the teams' names, countries and pots,
+    so building many DrawStates for the same teams compiles only once.
+    """
+
+    return _compile(tuple((team.name, team.country, team.pot) for team in teams), constraints)
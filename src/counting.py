@@ -0,0 +1,355 @@
+"""
+Exact completion counting
+Counts every completion of a partial draw by memoized search over residual states
+"""
+
+import itertools
+from typing import Dict, Optional, Tuple
+
+from .draw_state import DrawState, iter_bits
+from .montecarlo import MatchupCounts
+
+
+# (needs, masks, allowances); see CompletionCounter
+Residual = Tuple[Tuple[int, ...], Tuple[int, ...], Tuple[int, ...]]
+
+# Completions, and per (host, guest) match the completions containing it
+Tally = Tuple[int, Dict[Tuple[int, int], int]]
+
+NO_COMPLETION: Tally = (0, {})
+
+
+class CountLimitExceeded(Exception):
+    """The residual problem has more states than the counter may memoize"""
+
+
+class CompletionCounter:
+    """
+    Exact number of completions of a partial draw
+
+    Only the teams with open slots matter, so the partial draw is reduced
+    to a residual problem over those teams, renumbered from 0:
+
+    - needs: per team, the home and away matches still to draw, then the
+      opponents still needed from each pot
+    - masks: per team, the bitmask of open teams it may still be drawn
+      against (not played yet, not excluded, pot quota and country cap
+      not reached on either side)
+    - allowances: per team, the opponents it may still take from each
+      country with open teams
+
+    Completions are counted by filling the open slots of the most
+    constrained team in every allowed way, which removes that team from
+    the residual, and counting the completions of what is left. Teams
+    that can no longer reach each other through candidate pairs are
+    counted separately and the counts multiplied. Allowances are clamped
+    to what can still be used, so residuals differing only in unusable
+    slack share one memo entry. Alongside each count the memo keeps, for
+    every match still open, the number of completions containing it, so
+    exact matchup probabilities cost no more residuals than the count.
+
+    Once the memo holds max_states residuals the count is abandoned with
+    CountLimitExceeded: the number of residuals grows exponentially with
+    the matches left, so counting is meant for the late stages of a draw.
+    """
+
+    def __init__(self, max_states: int = 10000):
+        self.max_states = max_states
+
+    def _reduce(self, state: DrawState) -> Tuple[list, Residual]:
+        """The open teams of state and its residual problem"""
+
+        constraints = state.constraints
+        num_pots = state.num_pots
+        open_teams = [i for i in range(state.num_teams) if state.degree[i] < state.matches_per_team]
+        local = {i: t for t, i in enumerate(open_teams)}
+        countries = sorted({state.team_country[i] for i in open_teams})
+        country_local = {c: k for k, c in enumerate(countries)}
+
+        self.num_open = len(open_teams)
+        self.num_pots = num_pots
+        self.num_countries = len(countries)
+        self.team_pot = [state.team_pot[i] for i in open_teams]
+        self.team_country = [country_local[state.team_country[i]] for i in open_teams]
+        self.pot_masks = [0] * num_pots
+        self.country_masks = [0] * len(countries)
+        for t in range(self.num_open):
+            self.pot_masks[self.team_pot[t]] |= 1 << t
+            self.country_masks[self.team_country[t]] |= 1 << t
+
+        needs = []
+        masks = []
+        allowances = []
+        for i in open_teams:
+            needs.append(constraints.home_matches - state.home_count[i])
+            needs.append(constraints.away_matches - state.away_count[i])
+            needs.extend(constraints.matches_per_pot - state.pot_count[i * num_pots + p]
+                         for p in range(num_pots))
+
+            mask = 0
+            for p in range(num_pots):
+                for j in iter_bits(state.domain[i * num_pots + p]):
+                    if j in local:
+                        mask |= 1 << local[j]
+            masks.append(mask)
+
+            allowances.extend(state.country_cap - state.country_count[i * state.num_countries + c]
+                              for c in countries)
+
+        return open_teams, (tuple(needs), tuple(masks), tuple(allowances))
+
+    def count(self, state: DrawState) -> int:
+        """Number of completions of the partial draw in state"""
+
+        _, residual = self._reduce(state)
+        self.memo: Dict[Residual, Tally] = {}
+        return self._count(residual)[0]
+
+    def _canonical(self, residual: Residual) -> Residual:
+        """
+        The residual with every allowance clamped to what can still be
+        used: a country's candidates and the team's open slots
+        """
+
+        needs, masks, allowances = residual
+        width = 2 + self.num_pots
+        num_countries = self.num_countries
+        team_country = self.team_country
+        clamped = [0] * len(allowances)
+        for t, mask in enumerate(masks):
+            if not mask:
+                continue
+            candidates = {}
+            for u in iter_bits(mask):
+                candidates[team_country[u]] = candidates.get(team_country[u], 0) + 1
+            slots = needs[t * width] + needs[t * width + 1]
+            base = t * num_countries
+            for c, count in candidates.items():
+                clamped[base + c] = min(allowances[base + c], count, slots)
+        return needs, masks, tuple(clamped)
+
+    def _count(self, residual: Residual) -> Tally:
+        residual = self._canonical(residual)
+        memo = self.memo
+        cached = memo.get(residual)
+        if cached is not None:
+            return cached
+
+        needs, masks, allowances = residual
+        width = 2 + self.num_pots
+        home_open = 0
+        away_open = 0
+        for t in range(self.num_open):
+            if needs[t * width]:
+                home_open |= 1 << t
+            if needs[t * width + 1]:
+                away_open |= 1 << t
+
+        # Check every open team can still fill its slots, and pick the one
+        # with the fewest candidates
+        best = None
+        best_options = 0
+        unfinished = 0
+        for t in range(self.num_open):
+            base = t * width
+            home_needed = needs[base]
+            away_needed = needs[base + 1]
+            if not home_needed and not away_needed:
+                continue
+            unfinished |= 1 << t
+            mask = masks[t]
+            options = mask.bit_count()
+            if options < home_needed + away_needed:
+                return self._store(residual, NO_COMPLETION)
+            if (mask & away_open).bit_count() < home_needed or (mask & home_open).bit_count() < away_needed:
+                return self._store(residual, NO_COMPLETION)
+            for p in range(self.num_pots):
+                if (mask & self.pot_masks[p]).bit_count() < needs[base + 2 + p]:
+                    return self._store(residual, NO_COMPLETION)
+            if best is None or options < best_options:
+                best = t
+                best_options = options
+
+        if best is None:
+            return self._store(residual, (1, {}))
+
+        # Teams that cannot reach each other are completed independently
+        component = self._component(masks, best)
+        if component != unfinished:
+            first, first_matches = self._count(self._project(residual, component))
+            if not first:
+                return self._store(residual, NO_COMPLETION)
+            second, second_matches = self._count(self._project(residual, unfinished & ~component))
+            tally = {match: count * second for match, count in first_matches.items()}
+            tally.update((match, count * first) for match, count in second_matches.items())
+            return self._store(residual, (first * second, tally))
+
+        total = 0
+        tally: Dict[Tuple[int, int], int] = {}
+        for matches in self._fixtures(residual, best, home_open, away_open):
+            following = residual
+            for host, guest in matches:
+                if not following[1][host] >> guest & 1:
+                    break
+                following = self._play(following, host, guest)
+            else:
+                completions, following_matches = self._count(following)
+                if not completions:
+                    continue
+                total += completions
+                for match, count in following_matches.items():
+                    tally[match] = tally.get(match, 0) + count
+                for match in matches:
+                    tally[match] = tally.get(match, 0) + completions
+        return self._store(residual, (total, tally))
+
+    @staticmethod
+    def _component(masks: Tuple[int, ...], t: int) -> int:
+        """Bitmask of the teams connected to team t through candidate pairs"""
+
+        component = 1 << t
+        frontier = component
+        while frontier:
+            reached = 0
+            for u in iter_bits(frontier):
+                reached |= masks[u]
+            frontier = reached & ~component
+            component |= frontier
+        return component
+
+    def _project(self, residual: Residual, teams: int) -> Residual:
+        """The residual restricted to the teams in a bitmask"""
+
+        needs, masks, allowances = residual
+        width = 2 + self.num_pots
+        num_countries = self.num_countries
+        needs = list(needs)
+        masks = list(masks)
+        allowances = list(allowances)
+        for t in range(self.num_open):
+            if not teams >> t & 1:
+                needs[t * width:(t + 1) * width] = [0] * width
+                masks[t] = 0
+                allowances[t * num_countries:(t + 1) * num_countries] = [0] * num_countries
+        return tuple(needs), tuple(masks), tuple(allowances)
+
+    def _fixtures(self, residual: Residual, t: int, home_open: int, away_open: int):
+        """
+        Every way to fill the open slots of team t: the opponents needed
+        from each pot, and which of them t hosts, as (host, guest) lists
+        """
+
+        needs, masks, _ = residual
+        base = t * (2 + self.num_pots)
+        mask = masks[t]
+        choices = [list(itertools.combinations(list(iter_bits(mask & self.pot_masks[p])), needs[base + 2 + p]))
+                   for p in range(self.num_pots)]
+        home_needed = needs[base]
+
+        for picks in itertools.product(*choices):
+            opponents = [u for pick in picks for u in pick]
+            for hosted in itertools.combinations(opponents, home_needed):
+                if any(not away_open >> u & 1 for u in hosted):
+                    continue
+                visited = [u for u in opponents if u not in hosted]
+                if any(not home_open >> u & 1 for u in visited):
+                    continue
+                yield [(t, u) for u in hosted] + [(u, t) for u in visited]
+
+    def _store(self, residual: Residual, tally: Tally) -> Tally:
+        if len(self.memo) >= self.max_states:
+            raise CountLimitExceeded(f"More than {self.max_states} residual states")
+        self.memo[residual] = tally
+        return tally
+
+    def _play(self, residual: Residual, host: int, guest: int) -> Residual:
+        """The residual problem once host has been drawn at home to guest"""
+
+        needs, masks, allowances = residual
+        needs = list(needs)
+        masks = list(masks)
+        allowances = list(allowances)
+        width = 2 + self.num_pots
+        num_countries = self.num_countries
+
+        needs[host * width] -= 1
+        needs[guest * width + 1] -= 1
+        masks[host] &= ~(1 << guest)
+        masks[guest] &= ~(1 << host)
+
+        for x, y in ((host, guest), (guest, host)):
+            pot = self.team_pot[y]
+            needs[x * width + 2 + pot] -= 1
+            if not needs[x * width + 2 + pot]:
+                self._cut(masks, x, self.pot_masks[pot])
+
+            country = self.team_country[y]
+            allowances[x * num_countries + country] -= 1
+            if not allowances[x * num_countries + country]:
+                self._cut(masks, x, self.country_masks[country])
+
+        return tuple(needs), tuple(masks), tuple(allowances)
+
+    @staticmethod
+    def _cut(masks: list, x: int, group: int):
+        """Remove every pairing of team x with the teams in group"""
+
+        bit = 1 << x
+        for y in iter_bits(masks[x] & group):
+            masks[y] &= ~bit
+        masks[x] &= ~group
+
+    def matchup_counts(self, state: DrawState) -> MatchupCounts:
+        """
+        MatchupCounts over every completion of the partial draw in state:
+        draws is the number of completions and matchups[i * n + j] the
+        number in which team i meets team j, so the probabilities are exact.
+        """
+
+        open_teams, residual = self._reduce(state)
+        self.memo = {}
+        total, tally = self._count(residual)
+
+        counts = MatchupCounts(state)
+        n = state.num_teams
+        matchups = counts.matchups
+        hosted = counts.hosted
+        counts.draws = total
+        if not total:
+            return counts
+
+        for i, j, i_home in state.trail:
+            host, guest = (i, j) if i_home else (j, i)
+            matchups[i * n + j] += total
+            matchups[j * n + i] += total
+            hosted[host * n + guest] += total
+
+        for (host, guest), count in tally.items():
+            i, j = open_teams[host], open_teams[guest]
+            matchups[i * n + j] += count
+            matchups[j * n + i] += count
+            hosted[i * n + j] += count
+
+        num_countries = counts.num_countries
+        team_country = counts.team_country
+        for i in range(n):
+            for j in range(n):
+                if matchups[i * n + j]:
+                    cell = team_country[i] * num_countries + team_country[j]
+                    counts.countries_played[cell] += matchups[i * n + j]
+        return counts
+
+
+def remaining_matches(state: DrawState) -> int:
+    """Matches still to be drawn in state"""
+
+    return state.num_teams * state.matches_per_team // 2 - len(state.trail)
+
+
+def count_completions(state: DrawState, max_states: int = 10000) -> Optional[int]:
+    """Number of completions of a partial draw, or None if it is too large to count"""
+
+    try:
+        return CompletionCounter(max_states).count(state)
+    except CountLimitExceeded:
+        return None
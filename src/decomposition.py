@@ -0,0 +1,237 @@
+"""
+Pot-pair decomposition solver
+
+Every team needs exactly matches_per_pot opponents from every pot, so the
+fixture graph splits into one subproblem per pair of pots: a regular graph
+inside each pot and a regular bipartite graph between each two pots. The
+subproblems are only coupled through the country cap and the home/away
+totals. Each one is solved on its own with a small backtracking search,
+the country cap is carried between them by the DrawState domains, and the
+home/away totals are reconciled by orienting every subproblem along its
+cycles so each team hosts exactly half of its opponents from each pot.
+With an odd matches_per_pot (the Conference League's single opponent per
+pot) a subproblem cannot be balanced on its own, so the whole draw is
+oriented once every subproblem is solved.
+"""
+
+import random
+from collections import defaultdict
+from typing import List, Optional, Tuple
+
+from .budget import CHECK_INTERVAL, Budget
+from .draw_state import DrawState, iter_bits
+
+
+# A search node whose children are still to be tried
+OPEN = "open"
+
+
+def pot_pairs(state: DrawState) -> List[Tuple[int, int]]:
+    """List the pot-pair subproblems, within-pot pairs first"""
+
+    pots = range(state.num_pots)
+    return [(p, p) for p in pots] + [(p, q) for p in pots for q in pots if p < q]
+
+
+def orient_euler(edges: List[Tuple[int, int]],
+                 rng: Optional[random.Random] = None) -> List[Tuple[int, int]]:
+    """
+    Orient an undirected graph in which every team has an even degree.
+
+    The edges are walked as closed trails, each edge pointing the way it
+    is walked, so every team hosts exactly as many matches as it visits.
+    Returns (home, away) pairs.
+    """
+
+    rng = rng if rng is not None else random
+    incident = defaultdict(list)
+    edges = list(edges)
+    rng.shuffle(edges)
+    for k, (a, b) in enumerate(edges):
+        incident[a].append(k)
+        incident[b].append(k)
+
+    used = [False] * len(edges)
+    oriented = []
+
+    def next_edge(team):
+        team_edges = incident[team]
+        while team_edges and used[team_edges[-1]]:
+            team_edges.pop()
+        return team_edges.pop() if team_edges else None
+
+    for start in list(incident):
+        k = next_edge(start)
+        while k is not None:
+            # With even degrees a trail can only get stuck where it started
+            trail = []
+            team = start
+            while k is not None:
+                used[k] = True
+                a, b = edges[k]
+                other = b if a == team else a
+                trail.append((team, other))
+                team = other
+                k = next_edge(team)
+
+            if rng.random() < 0.5:
+                trail = [(away, home) for home, away in trail]
+            oriented.extend(trail)
+            k = next_edge(start)
+
+    return oriented
+
+
+class PotPairSolver:
+    """
+    Solves an empty draw subproblem by subproblem
+
+    Each subproblem is sampled up to retries times; when none of its
+    solutions lets the later subproblems be solved, the previous
+    subproblem is undone and resampled. steps counts the search nodes
+    used across all subproblems and is bounded by max_steps.
+
+    With a budget the search also stops once it is exhausted. When every
+    subproblem is balanced on its own, the draw after each solved
+    subproblem is a valid partial draw and is offered to the budget.
+    """
+
+    def __init__(self, state: DrawState, max_steps: int = 5000, retries: int = 3,
+                 rng: Optional[random.Random] = None, budget: Optional[Budget] = None):
+        self.state = state
+        self.rng = rng if rng is not None else random
+        self.max_steps = max_steps
+        self.retries = retries
+        self.budget = budget
+        self.steps = 0
+
+    def solve(self) -> Optional[bool]:
+        """
+        Returns True with the draw left in state, False if no combination
+        of the sampled subproblem solutions worked, or None if max_steps
+        ran out. On False or None the state is rolled back.
+        """
+
+        state = self.state
+        pairs = pot_pairs(state)
+        budget = self.budget
+        balanced = not state.constraints.matches_per_pot % 2
+
+        def solve_from(k: int) -> Optional[bool]:
+            if k == len(pairs):
+                return True
+
+            p, q = pairs[k]
+            mark = state.checkpoint()
+            for _ in range(self.retries):
+                result = self.solve_pair(p, q)
+                if not result:
+                    return result
+                if budget is not None and balanced:
+                    budget.record(state)
+
+                result = solve_from(k + 1)
+                if result:
+                    return True
+                state.rollback(mark)
+                if result is None:
+                    return None
+
+            return False
+
+        start = state.checkpoint()
+        result = solve_from(0)
+        if not result:
+            state.rollback(start)
+        elif state.constraints.matches_per_pot % 2:
+            self._orient(start)
+        return result
+
+    def _orient(self, start: int):
+        """Re-add the matches drawn since start in an Euler orientation"""
+
+        state = self.state
+        edges = [(i, j) for i, j, _ in state.trail[start:]]
+        state.rollback(start)
+        for home, away in orient_euler(edges, self.rng):
+            state.add_match(home, away, True)
+
+    def solve_pair(self, p: int, q: int) -> Optional[bool]:
+        """
+        Draw every match between pots p and q (p may equal q).
+
+        The opponents are found by a most-constrained-first search on the
+        domains, then re-added in their Euler orientation (left for solve()
+        to orient when matches_per_pot is odd). Returns True
+        with the matches added, False if the subproblem has no solution
+        given the matches already drawn, or None if max_steps ran out.
+        """
+
+        state = self.state
+        constraints = state.constraints
+        num_pots = state.num_pots
+        members = state.pot_members[p] if p == q else state.pot_members[p] + state.pot_members[q]
+
+        budget = self.budget
+
+        # One [team, candidates, next candidate, checkpoint] per node whose
+        # children are being tried, kept off the Python call stack
+        stack = []
+
+        def visit() -> Optional[bool]:
+            """Settle the node at the current state, or open it on the stack (OPEN)"""
+
+            self.steps += 1
+            if self.steps > self.max_steps:
+                return None
+            if budget is not None and not self.steps % CHECK_INTERVAL and budget.exhausted():
+                return None
+
+            best = None
+            best_slack = None
+            for team in members:
+                other = q if state.team_pot[team] == p else p
+                index = team * num_pots + other
+                needed = constraints.matches_per_pot - state.pot_count[index]
+                if needed == 0:
+                    continue
+
+                slack = state.domain[index].bit_count() - needed
+                if slack < 0:
+                    return False
+                if best is None or slack < best_slack:
+                    best = (team, index)
+                    best_slack = slack
+
+            if best is None:
+                return True
+
+            team, index = best
+            candidates = list(iter_bits(state.domain[index]))
+            self.rng.shuffle(candidates)
+            stack.append([team, candidates, 0, state.checkpoint()])
+            return OPEN
+
+        start = state.checkpoint()
+        result = visit()
+        while stack and (result is False or result is OPEN):
+            frame = stack[-1]
+            team, candidates, k, mark = frame
+            state.rollback(mark)
+            if k == len(candidates):
+                stack.pop()
+                result = False
+                continue
+
+            frame[2] = k + 1
+            # Orientation is provisional; only the domains are read here
+            state.add_match(team, candidates[k], True)
+            result = visit()
+
+        if not result:
+            state.rollback(start)
+            return result
+
+        if not constraints.matches_per_pot % 2:
+            self._orient(start)
+        return True
@@ -4,7 +4,6 @@ Complete demonstration script for the draw system
 """
 
 import sys
-import time
 from .champions_league_draw import ChampionsLeagueDraw, create_sample_teams
 from .export_json import export_draw_to_json
 from .statistics import DrawStatistics
@@ -55,17 +54,16 @@ def main():
     print_step(3, 6, "PERFORMING DRAW")
     print("Starting draw (may take a few seconds)...")
     
-    start_time = time.time()
-    max_attempts = 1000
-    success = draw.perform_draw(max_attempts=max_attempts)
-    elapsed = time.time() - start_time
+    max_attempts = 100
+    result = draw.perform_draw(max_attempts=max_attempts, method="backtrack")
+    elapsed = result.metrics.seconds
     
-    if not success:
+    if not result:
         print(f"\nDraw failed after {max_attempts} attempts")
         print("Please run the script again.")
         sys.exit(1)
     
-    print(f"\nDraw successful in {elapsed:.2f} seconds")
+    print(f"\nDraw successful in {elapsed:.2f} seconds ({result.metrics.attempts} attempt(s))")
     
     # Step 4: Show sample matches
     print_step(4, 6, "SAMPLE MATCHES")
@@ -91,22 +89,7 @@ def main():
     # Step 5: Verify constraints
     print_step(5, 6, "VERIFYING CONSTRAINTS")
     
-    errors = []
-    for team in teams:
-        if len(draw.fixtures[team]) != 8:
-            errors.append(f"{team.name}: {len(draw.fixtures[team])} matches")
-        
-        home = sum(1 for _, is_home in draw.fixtures[team] if is_home)
-        if home != 4:
-            errors.append(f"{team.name}: {home} home matches")
-        
-        for pot in [1, 2, 3, 4]:
-            if draw.opponents_by_pot[team][pot] != 2:
-                errors.append(f"{team.name}: {draw.opponents_by_pot[team][pot]} opponents from pot {pot}")
-        
-        for opponent, _ in draw.fixtures[team]:
-            if opponent.country == team.country:
-                errors.append(f"{team.name} plays {opponent.name} (same country)")
+    errors = draw.state.constraint_errors()
     
     if errors:
         print("\nConstraint violations:")
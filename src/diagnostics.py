@@ -0,0 +1,255 @@
+"""
+Dead-end diagnostics
+Records where and why draw attempts get stuck and aggregates it into a report
+"""
+
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional
+
+from .champions_league_draw import ChampionsLeagueDraw, create_sample_teams
+from .draw_state import DrawState
+from .events import DrawObserver, DrawResult
+
+
+# Why an opponent is no longer available, in the order the checks are made
+SAME_COUNTRY = "same_country"
+FORBIDDEN_PAIR = "forbidden_pair"
+REPEAT_OPPONENT = "repeat_opponent"
+POT_QUOTA = "pot_quota"
+COUNTRY_CAP = "country_cap"
+HOME_LIMIT = "home_limit"
+AWAY_LIMIT = "away_limit"
+REASONS = (SAME_COUNTRY, FORBIDDEN_PAIR, REPEAT_OPPONENT, POT_QUOTA, COUNTRY_CAP, HOME_LIMIT, AWAY_LIMIT)
+
+# Ruled out before the draw starts
+STATIC = (SAME_COUNTRY, FORBIDDEN_PAIR)
+
+# Candidates were left, but the lookahead proved none of them completable
+NO_COMPLETION = "no_completion"
+
+
+def exclusion_reason(state: DrawState, i: int, j: int) -> Optional[str]:
+    """
+    The constraint that stops team i from playing team j, or None if they
+    can still meet with at least one orientation.
+
+    home_limit means the pair is blocked because both teams have used up
+    their home matches, away_limit because both have used up their away
+    matches.
+    """
+
+    num_pots = state.num_pots
+    num_countries = state.num_countries
+    country_i = state.team_country[i]
+    country_j = state.team_country[j]
+    quota = state.constraints.matches_per_pot
+
+    if country_i == country_j and not state.constraints.same_country_allowed:
+        return SAME_COUNTRY
+    if state.excluded[i] >> j & 1:
+        return FORBIDDEN_PAIR
+    if state.played[i] >> j & 1:
+        return REPEAT_OPPONENT
+    if (state.pot_count[i * num_pots + state.team_pot[j]] >= quota or
+            state.pot_count[j * num_pots + state.team_pot[i]] >= quota):
+        return POT_QUOTA
+    if (state.country_count[i * num_countries + country_j] >= state.country_cap or
+            state.country_count[j * num_countries + country_i] >= state.country_cap):
+        return COUNTRY_CAP
+
+    i_hosts = state.home_open >> i & state.away_open >> j & 1
+    j_hosts = state.away_open >> i & state.home_open >> j & 1
+    if i_hosts or j_hosts:
+        return None
+    if not state.home_open >> i & 1:
+        return HOME_LIMIT
+    return AWAY_LIMIT
+
+
+class DeadEnd(NamedTuple):
+    """One recorded dead end"""
+    team: str
+    country: str
+    pot: int              # the stuck team's pot
+    stuck_pot: int        # first pot the team still needed opponents from
+    depth: int            # matches in the draw when it got stuck
+    reason: str           # constraint that eliminated the last candidates
+    eliminated: Dict[str, int]
+
+
+def classify_dead_end(state: DrawState, team: int) -> DeadEnd:
+    """
+    Explain why team cannot get another opponent.
+
+    Every opponent the team still needs a match from is attributed to the
+    first constraint that rules it out. Same-country and forbidden pairs
+    are excluded from the start, so the reason for the dead end is the
+    constraint that eliminated most of the remaining candidates; the static
+    reasons are only reported when nothing else was ever available.
+    """
+
+    num_pots = state.num_pots
+    quota = state.constraints.matches_per_pot
+    eliminated = Counter()
+    available = 0
+    stuck_pot = None
+
+    for p in range(num_pots):
+        if state.pot_count[team * num_pots + p] >= quota:
+            continue
+        if stuck_pot is None:
+            stuck_pot = p
+        for j in state.pot_members[p]:
+            if j == team:
+                continue
+            reason = exclusion_reason(state, team, j)
+            if reason is None:
+                available += 1
+            else:
+                eliminated[reason] += 1
+
+    if available:
+        reason = NO_COMPLETION
+    else:
+        dynamic = [(count, -REASONS.index(r), r) for r, count in eliminated.items() if r not in STATIC]
+        static = [(count, -REASONS.index(r), r) for r, count in eliminated.items() if r in STATIC]
+        reason = max(dynamic or static or [(0, 0, SAME_COUNTRY)])[2]
+
+    t = state.teams[team]
+    return DeadEnd(
+        team=t.name,
+        country=t.country,
+        pot=t.pot,
+        stuck_pot=state.pots[stuck_pot] if stuck_pot is not None else t.pot,
+        depth=len(state.trail),
+        reason=reason,
+        eliminated=dict(eliminated),
+    )
+
+
+class DeadEndRecorder(DrawObserver):
+    """
+    Observer that records every dead end of the draws it is subscribed to
+
+    A recorder can watch any number of draws and engines; its counters add
+    up across all of them. Dead ends reported without a team (solver
+    methods giving up) are only counted. Set keep=False to keep the
+    aggregates without storing each DeadEnd.
+    """
+
+    def __init__(self, keep: bool = True):
+        self.keep = keep
+        self.dead_ends: List[DeadEnd] = []
+        self.attempts = 0
+        self.draws = 0
+        self.completed = 0
+        self.unclassified = 0
+        self.total = 0
+        self.depth_total = 0
+        self.by_reason = Counter()
+        self.by_team = Counter()
+        self.by_country = Counter()
+        self.by_stuck_pot = Counter()
+        self.eliminated = Counter()
+        self.capped_countries = Counter()
+
+    def on_attempt_started(self, draw, attempt: int):
+        self.attempts += 1
+
+    def on_draw_finished(self, draw, result: DrawResult):
+        self.draws += 1
+        if result:
+            self.completed += 1
+
+    def on_dead_end(self, draw, team):
+        if team is None:
+            self.unclassified += 1
+            return
+
+        state = draw.state
+        i = state.index[team]
+        dead_end = classify_dead_end(state, i)
+        self.total += 1
+        self.depth_total += dead_end.depth
+        self.by_reason[dead_end.reason] += 1
+        self.by_team[dead_end.team] += 1
+        self.by_country[dead_end.country] += 1
+        self.by_stuck_pot[dead_end.stuck_pot] += 1
+        self.eliminated.update(dead_end.eliminated)
+
+        # Countries whose cap blocked the stuck team
+        if dead_end.reason == COUNTRY_CAP:
+            for c, country in enumerate(state.countries):
+                if state.country_count[i * state.num_countries + c] >= state.country_cap:
+                    self.capped_countries[country] += 1
+
+        if self.keep:
+            self.dead_ends.append(dead_end)
+
+    def summary(self) -> Dict:
+        """Aggregates as a JSON-serializable dict"""
+
+        return {
+            'attempts': self.attempts,
+            'draws': self.draws,
+            'completed': self.completed,
+            'dead_ends': self.total,
+            'unclassified': self.unclassified,
+            'mean_depth': self.depth_total / self.total if self.total else 0.0,
+            'by_reason': dict(self.by_reason.most_common()),
+            'by_team': dict(self.by_team.most_common()),
+            'by_country': dict(self.by_country.most_common()),
+            'by_stuck_pot': {str(pot): count for pot, count in sorted(self.by_stuck_pot.items())},
+            'eliminated': dict(self.eliminated.most_common()),
+            'capped_countries': dict(self.capped_countries.most_common()),
+        }
+
+    def report(self, top: int = 10) -> str:
+        """Readable report of the aggregates"""
+
+        total = self.total
+        lines = [
+            f"Dead ends: {total} over {self.attempts} attempts "
+            f"({self.completed}/{self.draws} draws completed)",
+        ]
+        if self.unclassified:
+            lines.append(f"Unclassified (solver methods): {self.unclassified}")
+        if not total:
+            return "\n".join(lines)
+
+        lines.append(f"Mean depth: {self.depth_total / total:.1f} matches")
+
+        def section(title, counts, limit=None):
+            lines.append("")
+            lines.append(title)
+            for key, count in counts.most_common(limit):
+                lines.append(f"  {key!s:<24}{count:>8}  {count / total:6.1%}")
+
+        section("Blocking constraint:", self.by_reason)
+        section("Stuck country:", self.by_country, top)
+        section("Stuck team:", self.by_team, top)
+        section("Pot that ran out:", self.by_stuck_pot)
+        section("Capped countries (country_cap dead ends):", self.capped_countries, top)
+
+        lines.append("")
+        lines.append("Eliminated candidates by constraint:")
+        eliminated = sum(self.eliminated.values())
+        for reason, count in self.eliminated.most_common():
+            lines.append(f"  {reason:<24}{count:>8}  {count / eliminated:6.1%}")
+
+        return "\n".join(lines)
+
+
+def main(attempts: int = 2000):
+    """Record the dead ends of restart draws with the sample teams"""
+
+    print(f"Running up to {attempts} restart attempts...\n")
+    draw = ChampionsLeagueDraw(create_sample_teams())
+    recorder = DeadEndRecorder(keep=False)
+    draw.add_observer(recorder)
+    draw.perform_draw(max_attempts=attempts)
+    print(recorder.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Binary draw pool files
+Fixed-width draw records behind a header holding the team table and constraints
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import List, Tuple
+
+from .champions_league_draw import DrawConstraints, Team
+from .draw_state import DrawState
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; records can be decoded without it
+    np = None
+
+
+MAGIC = b"UCLDRAWS"
+VERSION = 2
+
+# magic, version, num_teams, matches_per_team, opponent width in bytes,
+# matches_per_pot, home_matches, away_matches, length of the JSON teams and constraints
+HEADER = struct.Struct("<8sHHHBBBBI")
+
+
+def record_layout(num_teams: int, matches_per_team: int) -> Tuple[int, int, int]:
+    """
+    Return (opponent width, home bytes, record size) for a draw.
+
+    A record is the slot table of a DrawState: num_teams * matches_per_team
+    opponent ids (one byte each, two for pools over 256 teams), followed by
+    one home/away bit per slot, packed least significant bit first.
+    Multi-byte values are little-endian.
+    """
+
+    slots = num_teams * matches_per_team
+    width = 1 if num_teams <= 256 else 2
+    home_bytes = (slots + 7) // 8
+    return width, home_bytes, slots * width + home_bytes
+
+
+def encode_draw(state) -> bytes:
+    """Encode a complete draw (DrawState or DrawSampler) as one record"""
+
+    if isinstance(state, DrawState) and not state.is_complete():
+        raise ValueError("Only complete draws can be encoded")
+    width, _, _ = record_layout(state.num_teams, state.matches_per_team)
+    opponents = array('B' if width == 1 else 'H', state.opponents)
+    if width == 2 and sys.byteorder == "big":
+        opponents.byteswap()
+
+    home = state.home
+    packed = bytearray((len(home) + 7) // 8)
+    for slot, is_home in enumerate(home):
+        if is_home:
+            packed[slot >> 3] |= 1 << (slot & 7)
+
+    return opponents.tobytes() + bytes(packed)
+
+
+def decode_record(record, num_teams: int, matches_per_team: int) -> Tuple[List[int], List[bool]]:
+    """Decode a record into (opponent per slot, is_home per slot)"""
+
+    width, home_bytes, _ = record_layout(num_teams, matches_per_team)
+    slots = num_teams * matches_per_team
+    opponents = array('B' if width == 1 else 'H')
+    opponents.frombytes(bytes(record[:slots * width]))
+    if width == 2 and sys.byteorder == "big":
+        opponents.byteswap()
+
+    packed = record[slots * width:slots * width + home_bytes]
+    home = [bool(packed[slot >> 3] >> (slot & 7) & 1) for slot in range(slots)]
+    return list(opponents), home
+
+
+class DrawPoolWriter:
+    """
+    Writes draws to a pool file
+
+    The header stores the team table and constraints once, so each draw
+    costs a single fixed-width record (324 bytes for 36 teams).
+    """
+
+    def __init__(self, path, teams: List[Team], constraints: DrawConstraints):
+        self.teams = list(teams)
+        self.constraints = constraints
+        self.num_teams = len(self.teams)
+        self.matches_per_team = constraints.home_matches + constraints.away_matches
+        self.width, _, self.record_size = record_layout(self.num_teams, self.matches_per_team)
+        self.count = 0
+
+        table = json.dumps({
+            'teams': [[t.name, t.country, t.pot] for t in self.teams],
+            'constraints': constraints.to_dict(),
+        }).encode("utf-8")
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(
+            MAGIC, VERSION, self.num_teams, self.matches_per_team, self.width,
+            constraints.matches_per_pot, constraints.home_matches, constraints.away_matches,
+            len(table),
+        ))
+        self.file.write(table)
+
+    def write(self, state):
+        """Append one complete draw"""
+
+        if state.num_teams != self.num_teams or state.matches_per_team != self.matches_per_team:
+            raise ValueError("Draw does not match the pool's teams and constraints")
+        self.file.write(encode_draw(state))
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DrawPool:
+    """
+    Read-only, memory-mapped view of a pool file
+
+    Records are read straight from the mapping; nothing is parsed until a
+    draw is asked for. as_numpy() exposes every record at once as a NumPy
+    structured array over the same memory. Drop those arrays before
+    close(), since a mapping with live views cannot be closed.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = None
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._read_header()
+        except Exception:
+            self.close()
+            raise
+
+    def _read_header(self):
+        if len(self.map) < HEADER.size:
+            raise ValueError("Not a draw pool file")
+        # The pair rules are read from the constraints in the table
+        (magic, version, self.num_teams, self.matches_per_team, self.width,
+         _, _, _, table_length) = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError("Not a draw pool file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported draw pool version: {version}")
+
+        table = json.loads(self.map[HEADER.size:HEADER.size + table_length].decode("utf-8"))
+        self.teams = [Team(name, country, pot) for name, country, pot in table['teams']]
+        self.constraints = DrawConstraints.from_dict(table['constraints'])
+
+        _, self.home_bytes, self.record_size = record_layout(self.num_teams, self.matches_per_team)
+        self.offset = HEADER.size + table_length
+        self.count = (len(self.map) - self.offset) // self.record_size
+
+    def __len__(self) -> int:
+        return self.count
+
+    def record(self, k: int) -> memoryview:
+        """Raw bytes of record k, without copying"""
+
+        if not 0 <= k < self.count:
+            raise IndexError("draw index out of range")
+        start = self.offset + k * self.record_size
+        return memoryview(self.map)[start:start + self.record_size]
+
+    def decode(self, k: int) -> Tuple[List[int], List[bool]]:
+        """(opponent per slot, is_home per slot) of record k"""
+
+        return decode_record(self.record(k), self.num_teams, self.matches_per_team)
+
+    def to_state(self, k: int) -> DrawState:
+        """Rebuild record k as a DrawState"""
+
+        opponents, home = self.decode(k)
+        state = DrawState(self.teams, self.constraints)
+        for slot, opponent in enumerate(opponents):
+            if home[slot]:
+                state.add_match(slot // self.matches_per_team, opponent, True)
+        return state
+
+    def as_numpy(self) -> "np.ndarray":
+        """
+        Structured array of every record, backed by the mapping:
+        'opponents' is (count, num_teams, matches_per_team) and 'home' holds
+        the packed bits (see unpack_home)
+        """
+
+        if np is None:
+            raise RuntimeError("NumPy is not installed")
+
+        opponent_type = "u1" if self.width == 1 else "<u2"
+        dtype = np.dtype([
+            ('opponents', opponent_type, (self.num_teams, self.matches_per_team)),
+            ('home', 'u1', (self.home_bytes,)),
+        ])
+        return np.frombuffer(self.map, dtype=dtype, count=self.count, offset=self.offset)
+
+    def unpack_home(self, records: "np.ndarray") -> "np.ndarray":
+        """Home flags of records from as_numpy(), as (count, num_teams, matches_per_team) bools"""
+
+        slots = self.num_teams * self.matches_per_team
+        bits = np.unpackbits(records['home'], axis=-1, bitorder='little')[..., :slots]
+        return bits.reshape(records.shape + (self.num_teams, self.matches_per_team)).astype(bool)
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
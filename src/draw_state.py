@@ -0,0 +1,403 @@
+"""
+Compact draw state shared by the draw engines
+Teams are referred to by integer ids and all counters live in flat arrays
+"""
+
+from array import array
+from collections.abc import Mapping
+from typing import Callable, Dict, List, Tuple
+
+from .constraints import compile_format
+
+
+class DrawState:
+    """
+    Array-backed draw state
+
+    Team ids are positions in the team list. Fixtures are stored in a
+    fixed-size slot table (matches_per_team slots per team), the pot,
+    country and home/away counters in flat arrays, and the opponents
+    already drawn as one integer bitmask per team, so every constraint
+    check is O(1) and allocates nothing.
+
+    Every add_match is logged on an undo trail; checkpoint() marks a point
+    on the trail and rollback() undoes the matches added since, in reverse
+    order, so abandoning an attempt costs only the matches it added.
+
+    For every team and pot the state also keeps a live domain: the bitmask
+    of opponents in that pot the team can still be paired with. add_match
+    narrows the domains when a match is played or a team fills a pot quota
+    or a country cap, and home_open/away_open track which teams still have
+    home/away slots, so candidates() is a direct read instead of a scan.
+
+    The lookup tables and the empty-draw domains come from the compiled
+    format (constraints.compile_format), shared by every state built for
+    the same teams and constraints.
+    """
+
+    def __init__(self, teams, constraints):
+        self.teams = list(teams)
+        self.constraints = constraints
+        self.index: Dict[object, int] = {team: i for i, team in enumerate(self.teams)}
+
+        compiled = compile_format(self.teams, constraints)
+        self.format = compiled
+        self.pots: List[int] = compiled.pots
+        self.countries: List[str] = compiled.countries
+        self.num_teams = compiled.num_teams
+        self.num_pots = compiled.num_pots
+        self.num_countries = compiled.num_countries
+        self.matches_per_team = compiled.matches_per_team
+        self.country_cap = compiled.country_cap
+
+        self.team_pot = compiled.team_pot
+        self.team_country = compiled.team_country
+        self.pot_members = compiled.pot_members
+        self.country_members = compiled.country_members
+        self.country_masks = compiled.country_masks
+        self.excluded = compiled.excluded
+
+        self.reset()
+
+    def reset(self):
+        """Clear all matches"""
+
+        n = self.num_teams
+        self.opponents = array('h', [-1]) * (n * self.matches_per_team)
+        self.home = array('B', [0]) * (n * self.matches_per_team)
+        self.degree = array('B', [0]) * n
+        self.home_count = array('B', [0]) * n
+        self.away_count = array('B', [0]) * n
+        self.pot_count = array('B', [0]) * (n * self.num_pots)
+        self.country_count = array('B', [0]) * (n * self.num_countries)
+        self.played: List[int] = [0] * n
+        self.trail: List[Tuple[int, int, bool]] = []
+
+        self.home_open = (1 << n) - 1
+        self.away_open = (1 << n) - 1
+
+        # The empty-draw domains are compiled with the format
+        self.domain: List[int] = list(self.format.initial_domain)
+        self.domain_trail: List[Tuple[int, int]] = []
+        self._domain_marks: List[int] = []
+
+    def copy(self) -> "DrawState":
+        """Return an independent copy of this state"""
+
+        other = DrawState.__new__(DrawState)
+        other.__dict__.update(self.__dict__)
+        other.opponents = array('h', self.opponents)
+        other.home = array('B', self.home)
+        other.degree = array('B', self.degree)
+        other.home_count = array('B', self.home_count)
+        other.away_count = array('B', self.away_count)
+        other.pot_count = array('B', self.pot_count)
+        other.country_count = array('B', self.country_count)
+        other.played = list(self.played)
+        other.trail = list(self.trail)
+        other.domain = list(self.domain)
+        other.domain_trail = list(self.domain_trail)
+        other._domain_marks = list(self._domain_marks)
+        return other
+
+    def can_play(self, i: int, j: int, i_home: bool) -> bool:
+        """Check if team i can play team j, with team i at home if i_home"""
+
+        if not self.domain[i * self.num_pots + self.team_pot[j]] >> j & 1:
+            return False
+
+        # Home/away balance
+        if i_home:
+            return bool(self.home_open >> i & self.away_open >> j & 1)
+        return bool(self.away_open >> i & self.home_open >> j & 1)
+
+    def candidates(self, i: int, pot: int) -> Tuple[int, int]:
+        """
+        Bitmasks of the opponents in pot (a pot index) that team i can
+        still host and can still visit
+        """
+
+        domain = self.domain[i * self.num_pots + pot]
+        home = domain & self.away_open if self.home_open >> i & 1 else 0
+        away = domain & self.home_open if self.away_open >> i & 1 else 0
+        return home, away
+
+    def _pairable(self, i: int, j: int) -> bool:
+        """Check every constraint on a pair except home/away"""
+
+        # Itself, same country and forbidden or protected pairs
+        if self.excluded[i] >> j & 1:
+            return False
+
+        # Already played
+        if self.played[i] >> j & 1:
+            return False
+
+        # Maximum opponents from the same country
+        num_countries = self.num_countries
+        if self.country_count[i * num_countries + self.team_country[j]] >= self.country_cap:
+            return False
+        if self.country_count[j * num_countries + self.team_country[i]] >= self.country_cap:
+            return False
+
+        # Pot distribution
+        num_pots = self.num_pots
+        quota = self.constraints.matches_per_pot
+        if self.pot_count[i * num_pots + self.team_pot[j]] >= quota:
+            return False
+        if self.pot_count[j * num_pots + self.team_pot[i]] >= quota:
+            return False
+
+        return True
+
+    def _rebuild_domains(self):
+        """Recompute every domain from the counters"""
+
+        for i in range(self.num_teams):
+            for p, members in enumerate(self.pot_members):
+                mask = 0
+                for j in members:
+                    if self._pairable(i, j):
+                        mask |= 1 << j
+                self.domain[i * self.num_pots + p] = mask
+
+        # Domain changes before this point can no longer be replayed
+        self.domain_trail: List[Tuple[int, int]] = []
+        self._domain_marks: List[int] = [-1] * len(self.trail)
+
+    def _set_domain(self, index: int, mask: int):
+        self.domain_trail.append((index, self.domain[index]))
+        self.domain[index] = mask
+
+    def _restrict_domains(self, i: int, j: int):
+        """Narrow the domains after team i has been drawn against team j"""
+
+        domain = self.domain
+        num_pots = self.num_pots
+        pot_i = self.team_pot[i]
+        pot_j = self.team_pot[j]
+        bit_i = 1 << i
+
+        # j is no longer a candidate for i
+        index = i * num_pots + pot_j
+        self._set_domain(index, domain[index] & ~(1 << j))
+
+        # i has all its opponents from j's pot
+        if self.pot_count[index] >= self.constraints.matches_per_pot:
+            if domain[index]:
+                self._set_domain(index, 0)
+            for k in self.pot_members[pot_j]:
+                index = k * num_pots + pot_i
+                if domain[index] & bit_i:
+                    self._set_domain(index, domain[index] & ~bit_i)
+
+        # i has the maximum number of opponents from j's country
+        country_j = self.team_country[j]
+        if self.country_count[i * self.num_countries + country_j] >= self.country_cap:
+            country_mask = self.country_masks[country_j]
+            for index in range(i * num_pots, (i + 1) * num_pots):
+                if domain[index] & country_mask:
+                    self._set_domain(index, domain[index] & ~country_mask)
+            for k in self.country_members[country_j]:
+                index = k * num_pots + pot_i
+                if domain[index] & bit_i:
+                    self._set_domain(index, domain[index] & ~bit_i)
+
+    def add_match(self, i: int, j: int, i_home: bool):
+        """Add a match between teams i and j"""
+
+        mark = len(self.domain_trail)
+        self._add_side(i, j, i_home)
+        self._add_side(j, i, not i_home)
+        self._restrict_domains(i, j)
+        self._restrict_domains(j, i)
+        self.trail.append((i, j, i_home))
+        self._domain_marks.append(mark)
+
+    def remove_match(self, i: int, j: int, i_home: bool):
+        """Remove a match previously added with add_match"""
+
+        entry = (i, j, i_home)
+        if entry not in self.trail:
+            entry = (j, i, not i_home)
+        del self._domain_marks[self.trail.index(entry)]
+        self.trail.remove(entry)
+
+        self._remove_side(i, j, i_home)
+        self._remove_side(j, i, not i_home)
+        self._rebuild_domains()
+
+    def checkpoint(self) -> int:
+        """Mark the current point on the undo trail"""
+
+        return len(self.trail)
+
+    def rollback(self, mark: int):
+        """Undo every match added since checkpoint() returned mark"""
+
+        trail = self.trail
+        if mark >= len(trail):
+            return
+
+        domain_mark = self._domain_marks[mark]
+        while len(trail) > mark:
+            i, j, i_home = trail.pop()
+            self._remove_side(i, j, i_home)
+            self._remove_side(j, i, not i_home)
+        del self._domain_marks[mark:]
+
+        if domain_mark < 0:
+            self._rebuild_domains()
+            return
+
+        domain = self.domain
+        domain_trail = self.domain_trail
+        while len(domain_trail) > domain_mark:
+            index, mask = domain_trail.pop()
+            domain[index] = mask
+
+    def _add_side(self, i: int, j: int, i_home: bool):
+        slot = i * self.matches_per_team + self.degree[i]
+        self.opponents[slot] = j
+        self.home[slot] = i_home
+        self.degree[i] += 1
+        self.played[i] |= 1 << j
+        self.pot_count[i * self.num_pots + self.team_pot[j]] += 1
+        self.country_count[i * self.num_countries + self.team_country[j]] += 1
+        if i_home:
+            self.home_count[i] += 1
+            if self.home_count[i] >= self.constraints.home_matches:
+                self.home_open &= ~(1 << i)
+        else:
+            self.away_count[i] += 1
+            if self.away_count[i] >= self.constraints.away_matches:
+                self.away_open &= ~(1 << i)
+
+    def _remove_side(self, i: int, j: int, i_home: bool):
+        start = i * self.matches_per_team
+        last = start + self.degree[i] - 1
+        slot = self.opponents.index(j, start, last + 1)
+
+        # Keep the slot table packed by moving the last fixture into the gap
+        self.opponents[slot] = self.opponents[last]
+        self.home[slot] = self.home[last]
+        self.opponents[last] = -1
+        self.home[last] = 0
+
+        self.degree[i] -= 1
+        self.played[i] &= ~(1 << j)
+        self.pot_count[i * self.num_pots + self.team_pot[j]] -= 1
+        self.country_count[i * self.num_countries + self.team_country[j]] -= 1
+        if i_home:
+            self.home_count[i] -= 1
+            if self.home_count[i] < self.constraints.home_matches:
+                self.home_open |= 1 << i
+        else:
+            self.away_count[i] -= 1
+            if self.away_count[i] < self.constraints.away_matches:
+                self.away_open |= 1 << i
+
+    def team_fixtures(self, i: int) -> List[Tuple[int, bool]]:
+        """List (opponent id, is_home) for team i in draw order"""
+
+        start = i * self.matches_per_team
+        end = start + self.degree[i]
+        return [(self.opponents[slot], bool(self.home[slot])) for slot in range(start, end)]
+
+    def is_complete(self) -> bool:
+        """Check whether every team has all its matches"""
+
+        return all(degree == self.matches_per_team for degree in self.degree)
+
+    def constraint_errors(self) -> List[str]:
+        """List every violated draw constraint"""
+
+        errors = []
+        matches = self.matches_per_team
+        home_matches = self.constraints.home_matches
+        away_matches = self.constraints.away_matches
+        quota = self.constraints.matches_per_pot
+
+        for i, team in enumerate(self.teams):
+            if self.degree[i] != matches:
+                errors.append(f"{team.name}: {self.degree[i]} matches instead of {matches}")
+
+            if self.home_count[i] != home_matches:
+                errors.append(f"{team.name}: {self.home_count[i]} home matches instead of {home_matches}")
+            if self.away_count[i] != away_matches:
+                errors.append(f"{team.name}: {self.away_count[i]} away matches instead of {away_matches}")
+
+            for p, pot in enumerate(self.pots):
+                count = self.pot_count[i * self.num_pots + p]
+                if count != quota:
+                    errors.append(f"{team.name}: {count} opponents from pot {pot} instead of {quota}")
+
+            for j, _ in self.team_fixtures(i):
+                if not self.excluded[i] >> j & 1:
+                    continue
+                if self.team_country[i] == self.team_country[j]:
+                    errors.append(f"{team.name} plays {self.teams[j].name} (same country: {team.country})")
+                else:
+                    errors.append(f"{team.name} plays {self.teams[j].name} (forbidden pair)")
+
+            for c, country in enumerate(self.countries):
+                count = self.country_count[i * self.num_countries + c]
+                if count > self.country_cap:
+                    errors.append(f"{team.name}: {count} opponents from {country} "
+                                  f"(max {self.country_cap})")
+
+        return errors
+
+    # Team-keyed views, matching the dict attributes the engines used to expose
+
+    def fixtures_view(self) -> Mapping:
+        """Team -> [(opponent, is_home), ...]"""
+
+        teams = self.teams
+        return TeamMapping(self, lambda i: [(teams[j], is_home) for j, is_home in self.team_fixtures(i)])
+
+    def opponents_by_pot_view(self) -> Mapping:
+        """Team -> {pot: opponents drawn from that pot}"""
+
+        return TeamMapping(self, lambda i: {
+            pot: self.pot_count[i * self.num_pots + p] for p, pot in enumerate(self.pots)
+        })
+
+    def home_away_view(self) -> Mapping:
+        """Team -> {'home': count, 'away': count}"""
+
+        return TeamMapping(self, lambda i: {'home': self.home_count[i], 'away': self.away_count[i]})
+
+    def opponents_by_country_view(self) -> Mapping:
+        """Team -> {country: opponents drawn from that country}"""
+
+        return TeamMapping(self, lambda i: {
+            country: self.country_count[i * self.num_countries + c]
+            for c, country in enumerate(self.countries)
+        })
+
+
+def iter_bits(mask: int):
+    """Yield the team ids set in a bitmask, lowest first"""
+
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class TeamMapping(Mapping):
+    """Read-only mapping from Team to a value computed from a DrawState"""
+
+    def __init__(self, state: DrawState, getter: Callable[[int], object]):
+        self._state = state
+        self._getter = getter
+
+    def __getitem__(self, team):
+        return self._getter(self._state.index[team])
+
+    def __iter__(self):
+        return iter(self._state.teams)
+
+    def __len__(self):
+        return self._state.num_teams
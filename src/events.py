@@ -0,0 +1,182 @@
+"""
+Draw events and metrics
+Observer hooks for the draw engines and the result returned by every draw
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+@dataclass
+class DrawMetrics:
+    """
+    Counters collected during one perform_draw() call
+
+    pot_scans counts the pots read with DrawState.candidates() when the
+    restart and sequential draws pick an opponent: one per pot for every
+    pick, each read returning the whole pot as bitmasks. The solver
+    methods (backtrack, pot_pairs, two_phase) search inside search.py and
+    decomposition.py and leave it at 0.
+    pot_seconds is only filled by the pot-by-pot sequential draw.
+    """
+    attempts: int = 0
+    dead_ends: int = 0
+    pot_scans: int = 0
+    pot_seconds: Dict[int, float] = field(default_factory=dict)
+    seconds: float = 0.0
+
+
+@dataclass
+class DrawResult:
+    """
+    Outcome of a draw; true when the draw was completed
+
+    problems lists the precheck.Problem rules the teams and constraints
+    break; when it is not empty the draw was refused without an attempt.
+
+    A draw that ran out of attempts or budget (stopped is "timeout" or
+    "cancelled" from budget.py) leaves its largest partial draw in the
+    engine: partial lists its matches as (team, opponent, team_is_home)
+    and unplaced counts the matches still missing.
+    """
+    success: bool
+    method: str
+    metrics: DrawMetrics
+    problems: Tuple = ()
+    stopped: Optional[str] = None
+    partial: Tuple = ()
+    unplaced: int = 0
+
+    def __bool__(self):
+        return self.success
+
+
+class CeremonyEvent(NamedTuple):
+    """
+    One step of a live ceremony, yielded by SequentialChampionsLeagueDraw.ceremony()
+
+    kind is one of CEREMONY_EVENTS. team_selected carries the team about
+    to be drawn, with no fixtures yet; team_drawn carries the team and its
+    fixtures as (opponent, is_home) pairs, complete at that point;
+    attempt_started with an attempt above 1 means the draw was restarted
+    and everything shown so far is void. draw_finished carries the result.
+    """
+    kind: str
+    attempt: int
+    pot: Optional[int] = None
+    team: object = None
+    fixtures: Tuple = ()
+    result: Optional[DrawResult] = None
+
+
+CEREMONY_EVENTS = ("attempt_started", "pot_started", "team_selected", "team_drawn", "pot_completed",
+                   "draw_finished")
+
+
+class DrawObserver:
+    """
+    Base class for draw event subscribers
+
+    Every hook receives the engine first and does nothing by default, so
+    subscribers only override the events they need. Teams are passed as
+    Team objects.
+    """
+
+    def on_attempt_started(self, draw, attempt: int):
+        """A new attempt starts from an empty draw (attempt counts from 1)"""
+
+    def on_pot_started(self, draw, pot: int):
+        """The sequential draw starts drawing the teams of a pot"""
+
+    def on_match_added(self, draw, team, opponent, is_home: bool):
+        """A match was added; is_home tells whether team hosts it"""
+
+    def on_dead_end(self, draw, team):
+        """
+        A dead end was hit while drawing team, and its matches from this
+        attempt are undone; team is None when a solver method gives up
+        """
+
+    def on_team_completed(self, draw, team):
+        """A team has all its matches"""
+
+    def on_pot_completed(self, draw, pot: int, seconds: float):
+        """Every team of a pot has been drawn, in seconds of wall time"""
+
+    def on_draw_finished(self, draw, result: DrawResult):
+        """perform_draw() is about to return result"""
+
+
+class Observable:
+    """
+    Observer registry shared by the draw engines
+
+    Engines check self.observers before building an event, so a draw
+    without observers makes no hook calls at all.
+    """
+
+    def __init__(self):
+        self.observers: List[DrawObserver] = []
+
+    def add_observer(self, observer: DrawObserver):
+        """Subscribe an observer to this engine's events"""
+
+        self.observers.append(observer)
+
+    def remove_observer(self, observer: DrawObserver):
+        """Unsubscribe an observer added with add_observer"""
+
+        self.observers.remove(observer)
+
+    def _emit(self, event: str, *args):
+        for observer in self.observers:
+            getattr(observer, event)(self, *args)
+
+
+class ConsoleObserver(DrawObserver):
+    """
+    Prints draw progress
+
+    Reproduces the output the engines used to print themselves: a summary
+    line for ChampionsLeagueDraw, and the pot banners and team results of
+    the pot-by-pot ceremony.
+    """
+
+    def on_attempt_started(self, draw, attempt: int):
+        if draw.pot_by_pot:
+            if attempt > 1:
+                print("Could not complete the draw, restarting entire draw...")
+            print("\n" + "="*80)
+            print(f"STARTING SEQUENTIAL DRAW - ATTEMPT {attempt}")
+            print("="*80)
+
+    def on_pot_started(self, draw, pot: int):
+        print(f"\n{'='*80}")
+        print(f"POT {pot} DRAW")
+        print(f"{'='*80}\n")
+
+    def on_team_completed(self, draw, team):
+        if draw.pot_by_pot:
+            draw.display_team_result(team)
+
+    def on_draw_finished(self, draw, result: DrawResult):
+        attempts = result.metrics.attempts
+        if result.problems:
+            print("No draw is possible:")
+            for problem in result.problems:
+                print(f"  - {problem.message}")
+        elif result.stopped:
+            print(f"Draw stopped ({result.stopped}) after {attempts} attempt(s) "
+                  f"with {result.unplaced} match(es) unplaced")
+        elif not draw.pot_by_pot:
+            if result:
+                print(f"Draw successful after {attempts} attempt(s)")
+            else:
+                print(f"Unable to complete draw after {attempts} attempts")
+        elif result:
+            print(f"\n{'='*80}")
+            print("DRAW COMPLETED SUCCESSFULLY!")
+            print(f"{'='*80}\n")
+        else:
+            print(f"\nFailed to complete draw after {attempts} global attempts")
+
@@ -2,27 +2,48 @@
 Script to export draw results to JSON format
 """
 
+import gzip
 import json
+from typing import Iterable, Optional
+
 from .champions_league_draw import ChampionsLeagueDraw, create_sample_teams
+from .events import ConsoleObserver
 
 
-def export_draw_to_json(draw: ChampionsLeagueDraw, filename: str = "draw_results.json"):
-    """Export draw results to JSON"""
+def draw_to_dict(draw) -> dict:
+    """
+    Build the export document for one draw.
+    draw may be a ChampionsLeagueDraw, a DrawState or a DrawSampler.
+    """
+    
+    state = getattr(draw, "state", draw)
+    teams = state.teams
+    constraints = state.constraints
+    matches_per_team = state.matches_per_team
     
     results = {
-        "tournament": "UEFA Champions League 2024-2025",
+        "tournament": constraints.competition,
         "format": {
-            "total_teams": len(draw.teams),
-            "matches_per_team": 8,
-            "home_matches": 4,
-            "away_matches": 4,
-            "pots": 4
+            "total_teams": len(teams),
+            "matches_per_team": matches_per_team,
+            "home_matches": constraints.home_matches,
+            "away_matches": constraints.away_matches,
+            "pots": len({team.pot for team in teams})
         },
         "teams": [],
         "matches": []
     }
     
-    for team in sorted(draw.teams, key=lambda t: (t.pot, t.name)):
+    def fixtures(i):
+        start = i * matches_per_team
+        for slot in range(start, start + matches_per_team):
+            opponent = state.opponents[slot]
+            if opponent >= 0:
+                yield teams[opponent], bool(state.home[slot])
+    
+    order = sorted(range(len(teams)), key=lambda i: (teams[i].pot, teams[i].name))
+    for i in order:
+        team = teams[i]
         team_data = {
             "name": team.name,
             "country": team.country,
@@ -33,7 +54,7 @@ def export_draw_to_json(draw: ChampionsLeagueDraw, filename: str = "draw_results
             }
         }
         
-        for opponent, is_home in draw.fixtures[team]:
+        for opponent, is_home in fixtures(i):
             match_info = {
                 "opponent": opponent.name,
                 "opponent_country": opponent.country,
@@ -47,19 +68,24 @@ def export_draw_to_json(draw: ChampionsLeagueDraw, filename: str = "draw_results
         
         results["teams"].append(team_data)
     
-    matches_set = set()
-    for team in draw.teams:
-        for opponent, is_home in draw.fixtures[team]:
+    # Every match appears once, from its home team's side
+    for i, team in enumerate(teams):
+        for opponent, is_home in fixtures(i):
             if is_home:
-                match = (team.name, opponent.name)
-                if match not in matches_set and (opponent.name, team.name) not in matches_set:
-                    matches_set.add(match)
-                    results["matches"].append({
-                        "home_team": team.name,
-                        "away_team": opponent.name,
-                        "home_country": team.country,
-                        "away_country": opponent.country
-                    })
+                results["matches"].append({
+                    "home_team": team.name,
+                    "away_team": opponent.name,
+                    "home_country": team.country,
+                    "away_country": opponent.country
+                })
+    
+    return results
+
+
+def export_draw_to_json(draw: ChampionsLeagueDraw, filename: str = "draw_results.json"):
+    """Export draw results to JSON"""
+    
+    results = draw_to_dict(draw)
     
     with open(filename, 'w', encoding='utf-8') as f:
         json.dump(results, f, ensure_ascii=False, indent=2)
@@ -71,14 +97,42 @@ def export_draw_to_json(draw: ChampionsLeagueDraw, filename: str = "draw_results
     return results
 
 
+def export_draws_ndjson(draws: Iterable, filename: str = "draws.ndjson",
+                        compress: Optional[bool] = None) -> int:
+    """
+    Stream draws to a line-delimited JSON file, one compact document per line.
+    
+    draws can be any iterable of draws accepted by draw_to_dict, including
+    generators that reuse one object (DrawSampler.sample(),
+    MonteCarloEngine.draws()): each draw is serialised and written before the
+    next is requested, so memory stays flat. The output is gzip-compressed if
+    compress is True, or if compress is None and filename ends in ".gz".
+    Returns the number of draws written.
+    """
+    
+    if compress is None:
+        compress = filename.endswith(".gz")
+    opener = gzip.open if compress else open
+    
+    count = 0
+    with opener(filename, 'wt', encoding='utf-8') as f:
+        for draw in draws:
+            f.write(json.dumps(draw_to_dict(draw), ensure_ascii=False, separators=(',', ':')))
+            f.write("\n")
+            count += 1
+    
+    return count
+
+
 def main():
     """Main function"""
     
     print("Generating draw...")
     teams = create_sample_teams()
     draw = ChampionsLeagueDraw(teams)
+    draw.add_observer(ConsoleObserver())
     
-    if draw.perform_draw(max_attempts=25000):
+    if draw.perform_draw(method="backtrack"):
         export_draw_to_json(draw, "ucl_draw_2024_2025.json")
         
         print("\nVerifying constraints...")
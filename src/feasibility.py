@@ -0,0 +1,90 @@
+"""
+Feasibility checks for partial draws
+"""
+
+import random
+from typing import Optional, Set, Tuple
+
+from .budget import Budget
+from .draw_state import DrawState
+from .search import complete_draw, state_key
+
+
+class FeasibilityOracle:
+    """
+    Decides whether a partial draw can still be completed
+
+    Answers are memoized by state fingerprint: partial draws proven
+    completable or proven stuck are never searched twice, and every
+    infeasible sub-state met during a search is remembered as well. The
+    last completion found is kept as a witness, so any partial draw it
+    extends is known to be feasible without searching.
+    """
+
+    def __init__(self, max_steps: int = 2000, rng: Optional[random.Random] = None):
+        self.max_steps = max_steps
+        self.rng = rng
+        self.feasible: Set[Tuple] = set()
+        self.infeasible: Set[Tuple] = set()
+        self.witness: Set[Tuple[int, int, bool]] = set()
+
+        self.queries = 0
+        self.searches = 0
+
+    def clear(self):
+        """Forget every memoized answer"""
+
+        self.feasible.clear()
+        self.infeasible.clear()
+        self.witness = set()
+
+    def is_feasible(self, state: DrawState, max_steps: Optional[int] = None,
+                    budget: Optional[Budget] = None) -> Optional[bool]:
+        """
+        True if the partial draw in state can be completed, False if it
+        cannot, None if the search budget ran out before either was proven.
+        The state is left unchanged.
+
+        A budget also stops the search once exhausted. The partial draws
+        searched are not offered to it, as they were never drawn.
+        """
+
+        self.queries += 1
+
+        if self._extends_witness(state):
+            return True
+
+        key = state_key(state)
+        if key in self.feasible:
+            return True
+        if key in self.infeasible:
+            return False
+
+        self.searches += 1
+        mark = state.checkpoint()
+        result = complete_draw(state, max_steps or self.max_steps, self.infeasible, rng=self.rng,
+                               budget=budget.fork() if budget is not None else None)
+
+        if result:
+            self.witness = {_normalize(match) for match in state.trail}
+            state.rollback(mark)
+            self.feasible.add(key)
+        elif result is False:
+            self.infeasible.add(key)
+
+        return result
+
+    def _extends_witness(self, state: DrawState) -> bool:
+        witness = self.witness
+        if not witness:
+            return False
+        return all(_normalize(match) in witness for match in state.trail)
+
+
+def _normalize(match: Tuple[int, int, bool]) -> Tuple[int, int, bool]:
+    """Write a match as (lower id, higher id, lower id at home)"""
+
+    i, j, i_home = match
+    if i < j:
+        return i, j, i_home
+    return j, i, not i_home
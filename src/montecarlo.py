@@ -0,0 +1,305 @@
+"""
+Monte Carlo matchup probabilities
+Runs many draws and streams each one into fixed-size counters
+"""
+
+import math
+import random
+from array import array
+from typing import Dict, Iterator, Optional, Tuple
+
+from .draw_state import DrawState
+from .decomposition import PotPairSolver
+from .precheck import check_feasible
+from .sampler import DrawSampler
+from .search import complete_draw, solve_two_phase
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the counters are stdlib arrays
+    np = None
+
+
+class MatchupCounts:
+    """
+    Counters accumulated over many draws
+
+    All counters are preallocated flat arrays indexed like DrawState:
+    - matchups[i * n + j]: draws in which team i played team j
+    - hosted[i * n + j]: draws in which team i hosted team j
+    - countries[a * c + b]: matches between countries a and b, summed over draws
+
+    Nothing is kept per draw, so memory does not grow with the number of draws.
+    """
+
+    def __init__(self, state: DrawState):
+        self.teams = state.teams
+        self.index = state.index
+        self.countries = state.countries
+        self.country_index = {country: k for k, country in enumerate(state.countries)}
+        self.team_country = state.team_country
+        self.num_teams = state.num_teams
+        self.num_countries = state.num_countries
+
+        self.draws = 0
+        self.matchups = array('L', [0]) * self.num_teams ** 2
+        self.hosted = array('L', [0]) * self.num_teams ** 2
+        self.countries_played = array('L', [0]) * self.num_countries ** 2
+        self.matches_per_team = state.matches_per_team
+        self._attach_views()
+
+    def _attach_views(self):
+        self._views = None
+        if np is not None:
+            self._views = self.as_numpy()
+            slots = self.num_teams * self.matches_per_team
+            self._slot_team = np.arange(slots) // self.matches_per_team
+            self._slot_country = np.frombuffer(self.team_country, dtype=f"u{self.team_country.itemsize}")
+
+    def __getstate__(self):
+        # NumPy views would be pickled as copies detached from the counters
+        state = self.__dict__.copy()
+        for name in ('_views', '_slot_team', '_slot_country'):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._attach_views()
+
+    def merge(self, other: "MatchupCounts"):
+        """Add the counters of another run over the same teams"""
+
+        if other.teams != self.teams:
+            raise ValueError("Cannot merge counts over different teams")
+
+        if self._views is not None and other._views is not None:
+            for name, counts in self._views.items():
+                counts += other._views[name]
+            self.draws += other.draws
+            return
+
+        for mine, theirs in ((self.matchups, other.matchups), (self.hosted, other.hosted),
+                             (self.countries_played, other.countries_played)):
+            for k, count in enumerate(theirs):
+                if count:
+                    mine[k] += count
+        self.draws += other.draws
+
+    def add(self, draw):
+        """
+        Add one complete draw. Accepts anything exposing the DrawState slot
+        table (opponents, home, matches_per_team), including DrawSampler.
+        """
+
+        if self._views is not None:
+            self._add_numpy(draw)
+            return
+
+        n = self.num_teams
+        num_countries = self.num_countries
+        matches_per_team = draw.matches_per_team
+        team_country = self.team_country
+        matchups = self.matchups
+        hosted = self.hosted
+        countries_played = self.countries_played
+
+        for slot, opponent in enumerate(draw.opponents):
+            team = slot // matches_per_team
+            cell = team * n + opponent
+            matchups[cell] += 1
+            if draw.home[slot]:
+                hosted[cell] += 1
+            countries_played[team_country[team] * num_countries + team_country[opponent]] += 1
+
+        self.draws += 1
+
+    def _add_numpy(self, draw):
+        views = self._views
+        opponents = np.frombuffer(draw.opponents, dtype=np.int16)
+        home = np.frombuffer(draw.home, dtype=np.uint8).astype(bool)
+        teams = self._slot_team
+
+        # A team meets each opponent at most once per draw, so the team
+        # cells are distinct and plain fancy-index increments are safe
+        views['matchups'][teams, opponents] += 1
+        views['hosted'][teams[home], opponents[home]] += 1
+
+        team_country = self._slot_country
+        np.add.at(views['countries'], (team_country[teams], team_country[opponents]), 1)
+        self.draws += 1
+
+    def probability(self, team1, team2) -> float:
+        """Fraction of draws in which team1 played team2"""
+
+        return self._fraction(self.matchups, team1, team2)
+
+    def home_probability(self, team1, team2) -> float:
+        """Fraction of draws in which team1 hosted team2"""
+
+        return self._fraction(self.hosted, team1, team2)
+
+    def country_mean(self, country1: str, country2: str) -> float:
+        """Mean number of matches per draw between two countries"""
+
+        if not self.draws:
+            return 0.0
+        cell = self.country_index[country1] * self.num_countries + self.country_index[country2]
+        count = self.countries_played[cell]
+        if country1 == country2:
+            count //= 2
+        return count / self.draws
+
+    def interval(self, team1, team2, z: float = 1.96) -> Tuple[float, float]:
+        """Wilson confidence interval for probability(team1, team2)"""
+
+        cell = self.index[team1] * self.num_teams + self.index[team2]
+        return wilson_interval(self.matchups[cell], self.draws, z)
+
+    def max_half_width(self, z: float = 1.96) -> float:
+        """Widest confidence half-width over every matchup probability"""
+
+        draws = self.draws
+        if not draws:
+            return 1.0
+
+        # The Wilson half-width grows as p approaches 1/2, so only the
+        # count closest to half the draws needs to be checked
+        worst = min(self.matchups, key=lambda count: abs(2 * count - draws))
+        low, high = wilson_interval(worst, draws, z)
+        return (high - low) / 2
+
+    def as_numpy(self) -> Dict[str, "np.ndarray"]:
+        """Zero-copy NumPy views of the counters, shaped as matrices"""
+
+        if np is None:
+            raise RuntimeError("NumPy is not installed")
+
+        def view(counts, size):
+            return np.frombuffer(counts, dtype=f"u{counts.itemsize}").reshape(size, size)
+
+        return {
+            'matchups': view(self.matchups, self.num_teams),
+            'hosted': view(self.hosted, self.num_teams),
+            'countries': view(self.countries_played, self.num_countries),
+        }
+
+    def _fraction(self, counts: array, team1, team2) -> float:
+        if not self.draws:
+            return 0.0
+        return counts[self.index[team1] * self.num_teams + self.index[team2]] / self.draws
+
+
+def wilson_interval(successes: int, trials: int, z: float = 1.96) -> Tuple[float, float]:
+    """Wilson score interval for a binomial proportion"""
+
+    if not trials:
+        return 0.0, 1.0
+
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - half_width), min(1.0, centre + half_width)
+
+
+class MonteCarloEngine:
+    """
+    Estimates matchup probabilities by running many draws
+
+    method selects how draws are produced: "two_phase", "backtrack" and
+    "pot_pairs" solve every draw from scratch, so draws are independent;
+    "mcmc" walks a DrawSampler chain and keeps one draw every thinning
+    steps, which is much faster but gives correlated draws, so the
+    confidence intervals are optimistic (see DrawSampler.mixing_diagnostic).
+
+    draws() raises precheck.InfeasibleDraw if the pre-check proves no draw
+    exists, and RuntimeError after max_failures solver attempts in a row
+    have run out of steps.
+    """
+
+    METHODS = ("two_phase", "backtrack", "pot_pairs", "mcmc")
+
+    def __init__(self, teams, constraints, method: str = "two_phase",
+                 max_steps: int = 5000, thinning: int = 100, max_failures: int = 1000,
+                 rng: Optional[random.Random] = None):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown draw method: {method}")
+        if max_failures < 1:
+            raise ValueError("max_failures must be at least 1")
+
+        self.state = DrawState(teams, constraints)
+        self.method = method
+        self.max_steps = max_steps
+        self.thinning = thinning
+        self.max_failures = max_failures
+        self.rng = rng if rng is not None else random
+        self.counts = MatchupCounts(self.state)
+        self.failed_attempts = 0
+
+    def draws(self) -> Iterator:
+        """Yield complete draws forever; each is only valid until the next"""
+
+        check_feasible(self.state.teams, self.state.constraints)
+
+        if self.method == "mcmc":
+            state = self.state
+            failures = 0
+            state.reset()
+            while not solve_two_phase(state, self.max_steps, self.rng):
+                failures = self._failed(failures)
+            sampler = DrawSampler(state, rng=self.rng)
+            yield from sampler.sample(None, burn_in=self.thinning * 10, thinning=self.thinning)
+            return
+
+        failures = 0
+        while True:
+            self.state.reset()
+            if self._solve():
+                failures = 0
+                yield self.state
+            else:
+                failures = self._failed(failures)
+
+    def _failed(self, failures: int) -> int:
+        """Count a failed attempt; raises once max_failures have failed in a row"""
+
+        self.failed_attempts += 1
+        failures += 1
+        if failures >= self.max_failures:
+            raise RuntimeError(f"No draw found in {failures} attempts of {self.max_steps} steps")
+        return failures
+
+    def _solve(self) -> Optional[bool]:
+        state = self.state
+        if self.method == "two_phase":
+            return solve_two_phase(state, self.max_steps, self.rng)
+        if self.method == "pot_pairs":
+            return PotPairSolver(state, self.max_steps, rng=self.rng).solve()
+        return complete_draw(state, self.max_steps, rng=self.rng)
+
+    def run(self, num_draws: int, tolerance: Optional[float] = None,
+            z: float = 1.96, check_every: int = 100) -> MatchupCounts:
+        """
+        Add up to num_draws draws to the counters and return them.
+
+        If tolerance is given, the run stops early once every matchup
+        probability has a confidence half-width of at most tolerance,
+        checked every check_every draws. Calling run() again continues
+        accumulating into the same counters.
+        """
+
+        counts = self.counts
+        if num_draws <= 0:
+            return counts
+        target = counts.draws + num_draws
+
+        for draw in self.draws():
+            counts.add(draw)
+            if counts.draws >= target:
+                break
+            if (tolerance is not None and counts.draws % check_every == 0
+                    and counts.max_half_width(z) <= tolerance):
+                break
+
+        return counts
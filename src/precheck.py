@@ -0,0 +1,357 @@
+"""
+Infeasibility pre-check
+Necessary conditions a team list and its constraints must meet before any draw is attempted
+"""
+
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, NamedTuple, Sequence, Tuple
+
+from .constraints import DrawConstraints, DrawFormat, compile_format
+from .draw_state import iter_bits
+
+
+# Rules a problem can be reported under, in the order they are checked
+HOME_AWAY = "home_away"          # as many home as away matches in total
+POT_QUOTA = "pot_quota"          # matches per team split evenly over the pots
+POT_SIZES = "pot_sizes"          # pots big enough, and equal, to pair their teams
+TEAM_OPTIONS = "team_options"    # each team has enough admissible opponents
+POT_PAIRING = "pot_pairing"      # each pot pair can be matched (max-flow)
+RULES = (HOME_AWAY, POT_QUOTA, POT_SIZES, TEAM_OPTIONS, POT_PAIRING)
+
+
+class Problem(NamedTuple):
+    """A rule the teams and constraints cannot satisfy"""
+    rule: str
+    message: str
+
+
+class InfeasibleDraw(ValueError):
+    """No draw exists for the teams and constraints"""
+
+    def __init__(self, problems: Sequence[Problem]):
+        self.problems = tuple(problems)
+        super().__init__("No draw is possible: " + "; ".join(problem.message for problem in self.problems))
+
+    def __reduce__(self):
+        # Rebuilt from the problems, so it survives a worker process
+        return type(self), (self.problems,)
+
+
+class FlowNetwork:
+    """Integer max-flow by Dinic's algorithm"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.heads: List[int] = []
+        self.capacity: List[int] = []
+        self.edges: List[List[int]] = [[] for _ in range(size)]
+
+    def add_edge(self, u: int, v: int, capacity: int) -> int:
+        """Add an edge and return its id; id ^ 1 is the reverse edge"""
+
+        edge = len(self.heads)
+        self.heads += [v, u]
+        self.capacity += [capacity, 0]
+        self.edges[u].append(edge)
+        self.edges[v].append(edge + 1)
+        return edge
+
+    def max_flow(self, source: int, sink: int) -> int:
+        flow = 0
+        while True:
+            level = self.levels(source)
+            if level[sink] < 0:
+                return flow
+            cursor = [0] * self.size
+            while True:
+                pushed = self._augment(source, sink, level, cursor)
+                if not pushed:
+                    break
+                flow += pushed
+
+    def levels(self, source: int) -> List[int]:
+        """BFS distance from source over edges with spare capacity, -1 if unreachable"""
+
+        level = [-1] * self.size
+        level[source] = 0
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            for edge in self.edges[u]:
+                v = self.heads[edge]
+                if self.capacity[edge] and level[v] < 0:
+                    level[v] = level[u] + 1
+                    queue.append(v)
+        return level
+
+    def _augment(self, source: int, sink: int, level: List[int], cursor: List[int]) -> int:
+        """Push one blocking-flow path, found by iterative DFS along the levels"""
+
+        path: List[int] = []
+        u = source
+        while u != sink:
+            edges = self.edges[u]
+            while cursor[u] < len(edges):
+                edge = edges[cursor[u]]
+                v = self.heads[edge]
+                if self.capacity[edge] and level[v] == level[u] + 1:
+                    break
+                cursor[u] += 1
+            else:
+                if u == source:
+                    return 0
+                # Dead end: retreat and skip the edge that led here
+                level[u] = -1
+                edge = path.pop()
+                u = self.heads[edge ^ 1]
+                cursor[u] += 1
+                continue
+            path.append(edge)
+            u = self.heads[edge]
+
+        pushed = min(self.capacity[edge] for edge in path)
+        for edge in path:
+            self.capacity[edge] -= pushed
+            self.capacity[edge ^ 1] += pushed
+        return pushed
+
+
+def _classes(compiled: DrawFormat) -> Dict[Tuple[int, int, int], List[int]]:
+    """
+    Teams grouped by pot, country and the opponents they may never meet.
+    Teams in one class are interchangeable as far as the static rules go,
+    and a class never meets itself: its members share a country, or each
+    is in a class of its own when same-country matches are allowed.
+    """
+
+    classes: Dict[Tuple[int, int, int], List[int]] = {}
+    for i in range(compiled.num_teams):
+        key = (compiled.team_pot[i], compiled.team_country[i], compiled.excluded[i] | 1 << i)
+        classes.setdefault(key, []).append(i)
+    return classes
+
+
+def _describe(compiled: DrawFormat, members: List[int], limit: int = 3) -> str:
+    names = compiled.names
+    country = compiled.countries[compiled.team_country[members[0]]]
+    pot = compiled.pots[compiled.team_pot[members[0]]]
+    listed = ", ".join(names[i] for i in members[:limit])
+    if len(members) > limit:
+        listed += f" and {len(members) - limit} more"
+    return f"{country} in pot {pot} ({listed})"
+
+
+def _format_problems(compiled: DrawFormat) -> List[Problem]:
+    constraints = compiled.constraints
+    problems = []
+
+    if constraints.home_matches != constraints.away_matches:
+        problems.append(Problem(HOME_AWAY, (
+            f"every match has a home and an away side, so teams cannot play {constraints.home_matches} "
+            f"home and {constraints.away_matches} away matches")))
+
+    quota = compiled.quota
+    if compiled.matches_per_team != quota * compiled.num_pots:
+        problems.append(Problem(POT_QUOTA, (
+            f"{compiled.matches_per_team} matches per team cannot be {quota} "
+            f"from each of {compiled.num_pots} pots")))
+
+    if quota:
+        sizes = [len(members) for members in compiled.pot_members]
+        if len(set(sizes)) > 1:
+            listed = ", ".join(f"pot {pot}: {size}" for pot, size in zip(compiled.pots, sizes))
+            problems.append(Problem(POT_SIZES, (
+                f"every team meets {quota} teams from each pot, so the pots must be the same size ({listed})")))
+        for pot, size in zip(compiled.pots, sizes):
+            if size * quota % 2:
+                problems.append(Problem(POT_SIZES, (
+                    f"pot {pot} has {size} teams each drawing {quota} opponents from it, "
+                    f"an odd number of places that cannot be paired")))
+    return problems
+
+
+def _team_problems(compiled: DrawFormat, classes) -> List[Problem]:
+    """
+    Per team: enough admissible opponents in every pot, and in total, once
+    each country counts for at most the country cap
+    """
+
+    num_pots = compiled.num_pots
+    cap = compiled.country_cap
+    quota = compiled.quota
+    sizes: Dict[Tuple[int, int], int] = {}
+    for i in range(compiled.num_teams):
+        group = (compiled.team_pot[i], compiled.team_country[i])
+        sizes[group] = sizes.get(group, 0) + 1
+
+    # With no exclusions, a team could take min(cap, size) from each group
+    pot_room = [0] * num_pots
+    country_size: Dict[int, int] = {}
+    for (pot, country), size in sizes.items():
+        pot_room[pot] += min(cap, size)
+        country_size[country] = country_size.get(country, 0) + size
+    total_room = sum(min(cap, size) for size in country_size.values())
+
+    problems = []
+    for (_, _, excluded), members in classes.items():
+        lost: Dict[Tuple[int, int], int] = {}
+        for j in iter_bits(excluded):
+            group = (compiled.team_pot[j], compiled.team_country[j])
+            lost[group] = lost.get(group, 0) + 1
+
+        room = list(pot_room)
+        lost_by_country: Dict[int, int] = {}
+        for (pot, country), count in lost.items():
+            room[pot] -= min(cap, sizes[pot, country]) - min(cap, sizes[pot, country] - count)
+            lost_by_country[country] = lost_by_country.get(country, 0) + count
+        total = total_room - sum(min(cap, country_size[country]) - min(cap, country_size[country] - count)
+                                 for country, count in lost_by_country.items())
+
+        team = _describe(compiled, members)
+        for pot in range(num_pots):
+            if room[pot] < quota:
+                problems.append(Problem(TEAM_OPTIONS, (
+                    f"{team} need {quota} opponents from pot {compiled.pots[pot]} but can meet "
+                    f"at most {room[pot]} there")))
+        if total < compiled.matches_per_team:
+            problems.append(Problem(TEAM_OPTIONS, (
+                f"{team} need {compiled.matches_per_team} opponents but can meet at most {total} "
+                f"with no more than {cap} from any country")))
+    return problems
+
+
+class _Unit(NamedTuple):
+    """Flow node: classes of one pot, merged when no pair rule singles them out"""
+    classes: List[List[int]]
+    excluded: int         # the opponents a single class may never meet; 0 if merged
+    size: int             # teams per class
+    countries: FrozenSet[int]   # of the classes, when same-country matches are ruled out
+
+    @property
+    def teams(self) -> int:
+        return len(self.classes) * self.size
+
+
+def _units(compiled: DrawFormat, classes) -> List[List[_Unit]]:
+    """
+    Flow nodes per pot. Classes without forbidden or protected pairs can
+    only be kept apart from their own country, so classes of one size are
+    interchangeable and share a node; this keeps the networks small for
+    leagues with many one-team countries.
+    """
+
+    apart = not compiled.constraints.same_country_allowed
+    units: List[List[_Unit]] = [[] for _ in range(compiled.num_pots)]
+    plain: Dict[Tuple[int, int], List[List[int]]] = {}
+    for (pot, country, excluded), members in classes.items():
+        if any(compiled.banned[i] for i in members):
+            units[pot].append(_Unit([members], excluded, len(members), frozenset([country] if apart else [])))
+        else:
+            plain.setdefault((pot, len(members)), []).append(members)
+    for (pot, size), merged in plain.items():
+        countries = frozenset(compiled.team_country[members[0]] for members in merged if apart)
+        units[pot].append(_Unit(merged, 0, size, countries))
+    return units
+
+
+def _describe_unit(compiled: DrawFormat, unit: _Unit) -> str:
+    if len(unit.classes) == 1:
+        return _describe(compiled, unit.classes[0])
+    pot = compiled.pots[compiled.team_pot[unit.classes[0][0]]]
+    listed = ", ".join(compiled.names[members[0]] for members in unit.classes[:3])
+    if len(unit.classes) > 3:
+        listed += f" and {unit.teams - 3} more"
+    return f"{len(unit.classes)} countries with {unit.size} team(s) each in pot {pot} ({listed})"
+
+
+def _pairing_problems(compiled: DrawFormat, classes) -> List[Problem]:
+    """
+    Per pot pair: a max-flow from the classes of one pot to those of the
+    other, every team asking for quota opponents and a class taking at
+    most the country cap from each other class, must place every match
+    """
+
+    quota = compiled.quota
+    cap = compiled.country_cap
+    by_pot = _units(compiled, classes)
+
+    def capacity(x: _Unit, y: _Unit, same: bool) -> int:
+        """Most matches between the classes of x and those of y"""
+        if same:
+            # The classes of a unit are of different countries
+            pairs = len(x.classes) * (len(x.classes) - 1)
+        elif x.excluded or y.excluded:
+            # A single class against each class of the other unit it may meet
+            single, other = (x, y) if x.excluded else (y, x)
+            pairs = sum(not single.excluded >> members[0] & 1 for members in other.classes)
+        else:
+            # Merged classes are only kept apart from their own country, if at all
+            pairs = len(x.classes) * len(y.classes) - len(x.countries & y.countries)
+        return pairs * min(x.size * min(cap, y.size), y.size * min(cap, x.size))
+
+    problems = []
+    for p in range(compiled.num_pots):
+        for q in range(p, compiled.num_pots):
+            left, right = by_pot[p], by_pot[q]
+            network = FlowNetwork(len(left) + len(right) + 2)
+            source = len(left) + len(right)
+            sink = source + 1
+            supply = [network.add_edge(source, a, unit.teams * quota) for a, unit in enumerate(left)]
+            for b, unit in enumerate(right):
+                network.add_edge(len(left) + b, sink, unit.teams * quota)
+
+            for a, senders in enumerate(left):
+                for b, receivers in enumerate(right):
+                    limit = capacity(senders, receivers, p == q and a == b)
+                    if limit > 0:
+                        network.add_edge(a, len(left) + b, limit)
+
+            needed = sum(unit.teams for unit in left) * quota
+            flow = network.max_flow(source, sink)
+            if flow < needed:
+                level = network.levels(source)
+                short = [_describe_unit(compiled, left[a]) for a in range(len(left))
+                         if network.capacity[supply[a]] and level[a] >= 0]
+                between = (f"within pot {compiled.pots[p]}" if p == q else
+                           f"between pots {compiled.pots[p]} and {compiled.pots[q]}")
+                problems.append(Problem(POT_PAIRING, (
+                    f"only {flow} of the {needed} places {between} can be filled; short of opponents: "
+                    + "; ".join(short))))
+    return problems
+
+
+@lru_cache(maxsize=64)
+def format_problems(compiled: DrawFormat) -> Tuple[Problem, ...]:
+    """Every problem found for a compiled format; empty if no check fails"""
+
+    problems = _format_problems(compiled)
+    if problems:
+        # The other checks assume a well-formed format
+        return tuple(problems)
+
+    classes = _classes(compiled)
+    return tuple(_team_problems(compiled, classes) + _pairing_problems(compiled, classes))
+
+
+def find_problems(teams: Sequence, constraints: DrawConstraints) -> Tuple[Problem, ...]:
+    """
+    Check the teams and constraints against necessary conditions for a
+    draw to exist, returning every problem found with an explanation.
+
+    The checks are counts (home/away balance, pot quotas and sizes, the
+    admissible opponents of each team) and one max-flow per pot pair over
+    teams grouped by pot and country. They are necessary, not sufficient:
+    an empty result does not prove a draw exists, but a problem proves
+    none does. Results are cached per compiled format.
+    """
+
+    return format_problems(compile_format(teams, constraints))
+
+
+def check_feasible(teams: Sequence, constraints: DrawConstraints):
+    """Raise InfeasibleDraw if find_problems() finds any problem"""
+
+    problems = find_problems(teams, constraints)
+    if problems:
+        raise InfeasibleDraw(problems)
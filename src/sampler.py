@@ -0,0 +1,421 @@
+"""
+MCMC sampler for bulk draw generation
+Produces new valid draws from one valid draw by local switch moves
+"""
+
+import itertools
+import random
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .draw_state import DrawState
+
+
+class DrawSampler:
+    """
+    Edge-switch Markov chain over complete draws
+
+    Three moves are proposed:
+
+    - swap: take a fixture "a hosts b" and a fixture "c hosts d" from the
+      same class (a, c from the same pot and b, d from the same pot), and
+      rewire them to "a hosts d" and "c hosts b". Pot quotas and home/away
+      counts are unchanged; the move is accepted if the country rules
+      still hold and neither new pairing has been drawn already.
+    - reverse: take a directed triangle a hosts b, b hosts c, c hosts a
+      and reverse it. Opponents and home/away counts are unchanged; only
+      the venues move.
+    - redraw: pick window teams at random, take out the matches among
+      them and draw those slots again, uniformly among every valid way
+      to fill them (all of them are listed, so the window is kept small).
+
+    Swaps and reversals are cheap but never change which pot a team meets
+    at home, other than round a triangle, so alone they reach only a small
+    part of the valid draws. A redraw can replace the matches among its
+    window teams with any others that fit, so every draw differing from
+    the current one only in matches among window teams is one move away;
+    with window at least the number of teams whose matches may move, the
+    chain reaches every valid draw in one move. Smaller windows are not
+    guaranteed to: some small leagues need windows of four teams to move
+    at all, and the default is checked against exact counts in the tests.
+
+    Swaps and reversals are symmetric proposals (a swap never changes the
+    class sizes) and a redraw picks its window regardless of the draw and
+    its new matches uniformly, so every draw the chain reaches is sampled
+    with equal probability. Swaps and reversals cost a handful of array
+    reads and writes instead of a full constraint solve.
+
+    Matches listed in fixed (as team id pairs, in either order) are never
+    moved, so the chain samples the completions of a partial draw: start
+    it from one completion with the partial draw's matches fixed.
+
+    The sampler exposes the same slot table as DrawState (opponents, home,
+    matches_per_team), so consumers can read either. Samples yielded by
+    sample() are the live sampler; call to_state() to keep one.
+    """
+
+    def __init__(self, state: DrawState, reverse_probability: float = 0.1,
+                 rng: Optional[random.Random] = None, fixed: Iterable[Tuple[int, int]] = (),
+                 redraw_probability: float = 0.05, window: int = 6):
+        if not state.is_complete() or state.constraint_errors():
+            raise ValueError("DrawSampler needs a complete, valid draw to start from")
+
+        self.teams = state.teams
+        self.constraints = state.constraints
+        self.num_teams = state.num_teams
+        self.num_pots = state.num_pots
+        self.num_countries = state.num_countries
+        self.matches_per_team = state.matches_per_team
+        self.team_pot = state.team_pot
+        self.team_country = state.team_country
+        self.excluded = state.excluded
+        self.country_cap = state.country_cap
+        self.reverse_probability = reverse_probability
+        self.redraw_probability = redraw_probability
+        self.window = window
+        self.rng = rng if rng is not None else random
+
+        self.opponents = array('h', state.opponents)
+        self.home = array('B', state.home)
+        self.country_count = array('B', state.country_count)
+        self.played: List[int] = list(state.played)
+
+        # Every match once, as (home team, away team)
+        self.matches: List[Tuple[int, int]] = [
+            (i, j) for i in range(self.num_teams)
+            for j, is_home in state.team_fixtures(i) if is_home
+        ]
+        self._start = set(self.matches)
+        self._fixed = {(min(i, j), max(i, j)) for i, j in fixed}
+
+        # Ids of the matches moves may touch, grouped by (home pot, away
+        # pot) class for swap proposals
+        self._movable: List[int] = [
+            k for k, (i, j) in enumerate(self.matches) if (min(i, j), max(i, j)) not in self._fixed
+        ]
+        self._classes: Dict[Tuple[int, int], List[int]] = {}
+        self._position: List[int] = [0] * len(self.matches)
+        for k in self._movable:
+            self._enter_class(k)
+
+        # Teams with a match that may move, for redraw windows
+        self._active: List[int] = sorted({i for k in self._movable for i in self.matches[k]})
+
+        self.steps = 0
+        self.accepted = 0
+        self.overlap_trace: List[float] = []
+
+    def step(self) -> bool:
+        """Propose one move; returns True if it was accepted"""
+
+        self.steps += 1
+        if not self._movable:
+            return False
+        move = self.rng.random()
+        if move < self.reverse_probability:
+            accepted = self._reverse_move()
+        elif move < self.reverse_probability + self.redraw_probability:
+            accepted = self._redraw_move()
+        else:
+            accepted = self._swap_move()
+        if accepted:
+            self.accepted += 1
+        return accepted
+
+    def _match_class(self, k: int) -> Tuple[int, int]:
+        home, away = self.matches[k]
+        return self.team_pot[home], self.team_pot[away]
+
+    def _enter_class(self, k: int):
+        members = self._classes.setdefault(self._match_class(k), [])
+        self._position[k] = len(members)
+        members.append(k)
+
+    def _leave_class(self, k: int):
+        members = self._classes[self._match_class(k)]
+        last = members.pop()
+        if last != k:
+            members[self._position[k]] = last
+            self._position[last] = self._position[k]
+
+    def _swap_move(self) -> bool:
+        matches = self.matches
+        k1 = self._movable[self.rng.randrange(len(self._movable))]
+        members = self._classes[self._match_class(k1)]
+        k2 = members[self.rng.randrange(len(members))]
+        a, b = matches[k1]
+        c, d = matches[k2]
+
+        if a == c or b == d or a == d or c == b:
+            return False
+        if self.played[a] >> d & 1 or self.played[c] >> b & 1:
+            return False
+
+        if self.excluded[a] >> d & 1 or self.excluded[c] >> b & 1:
+            return False
+
+        country = self.team_country
+        ca, cb, cc, cd = country[a], country[b], country[c], country[d]
+        counts = self.country_count
+        num_countries = self.num_countries
+        cap = self.country_cap
+        if cb != cd:
+            if counts[a * num_countries + cd] >= cap:
+                return False
+            if counts[c * num_countries + cb] >= cap:
+                return False
+        if ca != cc:
+            if counts[b * num_countries + cc] >= cap:
+                return False
+            if counts[d * num_countries + ca] >= cap:
+                return False
+
+        self._replace(a, b, d)
+        self._replace(c, d, b)
+        self._replace(b, a, c)
+        self._replace(d, c, a)
+        matches[k1] = (a, d)
+        matches[k2] = (c, b)
+        return True
+
+    def _replace(self, team: int, old: int, new: int):
+        """Swap opponent old for new in team's fixtures, keeping the venue"""
+
+        start = team * self.matches_per_team
+        slot = self.opponents.index(old, start, start + self.matches_per_team)
+        self.opponents[slot] = new
+        self.played[team] ^= (1 << old) | (1 << new)
+
+        num_countries = self.num_countries
+        self.country_count[team * num_countries + self.team_country[old]] -= 1
+        self.country_count[team * num_countries + self.team_country[new]] += 1
+
+    def _reverse_move(self) -> bool:
+        a, b = self.matches[self._movable[self.rng.randrange(len(self._movable))]]
+
+        # Pick one of b's home fixtures, then look for c hosting a
+        start = b * self.matches_per_team
+        slot = start + self.rng.randrange(self.matches_per_team)
+        if not self.home[slot]:
+            return False
+        c = self.opponents[slot]
+        if not self.played[c] >> a & 1 or not self._hosts(c, a):
+            return False
+        fixed = self._fixed
+        if fixed and ((min(b, c), max(b, c)) in fixed or (min(a, c), max(a, c)) in fixed):
+            return False
+
+        for home, away in ((a, b), (b, c), (c, a)):
+            self._flip(home, away)
+        return True
+
+    def _hosts(self, team: int, opponent: int) -> bool:
+        start = team * self.matches_per_team
+        slot = self.opponents.index(opponent, start, start + self.matches_per_team)
+        return bool(self.home[slot])
+
+    def _flip(self, home: int, away: int):
+        """Turn "home hosts away" into "away hosts home" """
+
+        for team, opponent in ((home, away), (away, home)):
+            start = team * self.matches_per_team
+            slot = self.opponents.index(opponent, start, start + self.matches_per_team)
+            self.home[slot] ^= 1
+
+        k = self.matches.index((home, away))
+        self._leave_class(k)
+        self.matches[k] = (away, home)
+        self._enter_class(k)
+
+    def _redraw_move(self) -> bool:
+        window = self.rng.sample(self._active, min(self.window, len(self._active)))
+        members = 0
+        for team in window:
+            members |= 1 << team
+        matches = self.matches
+        taken = [k for k in self._movable
+                 if members >> matches[k][0] & 1 and members >> matches[k][1] & 1]
+        if not taken:
+            return False
+
+        # Open the slots of the matches taken out
+        num_pots = self.num_pots
+        home_needed = dict.fromkeys(window, 0)
+        away_needed = dict.fromkeys(window, 0)
+        pot_needed = dict.fromkeys(((team, pot) for team in window for pot in range(num_pots)), 0)
+        slots: Dict[int, List[int]] = {team: [] for team in window}
+        before = []
+        for k in taken:
+            home, away = matches[k]
+            before.append((home, away))
+            self._leave_class(k)
+            home_needed[home] += 1
+            away_needed[away] += 1
+            pot_needed[home, self.team_pot[away]] += 1
+            pot_needed[away, self.team_pot[home]] += 1
+            for team, opponent in ((home, away), (away, home)):
+                start = team * self.matches_per_team
+                slots[team].append(self.opponents.index(opponent, start, start + self.matches_per_team))
+                self._unplay(team, opponent)
+
+        redraws = list(self._redraws(window, home_needed, away_needed, pot_needed))
+        after = redraws[self.rng.randrange(len(redraws))]
+
+        for k, (home, away) in zip(taken, after):
+            for team, opponent, is_home in ((home, away, 1), (away, home, 0)):
+                slot = slots[team].pop()
+                self.opponents[slot] = opponent
+                self.home[slot] = is_home
+                self._play(team, opponent)
+            matches[k] = (home, away)
+            self._enter_class(k)
+        return set(after) != set(before)
+
+    def _play(self, team: int, opponent: int):
+        self.played[team] |= 1 << opponent
+        self.country_count[team * self.num_countries + self.team_country[opponent]] += 1
+
+    def _unplay(self, team: int, opponent: int):
+        self.played[team] &= ~(1 << opponent)
+        self.country_count[team * self.num_countries + self.team_country[opponent]] -= 1
+
+    def _redraws(self, teams: List[int], home_needed: Dict[int, int], away_needed: Dict[int, int],
+                 pot_needed: Dict[Tuple[int, int], int]) -> Iterator[List[Tuple[int, int]]]:
+        """
+        Every way to fill the open slots of teams with matches among them,
+        as (home, away) lists; the teams' slots are filled in list order,
+        each team's opponents in increasing position, so no way repeats
+        """
+
+        team_pot = self.team_pot
+        team_country = self.team_country
+        counts = self.country_count
+        num_countries = self.num_countries
+        cap = self.country_cap
+        drawn: List[Tuple[int, int]] = []
+
+        def pairable(t: int, u: int) -> bool:
+            if (self.excluded[t] | self.played[t]) >> u & 1:
+                return False
+            if not pot_needed[t, team_pot[u]] or not pot_needed[u, team_pot[t]]:
+                return False
+            return (counts[t * num_countries + team_country[u]] < cap
+                    and counts[u * num_countries + team_country[t]] < cap)
+
+        def fill(position: int, after: int) -> Iterator[List[Tuple[int, int]]]:
+            while position < len(teams) and not home_needed[teams[position]] + away_needed[teams[position]]:
+                position += 1
+                after = position
+            if position == len(teams):
+                yield list(drawn)
+                return
+
+            t = teams[position]
+            for index in range(after + 1, len(teams)):
+                u = teams[index]
+                if not pairable(t, u):
+                    continue
+                for home, away in ((t, u), (u, t)):
+                    if not home_needed[home] or not away_needed[away]:
+                        continue
+                    home_needed[home] -= 1
+                    away_needed[away] -= 1
+                    pot_needed[t, team_pot[u]] -= 1
+                    pot_needed[u, team_pot[t]] -= 1
+                    self._play(t, u)
+                    self._play(u, t)
+                    drawn.append((home, away))
+
+                    yield from fill(position, index)
+
+                    drawn.pop()
+                    self._unplay(u, t)
+                    self._unplay(t, u)
+                    pot_needed[u, team_pot[t]] += 1
+                    pot_needed[t, team_pot[u]] += 1
+                    away_needed[away] += 1
+                    home_needed[home] += 1
+
+        return fill(0, 0)
+
+    def sample(self, count: Optional[int], burn_in: int = 1000,
+               thinning: int = 100, trace: bool = False) -> Iterator["DrawSampler"]:
+        """
+        Yield count draws (forever if count is None), discarding burn_in
+        steps first and taking one draw every thinning steps. The yielded
+        object is the sampler itself.
+
+        With trace, the overlap of every yielded draw with the starting
+        draw is appended to overlap_trace for mixing_diagnostic(); it is
+        off by default so endless runs keep nothing per draw.
+        """
+
+        for _ in range(burn_in):
+            self.step()
+
+        for _ in (range(count) if count is not None else itertools.count()):
+            for _ in range(thinning):
+                self.step()
+            if trace:
+                self.overlap_trace.append(self.overlap_with_start())
+            yield self
+
+    def overlap_with_start(self) -> float:
+        """Fraction of matches (with venue) shared with the starting draw"""
+
+        start = self._start
+        return sum(1 for match in self.matches if match in start) / len(self.matches)
+
+    def mixing_diagnostic(self) -> Dict[str, float]:
+        """
+        Summarise how well the chain mixes.
+
+        The overlap with the starting draw should fall to a stable level
+        once the chain has forgotten where it started. The integrated
+        autocorrelation time of that overlap across samples estimates how
+        many yielded draws are worth one independent draw. The overlaps
+        come from sample(..., trace=True).
+        """
+
+        trace = self.overlap_trace
+        tau = autocorrelation_time(trace)
+        return {
+            'steps': self.steps,
+            'acceptance_rate': self.accepted / self.steps if self.steps else 0.0,
+            'samples': len(trace),
+            'overlap_with_start': self.overlap_with_start(),
+            'autocorrelation_time': tau,
+            'effective_samples': len(trace) / tau if trace else 0.0,
+        }
+
+    def to_state(self) -> DrawState:
+        """Copy the current draw into a new DrawState"""
+
+        state = DrawState(self.teams, self.constraints)
+        for home, away in self.matches:
+            state.add_match(home, away, True)
+        return state
+
+
+def autocorrelation_time(values: List[float]) -> float:
+    """
+    Integrated autocorrelation time, summing autocorrelations until the
+    first non-positive one. Returns 1.0 for uncorrelated or too short
+    series.
+    """
+
+    n = len(values)
+    if n < 3 or min(values) == max(values):
+        return 1.0
+
+    mean = sum(values) / n
+    centred = [v - mean for v in values]
+    variance = sum(v * v for v in centred) / n
+
+    tau = 1.0
+    for lag in range(1, n // 2):
+        rho = sum(centred[k] * centred[k + lag] for k in range(n - lag)) / (n * variance)
+        if rho <= 0:
+            break
+        tau += 2 * rho
+    return tau
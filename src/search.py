@@ -0,0 +1,211 @@
+"""
+Backtracking search over a DrawState
+Most-constrained-first slot selection with forward checking
+"""
+
+import random
+from typing import List, Optional, Set, Tuple
+
+from .budget import CHECK_INTERVAL, Budget
+from .decomposition import OPEN, orient_euler
+from .draw_state import DrawState, iter_bits
+
+
+def state_key(state: DrawState) -> Tuple:
+    """
+    Fingerprint of a partial draw
+
+    The opponents drawn and the home counts determine every remaining
+    quota, so two states with the same key have the same completions.
+    """
+
+    return tuple(state.played), bytes(state.home_count)
+
+
+def slot_candidates(state: DrawState, team: int, pot: int,
+                    undirected: bool = False) -> List[Tuple[int, bool]]:
+    """
+    List every (opponent, is_home) still allowed for team in a pot.
+    If undirected, home/away is ignored and every opponent is listed once
+    with a provisional is_home of True.
+    """
+
+    if undirected:
+        return [(opponent, True) for opponent in iter_bits(state.domain[team * state.num_pots + pot])]
+
+    home, away = state.candidates(team, pot)
+    return ([(opponent, True) for opponent in iter_bits(home)] +
+            [(opponent, False) for opponent in iter_bits(away)])
+
+
+def select_slot(state: DrawState, undirected: bool = False):
+    """
+    Forward checking and most-constrained-first selection.
+    Returns (team, pot, candidates) for the open slot with the fewest
+    remaining opponents, None when the draw is complete, or False when
+    some open slot can no longer be completed. If undirected, the
+    home/away limits are ignored.
+    """
+
+    constraints = state.constraints
+    best = None
+    best_slack = None
+
+    for team in range(state.num_teams):
+        if state.degree[team] == state.matches_per_team:
+            continue
+
+        home_needed = constraints.home_matches - state.home_count[team]
+        away_needed = constraints.away_matches - state.away_count[team]
+        home_options = 0
+        away_options = 0
+
+        for pot in range(state.num_pots):
+            needed = constraints.matches_per_pot - state.pot_count[team * state.num_pots + pot]
+            if needed <= 0:
+                continue
+
+            if undirected:
+                slack = state.domain[team * state.num_pots + pot].bit_count() - needed
+                if slack < 0:
+                    return False
+                if best is None or slack < best_slack:
+                    best = (team, pot)
+                    best_slack = slack
+                continue
+
+            home, away = state.candidates(team, pot)
+            slack = (home | away).bit_count() - needed
+            if slack < 0:
+                return False
+
+            home_options += home.bit_count()
+            away_options += away.bit_count()
+
+            if best is None or slack < best_slack:
+                best = (team, pot)
+                best_slack = slack
+
+        if not undirected and (home_options < home_needed or away_options < away_needed):
+            return False
+
+    if best is None:
+        return None
+    team, pot = best
+    return team, pot, slot_candidates(state, team, pot, undirected)
+
+
+def complete_draw(state: DrawState, max_steps: int, infeasible: Optional[Set] = None,
+                  undirected: bool = False, rng: Optional[random.Random] = None,
+                  budget: Optional[Budget] = None) -> Optional[bool]:
+    """
+    Complete a partial draw by depth-first search, undoing only the last
+    choices on a dead end.
+
+    Returns True with the completed draw left in state, False if the
+    partial draw provably has no completion, or None if max_steps search
+    nodes were used up first. On False or None the state is rolled back.
+
+    If infeasible is given, fingerprints of partial draws proven to have
+    no completion are read from and added to it. If undirected, only the
+    opponents are drawn: home/away is ignored and every match is added
+    with a provisional orientation. Candidates are shuffled with rng,
+    which defaults to the random module.
+
+    With a budget, the search also gives up (returning None) once the
+    budget is exhausted, and offers the budget every partial draw it
+    reaches; undirected partial draws are not offered, having no home/away.
+    """
+
+    rng = rng if rng is not None else random
+    steps = 0
+
+    # One [fingerprint, team, candidates, next candidate, checkpoint] per
+    # node whose children are being tried; an explicit stack keeps the
+    # depth (one node per match) clear of Python's recursion limit
+    stack = []
+
+    def visit() -> Optional[bool]:
+        """Settle the node at the current state, or open it on the stack (OPEN)"""
+
+        nonlocal steps
+        steps += 1
+        if steps > max_steps:
+            return None
+        if budget is not None:
+            if not steps % CHECK_INTERVAL and budget.exhausted():
+                return None
+            if not undirected and len(state.trail) > len(budget.best):
+                budget.record(state)
+
+        key = None
+        if infeasible is not None:
+            key = state_key(state)
+            if key in infeasible:
+                return False
+
+        slot = select_slot(state, undirected)
+        if slot is None:
+            return True
+        if slot is False:
+            if key is not None:
+                infeasible.add(key)
+            return False
+
+        team, _, candidates = slot
+        rng.shuffle(candidates)
+        stack.append([key, team, candidates, 0, state.checkpoint()])
+        return OPEN
+
+    start = state.checkpoint()
+    result = visit()
+    while stack and (result is False or result is OPEN):
+        # Undo the child that failed, then try the next candidate
+        frame = stack[-1]
+        key, team, candidates, k, mark = frame
+        state.rollback(mark)
+        if k == len(candidates):
+            stack.pop()
+            if key is not None:
+                infeasible.add(key)
+            result = False
+            continue
+
+        frame[3] = k + 1
+        opponent, is_home = candidates[k]
+        state.add_match(team, opponent, is_home)
+        result = visit()
+
+    if not result:
+        state.rollback(start)
+    return result
+
+
+def solve_two_phase(state: DrawState, max_steps: int,
+                    rng: Optional[random.Random] = None,
+                    budget: Optional[Budget] = None) -> Optional[bool]:
+    """
+    Draw the opponents first, then decide home/away in a separate pass.
+
+    The first phase searches only for the undirected opponent graph, so
+    the home/away limits cause no dead ends. Every team then has an even
+    number of opponents, and orienting the graph along Euler circuits
+    gives each team exactly as many home as away matches in linear time.
+    Returns the same values as complete_draw, and stops early as it does
+    when budget is exhausted.
+    """
+
+    constraints = state.constraints
+    if constraints.home_matches != constraints.away_matches:
+        raise ValueError("Two-phase draw needs as many home as away matches")
+
+    start = state.checkpoint()
+    result = complete_draw(state, max_steps, undirected=True, rng=rng, budget=budget)
+    if not result:
+        return result
+
+    edges = [(i, j) for i, j, _ in state.trail[start:]]
+    state.rollback(start)
+    for home, away in orient_euler(edges, rng):
+        state.add_match(home, away, True)
+    return True
@@ -0,0 +1,449 @@
+"""
+Draw service
+A local asyncio HTTP server handing out pre-solved draws from a pool kept warm by worker processes
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Dict, NamedTuple, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from .ceremony import sse_message, stream_ceremony
+from .champions_league_draw import (
+    ChampionsLeagueDraw, create_conference_league_teams, create_europa_league_teams, create_sample_teams,
+)
+from .champions_league_draw_sequential import SequentialChampionsLeagueDraw
+from .constraints import FORMATS, DrawConstraints
+from .draw_pool import encode_draw, record_layout
+from .export_json import draw_to_dict
+from .farm import worker_seeds
+from .precheck import InfeasibleDraw
+
+
+# Team lists for the presets in constraints.FORMATS
+TEAMS = {
+    'ucl': create_sample_teams,
+    'uel': create_europa_league_teams,
+    'uecl': create_conference_league_teams,
+}
+
+# Solver methods; the restart loop has no bound on its running time
+METHODS = ("backtrack", "pot_pairs", "two_phase")
+
+# Refills counted by refill_rate, in seconds
+RATE_WINDOW = 60.0
+
+
+class PooledDraw(NamedTuple):
+    """One solved draw, encoded for both response formats"""
+    json: bytes
+    record: bytes
+    solve_seconds: float   # including failed attempts
+    failed: int            # attempts that ran out of search steps
+
+
+# The engine of a worker process, built once by _init_worker
+_worker_draw = None
+_worker_options = None
+
+
+def _init_worker(teams, constraints, method: str, max_steps: int, seed: Optional[int]):
+    global _worker_draw, _worker_options
+    _worker_draw = ChampionsLeagueDraw(teams, rng=random.Random(seed), constraints=constraints)
+    _worker_options = (method, max_steps)
+
+
+def _solve_in_worker() -> PooledDraw:
+    """Solve and encode one draw with the worker's engine; raises InfeasibleDraw if none exists"""
+
+    method, max_steps = _worker_options
+    failed = 0
+    start = time.perf_counter()
+    while True:
+        result = _worker_draw.perform_draw(max_attempts=1, method=method, max_steps=max_steps)
+        if result:
+            break
+        if result.problems:
+            raise InfeasibleDraw(result.problems)
+        failed += 1
+    seconds = time.perf_counter() - start
+
+    state = _worker_draw.state
+    document = json.dumps(draw_to_dict(state)).encode("utf-8")
+    return PooledDraw(document, encode_draw(state), seconds, failed)
+
+
+class DrawService:
+    """
+    A pool of pre-solved draws
+
+    Background tasks keep up to capacity draws in the pool. The draws are
+    solved in worker processes, each with its own engine, so solving never
+    holds up the event loop. get_draw() pops the oldest draw, or waits for
+    one to be solved when the pool is empty. If the teams and constraints
+    admit no draw, the workers stop and get_draw() raises InfeasibleDraw.
+    Each draw is encoded as JSON
+    (the export_json document) and as a pool record (draw_pool.encode_draw)
+    in the worker, so serving it costs nothing.
+
+    With a seed, worker k draws with the k-th of farm.worker_seeds(seed),
+    so a run can be repeated; without one, every worker seeds itself from
+    the system.
+    """
+
+    def __init__(self, teams, constraints: Optional[DrawConstraints] = None, method: str = "pot_pairs",
+                 capacity: int = 32, workers: int = 1, max_steps: int = 5000, seed: Optional[int] = None):
+        if capacity < 1 or workers < 1:
+            raise ValueError("capacity and workers must be at least 1")
+        if method not in METHODS:
+            raise ValueError(f"Unknown draw method: {method}")
+
+        self.teams = list(teams)
+        self.constraints = constraints or DrawConstraints()
+        self.method = method
+        self.max_steps = max_steps
+        self.capacity = capacity
+        self.workers = workers
+        self.seed = seed
+
+        self.pool: deque = deque()
+        self.served = 0
+        self.hits = 0
+        self.misses = 0
+        self.refilled = 0
+        self.failed = 0
+        self.solve_seconds = 0.0
+        self.solved = 0
+        self._refill_times: deque = deque()
+        self._started = time.monotonic()
+        self.error: Optional[InfeasibleDraw] = None
+
+        self._executors = []
+        self._tasks = []
+        self._consumed: Optional[asyncio.Event] = None
+        self._arrived: Optional[asyncio.Event] = None
+
+    async def start(self):
+        """Start the workers and begin filling the pool"""
+
+        seeds = worker_seeds(self.seed, self.workers) if self.seed is not None else [None] * self.workers
+        self._consumed = asyncio.Event()
+        self._arrived = asyncio.Event()
+        self._started = time.monotonic()
+        for seed in seeds:
+            executor = ProcessPoolExecutor(
+                max_workers=1, initializer=_init_worker,
+                initargs=(self.teams, self.constraints, self.method, self.max_steps, seed),
+            )
+            self._executors.append(executor)
+            self._tasks.append(asyncio.create_task(self._refill(executor)))
+
+    async def stop(self):
+        """Stop the workers"""
+
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        for executor in self._executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+        self._tasks = []
+        self._executors = []
+
+    async def _refill(self, executor: ProcessPoolExecutor):
+        loop = asyncio.get_running_loop()
+        while True:
+            while len(self.pool) >= self.capacity:
+                self._consumed.clear()
+                await self._consumed.wait()
+
+            try:
+                pooled = await loop.run_in_executor(executor, _solve_in_worker)
+            except InfeasibleDraw as error:
+                self.error = error
+                self._arrived.set()
+                return
+            self.pool.append(pooled)
+            self.refilled += 1
+            self.solved += 1
+            self.failed += pooled.failed
+            self.solve_seconds += pooled.solve_seconds
+            self._refill_times.append(time.monotonic())
+            self._arrived.set()
+
+    async def get_draw(self) -> PooledDraw:
+        """Take a draw from the pool, waiting for the workers if it is empty"""
+
+        if self._arrived is None:
+            raise RuntimeError("The draw service has not been started")
+
+        self.served += 1
+        if self.pool:
+            self.hits += 1
+        else:
+            self.misses += 1
+            while not self.pool:
+                if self.error is not None:
+                    raise self.error
+                self._arrived.clear()
+                await self._arrived.wait()
+
+        pooled = self.pool.popleft()
+        self._consumed.set()
+        return pooled
+
+    def refill_rate(self) -> float:
+        """Draws added to the pool per second over the last RATE_WINDOW seconds"""
+
+        now = time.monotonic()
+        times = self._refill_times
+        while times and now - times[0] > RATE_WINDOW:
+            times.popleft()
+        elapsed = min(RATE_WINDOW, now - self._started)
+        return len(times) / elapsed if elapsed > 0 else 0.0
+
+    def metrics(self) -> Dict:
+        """Pool and worker counters as a JSON-serializable dict"""
+
+        return {
+            'method': self.method,
+            'workers': self.workers,
+            'pool_depth': len(self.pool),
+            'pool_capacity': self.capacity,
+            'served': self.served,
+            'pool_hits': self.hits,
+            'pool_misses': self.misses,
+            'refilled': self.refilled,
+            'refill_rate': self.refill_rate(),
+            'failed_solves': self.failed,
+            'solve_ms_mean': self.solve_seconds / self.solved * 1000 if self.solved else 0.0,
+            'uptime_seconds': time.monotonic() - self._started,
+        }
+
+    def teams_document(self) -> Dict:
+        """The team table and record layout binary draws are decoded with"""
+
+        matches_per_team = self.constraints.matches_per_team
+        width, home_bytes, record_size = record_layout(len(self.teams), matches_per_team)
+        return {
+            'teams': [[team.name, team.country, team.pot] for team in self.teams],
+            'constraints': self.constraints.to_dict(),
+            'matches_per_team': matches_per_team,
+            'opponent_width': width,
+            'home_bytes': home_bytes,
+            'record_size': record_size,
+        }
+
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           503: "Service Unavailable"}
+
+# A streamed body is sent chunk by chunk without a Content-Length, and
+# the connection is closed after it
+Response = Tuple[int, str, Union[bytes, AsyncIterator[bytes]]]
+
+
+class DrawServer:
+    """
+    Minimal HTTP/1.1 front end for a DrawService
+
+        GET /draw             a draw as JSON
+        GET /draw?format=binary, or Accept: application/octet-stream,
+                              the draw as one pool record
+        GET /teams            team table and record layout
+        GET /metrics          pool depth, hit/miss and refill rate counters
+        GET /health           liveness check
+        GET /ceremony?seed=N&lookahead=0|1
+                              a live sequential draw as server-sent
+                              events, team_selected and team_drawn
+                              events for every team
+
+    Connections are kept alive between requests unless the client asks
+    to close them, or the response is a stream. Request bodies are not
+    supported. Every response allows cross-origin reads, so a page opened
+    from disk (web/draw_visualizer.html) can use the endpoints.
+    /draw answers 503 when the teams and constraints admit no draw.
+    """
+
+    def __init__(self, service: DrawService, host: str = "127.0.0.1", port: int = 8000,
+                 idle_timeout: float = 15.0):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        """Start the service and listen; port 0 picks a free port"""
+
+        await self.service.start()
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.service.stop()
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3:
+                    status, content_type, body = self._error(400, "Malformed request line")
+                    keep_alive = False
+                else:
+                    method, target, version = parts
+                    status, content_type, body = await self.route(method, target, headers)
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = connection != 'close' and (version == "HTTP/1.1" or connection == 'keep-alive')
+
+                if not isinstance(body, bytes):
+                    writer.write(
+                        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                        f"Content-Type: {content_type}\r\n"
+                        f"Cache-Control: no-cache\r\n"
+                        f"Access-Control-Allow-Origin: *\r\n"
+                        f"Connection: close\r\n"
+                        f"\r\n".encode("latin-1")
+                    )
+                    await writer.drain()
+                    async for chunk in body:
+                        writer.write(chunk)
+                        await writer.drain()
+                    break
+
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Access-Control-Allow-Origin: *\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    f"\r\n".encode("latin-1") + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    def _json(document, status: int = 200) -> Response:
+        return status, "application/json", json.dumps(document).encode("utf-8")
+
+    def _error(self, status: int, message: str) -> Response:
+        return self._json({'error': message}, status)
+
+    async def route(self, method: str, target: str, headers: Dict[str, str]) -> Response:
+        """Answer one request with (status, content type, body)"""
+
+        url = urlsplit(target)
+        if url.path not in ("/draw", "/teams", "/metrics", "/health", "/ceremony"):
+            return self._error(404, f"No such endpoint: {url.path}")
+        if method != "GET":
+            return self._error(405, "Only GET is supported")
+
+        if url.path == "/draw":
+            query = parse_qs(url.query)
+            response_format = query.get('format', [None])[0]
+            if response_format is None:
+                binary = "application/octet-stream" in headers.get('accept', '')
+            elif response_format in ("json", "binary"):
+                binary = response_format == "binary"
+            else:
+                return self._error(400, f"Unknown format: {response_format}")
+
+            try:
+                pooled = await self.service.get_draw()
+            except InfeasibleDraw as error:
+                return self._error(503, str(error))
+            if binary:
+                return 200, "application/octet-stream", pooled.record
+            return 200, "application/json", pooled.json
+
+        if url.path == "/ceremony":
+            query = parse_qs(url.query)
+            try:
+                seed = query.get('seed', [None])[0]
+                seed = int(seed) if seed is not None else None
+                lookahead = query.get('lookahead', ['1'])[0] not in ("0", "false")
+            except ValueError:
+                return self._error(400, "seed must be an integer")
+            return 200, "text/event-stream", self._ceremony(seed, lookahead)
+
+        if url.path == "/teams":
+            return self._json(self.service.teams_document())
+        if url.path == "/metrics":
+            return self._json(self.service.metrics())
+        return self._json({'status': 'ok'})
+
+    async def _ceremony(self, seed: Optional[int], lookahead: bool) -> AsyncIterator[bytes]:
+        draw = SequentialChampionsLeagueDraw(self.service.teams, self.service.constraints,
+                                             lookahead=lookahead, rng=random.Random(seed))
+        async for event in stream_ceremony(draw):
+            yield sse_message(event)
+
+
+def main(argv=None):
+    """Run the draw service until interrupted"""
+
+    parser = argparse.ArgumentParser(prog="python -m src.server", description="Draw service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--format", choices=sorted(FORMATS), default="ucl",
+                        help="competition whose teams and constraints are drawn")
+    parser.add_argument("--method", choices=METHODS, default="pot_pairs")
+    parser.add_argument("--capacity", type=int, default=32, help="draws kept in the pool")
+    parser.add_argument("--workers", type=int, default=1, help="processes refilling the pool")
+    parser.add_argument("--seed", type=int, help="seed the draws, for reproducible runs")
+    args = parser.parse_args(argv)
+
+    service = DrawService(TEAMS[args.format](), FORMATS[args.format], args.method, args.capacity,
+                          args.workers, seed=args.seed)
+    server = DrawServer(service, args.host, args.port)
+    print(f"Serving {args.format} draws on http://{args.host}:{args.port} (pool of {args.capacity})")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,20 @@
 Module for generating detailed statistics about the draw
 """
 
+from array import array
 from collections import Counter, defaultdict
-from typing import Dict, List
+from typing import Dict, Iterable, List, Sequence
 from .champions_league_draw import ChampionsLeagueDraw, create_sample_teams, Team
+from .events import ConsoleObserver
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; aggregates are kept in stdlib arrays
+    np = None
+
+
+# Countries whose leagues count as the "big four"
+BIG_FOUR = ("ENG", "ESP", "GER", "ITA")
 
 
 class DrawStatistics:
@@ -41,9 +52,10 @@ class DrawStatistics:
         """Check home/away balance for each team"""
         balance = {}
         
+        home_away = self.draw.home_away_count
         for team in self.teams:
-            home = sum(1 for _, is_home in self.draw.fixtures[team] if is_home)
-            away = sum(1 for _, is_home in self.draw.fixtures[team] if not is_home)
+            home = home_away[team]['home']
+            away = home_away[team]['away']
             balance[team.name] = {'home': home, 'away': away, 'difference': abs(home - away)}
         
         return balance
@@ -60,12 +72,14 @@ class DrawStatistics:
         print("-" * 80)
         print(f"Total teams: {len(self.teams)}")
         print(f"Total matches: {sum(len(fixtures) for fixtures in self.draw.fixtures.values()) // 2}")
-        print(f"Matches per team: 8 (4 home, 4 away)")
+        constraints = self.draw.constraints
+        print(f"Matches per team: {constraints.matches_per_team} "
+              f"({constraints.home_matches} home, {constraints.away_matches} away)")
         
         # Distribution by pot
         print("\nDISTRIBUTION BY POT")
         print("-" * 80)
-        for pot in [1, 2, 3, 4]:
+        for pot in self.draw.state.pots:
             teams_in_pot = [t for t in self.teams if t.pot == pot]
             countries = Counter(t.country for t in teams_in_pot)
             print(f"Pot {pot}: {len(teams_in_pot)} teams")
@@ -85,11 +99,13 @@ class DrawStatistics:
         print("-" * 80)
         countries_stats = defaultdict(lambda: {'teams': 0, 'matches': 0, 'home': 0, 'away': 0})
         
+        home_away = self.draw.home_away_count
         for team in self.teams:
+            counts = home_away[team]
             countries_stats[team.country]['teams'] += 1
-            countries_stats[team.country]['matches'] += len(self.draw.fixtures[team])
-            countries_stats[team.country]['home'] += sum(1 for _, is_home in self.draw.fixtures[team] if is_home)
-            countries_stats[team.country]['away'] += sum(1 for _, is_home in self.draw.fixtures[team] if not is_home)
+            countries_stats[team.country]['matches'] += counts['home'] + counts['away']
+            countries_stats[team.country]['home'] += counts['home']
+            countries_stats[team.country]['away'] += counts['away']
         
         for country in sorted(countries_stats.keys()):
             stats = countries_stats[country]
@@ -114,32 +130,226 @@ class DrawStatistics:
         print("\nCONSTRAINT VERIFICATION")
         print("-" * 80)
         
-        all_valid = True
+        errors = self.draw.state.constraint_errors()
+        for error in errors:
+            print(f"ERROR: {error}")
         
-        for team in self.teams:
-            if len(self.draw.fixtures[team]) != 8:
-                print(f"ERROR: {team.name}: {len(self.draw.fixtures[team])} matches (should be 8)")
-                all_valid = False
+        if not errors:
+            print("All constraints satisfied!")
+            print(f"- {constraints.matches_per_team} matches per team")
+            print(f"- {constraints.home_matches} home matches, {constraints.away_matches} away matches")
+            print(f"- {constraints.matches_per_pot} opponents from each pot")
+            if not constraints.same_country_allowed:
+                print("- No teams from same country play each other")
+
+
+class AggregateStatistics:
+    """
+    Online statistics over many draws
+    
+    Draws are folded into fixed-size counters one at a time (add) or a
+    whole pool file at once (add_pool), so a single pass over any number
+    of draws needs constant memory. Besides the country, pot and home/away
+    totals, the number of opponents each team draws from tracked_countries
+    is summarised by its running mean and variance (Welford's algorithm).
+    """
+    
+    def __init__(self, teams: Sequence[Team], tracked_countries: Iterable[str] = BIG_FOUR):
+        self.teams = list(teams)
+        self.index = {team: i for i, team in enumerate(self.teams)}
+        self.countries = sorted({team.country for team in self.teams})
+        self.pots = sorted({team.pot for team in self.teams})
+        self.tracked_countries = tuple(tracked_countries)
         
-        for team in self.teams:
-            for pot in [1, 2, 3, 4]:
-                count = self.draw.opponents_by_pot[team][pot]
-                if count != 2:
-                    print(f"ERROR: {team.name}: {count} opponents from pot {pot} (should be 2)")
-                    all_valid = False
+        country_index = {country: c for c, country in enumerate(self.countries)}
+        pot_index = {pot: p for p, pot in enumerate(self.pots)}
+        self.team_country = array('H', (country_index[team.country] for team in self.teams))
+        self.team_pot = array('B', (pot_index[team.pot] for team in self.teams))
+        self.tracked = array('B', (team.country in self.tracked_countries for team in self.teams))
         
-        for team in self.teams:
-            for opponent, _ in self.draw.fixtures[team]:
-                if opponent.country == team.country:
-                    print(f"ERROR: {team.name} plays {opponent.name} (same country)")
-                    all_valid = False
+        n = len(self.teams)
+        self.draws = 0
+        self.country_counts = array('L', [0]) * len(self.countries) ** 2
+        self.pot_counts = array('L', [0]) * len(self.pots) ** 2
+        self.home_counts = array('L', [0]) * n
+        self.away_counts = array('L', [0]) * n
+        self.tracked_mean = array('d', [0.0]) * n
+        self.tracked_m2 = array('d', [0.0]) * n
+    
+    def add(self, draw):
+        """Add one complete draw (ChampionsLeagueDraw, DrawState or DrawSampler)"""
         
-        if all_valid:
-            print("All constraints satisfied!")
-            print("- 8 matches per team")
-            print("- 4 home matches, 4 away matches")
-            print("- 2 opponents from each pot")
-            print("- No teams from same country play each other")
+        state = getattr(draw, "state", draw)
+        self.add_slots(state.opponents, state.home, state.matches_per_team)
+    
+    def add_slots(self, opponents: Sequence[int], home: Sequence[bool], matches_per_team: int):
+        """Add one draw given as a slot table: opponent and is_home per slot"""
+        
+        num_countries = len(self.countries)
+        num_pots = len(self.pots)
+        team_country = self.team_country
+        team_pot = self.team_pot
+        tracked = self.tracked
+        
+        self.draws += 1
+        draws = self.draws
+        for team in range(len(self.teams)):
+            start = team * matches_per_team
+            own_country = team_country[team] * num_countries
+            own_pot = team_pot[team] * num_pots
+            tracked_opponents = 0
+            
+            for slot in range(start, start + matches_per_team):
+                opponent = opponents[slot]
+                self.country_counts[own_country + team_country[opponent]] += 1
+                self.pot_counts[own_pot + team_pot[opponent]] += 1
+                tracked_opponents += tracked[opponent]
+                if home[slot]:
+                    self.home_counts[team] += 1
+                else:
+                    self.away_counts[team] += 1
+            
+            # Welford update of the running mean and squared deviations
+            delta = tracked_opponents - self.tracked_mean[team]
+            self.tracked_mean[team] += delta / draws
+            self.tracked_m2[team] += delta * (tracked_opponents - self.tracked_mean[team])
+    
+    def add_pool(self, pool, chunk_size: int = 65536):
+        """
+        Add every draw of a DrawPool. With NumPy the records are processed
+        in vectorised chunks straight from the memory map; otherwise they
+        are decoded one at a time.
+        """
+        
+        if [t.name for t in pool.teams] != [t.name for t in self.teams]:
+            raise ValueError("Pool teams do not match")
+        
+        if np is None:
+            for k in range(len(pool)):
+                opponents, home = pool.decode(k)
+                self.add_slots(opponents, home, pool.matches_per_team)
+            return
+        
+        records = pool.as_numpy()
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start:start + chunk_size]
+            self._add_chunk(chunk['opponents'].astype(np.intp), pool.unpack_home(chunk))
+        del records
+    
+    def _add_chunk(self, opponents, home):
+        """Vectorised add of opponents and home arrays shaped (draws, teams, matches)"""
+        
+        num_countries = len(self.countries)
+        num_pots = len(self.pots)
+        team_country = np.frombuffer(self.team_country, dtype=np.uint16).astype(np.intp)
+        team_pot = np.frombuffer(self.team_pot, dtype=np.uint8).astype(np.intp)
+        tracked = np.frombuffer(self.tracked, dtype=np.uint8)
+        
+        cells = team_country[None, :, None] * num_countries + team_country[opponents]
+        view = np.frombuffer(self.country_counts, dtype=f"u{self.country_counts.itemsize}")
+        view += np.bincount(cells.ravel(), minlength=num_countries ** 2).astype(view.dtype)
+        
+        cells = team_pot[None, :, None] * num_pots + team_pot[opponents]
+        view = np.frombuffer(self.pot_counts, dtype=f"u{self.pot_counts.itemsize}")
+        view += np.bincount(cells.ravel(), minlength=num_pots ** 2).astype(view.dtype)
+        
+        home_total = home.sum(axis=(0, 2))
+        np.frombuffer(self.home_counts, dtype=f"u{self.home_counts.itemsize}")[:] += home_total.astype(np.uint64)
+        away_total = (~home).sum(axis=(0, 2))
+        np.frombuffer(self.away_counts, dtype=f"u{self.away_counts.itemsize}")[:] += away_total.astype(np.uint64)
+        
+        # Merge the chunk's moments into the running ones (Chan et al.)
+        values = tracked[opponents].sum(axis=2).astype(np.float64)
+        batch = values.shape[0]
+        batch_mean = values.mean(axis=0)
+        batch_m2 = ((values - batch_mean) ** 2).sum(axis=0)
+        
+        mean = np.frombuffer(self.tracked_mean, dtype=np.float64)
+        m2 = np.frombuffer(self.tracked_m2, dtype=np.float64)
+        total = self.draws + batch
+        delta = batch_mean - mean
+        m2 += batch_m2 + delta ** 2 * self.draws * batch / total
+        mean += delta * batch / total
+        self.draws = total
+    
+    def country_matchups(self) -> Dict[str, Dict[str, int]]:
+        """
+        DrawStatistics.country_matchups() summed over all draws
+        (each match is counted once from each side)
+        """
+        
+        return self._pair_totals(self.country_counts, self.countries, same=False)
+    
+    def pot_matchups(self) -> Dict[int, Dict[int, int]]:
+        """DrawStatistics.pot_matchups() summed over all draws"""
+        
+        return self._pair_totals(self.pot_counts, self.pots, same=True)
+    
+    @staticmethod
+    def _pair_totals(counts: array, keys: List, same: bool) -> Dict:
+        size = len(keys)
+        totals = defaultdict(dict)
+        for a in range(size):
+            for b in range(a if same else a + 1, size):
+                count = counts[a * size + b]
+                if a != b:
+                    count += counts[b * size + a]
+                if count:
+                    totals[keys[a]][keys[b]] = count
+        return dict(totals)
+    
+    def tracked_variance(self, team: Team) -> float:
+        """Sample variance of the number of tracked-country opponents of a team"""
+        
+        if self.draws < 2:
+            return 0.0
+        return self.tracked_m2[self.index[team]] / (self.draws - 1)
+    
+    def team_summary(self) -> List[Dict]:
+        """Per-team averages over all draws"""
+        
+        draws = self.draws or 1
+        return [
+            {
+                'name': team.name,
+                'country': team.country,
+                'pot': team.pot,
+                'home': self.home_counts[i] / draws,
+                'away': self.away_counts[i] / draws,
+                'tracked_mean': self.tracked_mean[i],
+                'tracked_variance': self.tracked_variance(team),
+            }
+            for i, team in enumerate(self.teams)
+        ]
+    
+    def as_numpy(self) -> Dict[str, "np.ndarray"]:
+        """
+        Structured results: 'teams' is a record array of team_summary(),
+        'countries' and 'pots' the match count matrices
+        """
+        
+        if np is None:
+            raise RuntimeError("NumPy is not installed")
+        
+        # Text fields as wide as the longest name, so none is cut short
+        rows = self.team_summary()
+        name_width = max((len(row['name']) for row in rows), default=1)
+        country_width = max((len(row['country']) for row in rows), default=1)
+        dtype = np.dtype([
+            ('name', f'U{name_width}'), ('country', f'U{country_width}'), ('pot', 'u1'),
+            ('home', 'f8'), ('away', 'f8'),
+            ('tracked_mean', 'f8'), ('tracked_variance', 'f8'),
+        ])
+        teams = np.array([tuple(row.values()) for row in rows], dtype=dtype)
+        
+        def matrix(counts, size):
+            return np.frombuffer(counts, dtype=f"u{counts.itemsize}").reshape(size, size).copy()
+        
+        return {
+            'teams': teams,
+            'countries': matrix(self.country_counts, len(self.countries)),
+            'pots': matrix(self.pot_counts, len(self.pots)),
+        }
 
 
 def main():
@@ -152,8 +362,9 @@ def main():
     print("\nGenerating draw...")
     teams = create_sample_teams()
     draw = ChampionsLeagueDraw(teams)
+    draw.add_observer(ConsoleObserver())
     
-    if draw.perform_draw(max_attempts=25000):
+    if draw.perform_draw(method="backtrack"):
         print("\nAnalyzing statistics...")
         stats = DrawStatistics(draw)
         stats.display_statistics()
@@ -0,0 +1,111 @@
+"""
+Synthetic leagues
+Generates teams of any size, pot count and country mix for stress tests and scaling benchmarks
+"""
+
+import random
+from collections import Counter
+from typing import List, Optional, Sequence, Tuple
+
+from .champions_league_draw import Team
+from .constraints import MAX_OPPONENTS_PER_COUNTRY, DrawConstraints
+
+
+def country_sizes(num_teams: int, num_countries: int, concentration: float) -> List[int]:
+    """
+    Split num_teams over num_countries, largest country first.
+
+    Country k gets a share proportional to 1 / (k + 1) ** concentration:
+    0 spreads the teams evenly, 1 gives a Zipf-like mix close to the real
+    competitions, and higher values pile the teams into the first few
+    countries. Shares are rounded by largest remainder and every country
+    gets at least one team.
+    """
+
+    if num_countries < 1 or num_countries > num_teams:
+        raise ValueError("num_countries must be between 1 and num_teams")
+    if concentration < 0:
+        raise ValueError("concentration must not be negative")
+
+    weights = [1 / (k + 1) ** concentration for k in range(num_countries)]
+    spare = num_teams - num_countries
+    total = sum(weights)
+    exact = [spare * w / total for w in weights]
+    sizes = [1 + int(x) for x in exact]
+
+    by_remainder = sorted(range(num_countries), key=lambda k: (int(exact[k]) - exact[k], k))
+    for k in by_remainder[:num_teams - sum(sizes)]:
+        sizes[k] += 1
+    return sizes
+
+
+def generate_league(num_teams: int = 36, num_pots: int = 4, matches_per_team: int = 8,
+                    num_countries: Optional[int] = None, concentration: float = 1.0,
+                    max_per_country: int = MAX_OPPONENTS_PER_COUNTRY,
+                    rng: Optional[random.Random] = None) -> Tuple[List[Team], DrawConstraints]:
+    """
+    Generate a league and the constraints to draw it with.
+
+    Teams are split into num_pots equal pots and play matches_per_team
+    matches, the same number from every pot and half of them at home.
+    num_countries defaults to four for every nine teams, as in the 36-team
+    competitions. Each country's teams are dealt round the pots, so no pot
+    gets more than its share of one country; rng decides which pots get
+    the remainders.
+
+    The shape is checked, but not whether a draw exists: with a high
+    concentration or a small country cap the biggest countries can run out
+    of opponents, which is the point of a stress test.
+    """
+
+    rng = rng if rng is not None else random
+    if num_pots < 1 or num_pots > 255:
+        raise ValueError("num_pots must be between 1 and 255")
+    if num_teams % num_pots:
+        raise ValueError(f"{num_teams} teams cannot be split into {num_pots} equal pots")
+    if matches_per_team % num_pots or matches_per_team % 2:
+        raise ValueError("matches_per_team must be even and a multiple of num_pots")
+
+    pot_size = num_teams // num_pots
+    matches_per_pot = matches_per_team // num_pots
+    if matches_per_pot >= pot_size:
+        raise ValueError(f"Pots of {pot_size} teams cannot provide {matches_per_pot} opponents each")
+    if matches_per_pot % 2 and pot_size % 2:
+        raise ValueError("An odd number of opponents per pot needs pots of even size")
+
+    if num_countries is None:
+        num_countries = max(2, num_teams * 4 // 9)
+    sizes = country_sizes(num_teams, num_countries, concentration)
+
+    # Deal each country's teams to consecutive pots, so its teams are
+    # spread as evenly as the pots allow
+    countries = list(range(num_countries))
+    rng.shuffle(countries)
+    teams = []
+    position = 0
+    for c in countries:
+        country = f"C{c + 1:03d}"
+        for k in range(sizes[c]):
+            teams.append(Team(f"{country} Club {k + 1}", country, position % num_pots + 1))
+            position += 1
+
+    teams.sort(key=lambda team: (team.pot, team.name))
+    constraints = DrawConstraints(
+        matches_per_pot=matches_per_pot,
+        home_matches=matches_per_team // 2,
+        away_matches=matches_per_team // 2,
+        max_per_country=max_per_country,
+        competition=f"Synthetic league ({num_teams} teams)",
+    )
+    return teams, constraints
+
+
+def concentration_index(teams: Sequence) -> float:
+    """
+    Herfindahl index of the country mix: the sum of squared country shares,
+    from 1 / countries (all equal) up to 1 (a single country)
+    """
+
+    counts = Counter(team.country for team in teams)
+    total = len(teams)
+    return sum((count / total) ** 2 for count in counts.values())
@@ -0,0 +1,269 @@
+"""
+Bulk constraint validation
+Checks whole batches of stored draws with array operations
+"""
+
+from enum import IntFlag
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .constraints import compile_format
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; draws are then checked one at a time
+    np = None
+
+
+class Violation(IntFlag):
+    """Per-draw violation codes, combined as bit flags"""
+    NONE = 0
+    DEGREE = 1            # a team does not have matches_per_team opponents
+    HOME_AWAY = 2         # a team has the wrong number of home or away matches
+    POT_QUOTA = 4         # a team has the wrong number of opponents from a pot
+    SAME_COUNTRY = 8      # two teams that may never meet (same country, forbidden or protected pair) meet
+    COUNTRY_CAP = 16      # a team meets too many teams from one country
+    ASYMMETRIC = 32       # a fixture is missing, repeated or has the same venue on both sides
+
+
+# Bytes of the largest per-draw arrays (the teams x teams venue matrix and
+# an index per slot) validate_pool() lets one chunk take; NumPy makes a few
+# temporaries of each, so peak memory is a small multiple of this
+CHUNK_BYTES = 32 * 1024 * 1024
+
+# Result fields: offending teams for degree, home_away, pot_quota and
+# country_cap; offending slots for same_country (each fixture is listed by
+# both teams); broken or repeated team pairs for asymmetric
+FIELDS = [
+    ('degree', Violation.DEGREE),
+    ('home_away', Violation.HOME_AWAY),
+    ('pot_quota', Violation.POT_QUOTA),
+    ('same_country', Violation.SAME_COUNTRY),
+    ('country_cap', Violation.COUNTRY_CAP),
+    ('asymmetric', Violation.ASYMMETRIC),
+]
+
+
+class DrawValidator:
+    """
+    Validates draws stored as slot tables
+
+    A draw is given as opponents and home arrays of shape
+    (teams, matches_per_team), as in DrawState and the pool records; slots
+    holding an id outside the team range count as empty. validate_batch()
+    checks a (draws, teams, matches_per_team) batch with NumPy and returns
+    one record per draw: the combined Violation code and, per check, how
+    many teams or fixtures break it. Nothing is printed.
+    """
+
+    def __init__(self, teams, constraints):
+        self.teams = list(teams)
+        self.constraints = constraints
+        self.num_teams = len(self.teams)
+        self.matches_per_team = constraints.home_matches + constraints.away_matches
+
+        compiled = compile_format(self.teams, constraints)
+        self.num_pots = compiled.num_pots
+        self.num_countries = compiled.num_countries
+        self.team_pot = compiled.team_pot
+        self.team_country = compiled.team_country
+        self.excluded = compiled.excluded
+        self.country_cap = compiled.country_cap
+
+        # Pairs that may never meet, as a (teams, teams) lookup table
+        self._excluded_matrix = None
+        if np is not None:
+            self._excluded_matrix = np.array(
+                [[mask >> j & 1 for j in range(self.num_teams)] for mask in self.excluded], dtype=bool)
+
+    def dtype(self) -> "np.dtype":
+        """Structured dtype of validate_batch() results"""
+
+        return np.dtype([('code', 'u1')] + [(name, 'u2') for name, _ in FIELDS])
+
+    def validate_batch(self, opponents, home) -> "np.ndarray":
+        """Validate a batch of draws with array operations"""
+
+        if np is None:
+            raise RuntimeError("NumPy is not installed")
+
+        n = self.num_teams
+        m = self.matches_per_team
+        constraints = self.constraints
+        opponents = np.asarray(opponents).astype(np.intp).reshape(-1, n, m)
+        home = np.asarray(home).astype(bool).reshape(-1, n, m)
+        batch = opponents.shape[0]
+
+        filled = (opponents >= 0) & (opponents < n)
+        complete = bool(filled.all())
+        safe = opponents if complete else np.where(filled, opponents, 0)
+        result = np.zeros(batch, dtype=self.dtype())
+
+        degree = np.count_nonzero(filled, axis=2)
+        result['degree'] = np.count_nonzero(degree != m, axis=1)
+
+        home_count = np.count_nonzero(home & filled, axis=2)
+        away_count = degree - home_count
+        result['home_away'] = np.count_nonzero((home_count != constraints.home_matches) |
+                                               (away_count != constraints.away_matches), axis=1)
+
+        # Each team has only matches_per_team slots, so sorting them is
+        # cheaper than counting per pot or country. Empty slots get codes
+        # that match no pot and no other slot.
+        empty_code = np.arange(m, dtype=np.int16)
+        team_pot = np.asarray(self.team_pot, dtype=np.int16)
+        opponent_pot = team_pot[safe]
+        if not complete:
+            opponent_pot = np.where(filled, opponent_pot, self.num_pots + empty_code)
+        expected = np.repeat(np.arange(self.num_pots, dtype=np.int16), constraints.matches_per_pot)
+        if expected.size == m:
+            wrong_pot = (np.sort(opponent_pot, axis=2) != expected).any(axis=2)
+        else:
+            wrong_pot = np.ones((batch, n), dtype=bool)
+        result['pot_quota'] = np.count_nonzero(wrong_pot, axis=1)
+
+        team_country = np.asarray(self.team_country, dtype=np.int16)
+        opponent_country = team_country[safe]
+        same = self._excluded_matrix[np.arange(n)[None, :, None], safe]
+        if not complete:
+            same &= filled
+            opponent_country = np.where(filled, opponent_country, self.num_countries + empty_code)
+        result['same_country'] = np.count_nonzero(same.reshape(batch, -1), axis=1)
+
+        cap = self.country_cap
+        if cap > 0:
+            countries = np.sort(opponent_country, axis=2)
+            over_cap = (countries[..., cap:] == countries[..., :-cap]).any(axis=2)
+        else:
+            over_cap = degree > 0
+        result['country_cap'] = np.count_nonzero(over_cap, axis=1)
+
+        rows = np.broadcast_to(np.arange(batch * n).reshape(batch, n, 1), safe.shape)
+        if complete:
+            rows = rows.ravel()
+            opponent_ids = safe.ravel()
+            home_slots = home.ravel()
+        else:
+            rows = rows[filled]
+            opponent_ids = safe[filled]
+            home_slots = home[filled]
+
+        # Venue matrix: 1 if i hosts j, 2 if i visits j. A pair of teams is
+        # consistent when its two cells sum to 3 (one hosts, one visits) or
+        # 0 (they do not meet), and no team lists an opponent twice.
+        venue = np.zeros(batch * n * n, dtype=np.int8)
+        venue[rows * n + opponent_ids] = 2 - home_slots
+        venue = venue.reshape(batch, n, n)
+        pair = venue + venue.transpose(0, 2, 1)
+        broken = (pair != 0) & (pair != 3)
+        mismatched = np.count_nonzero(broken.reshape(batch, -1), axis=1) // 2
+        repeated = degree.sum(axis=1) - np.count_nonzero(venue.reshape(batch, -1), axis=1)
+        result['asymmetric'] = mismatched + repeated
+
+        code = np.zeros(batch, dtype=np.uint8)
+        for name, flag in FIELDS:
+            code |= np.where(result[name] > 0, int(flag), 0).astype(np.uint8)
+        result['code'] = code
+        return result
+
+    def validate_slots(self, opponents: Sequence[int], home: Sequence[bool]) -> Dict[str, int]:
+        """
+        Validate one draw without NumPy. Returns the same fields as a
+        validate_batch() record, as a dict.
+        """
+
+        n = self.num_teams
+        m = self.matches_per_team
+        constraints = self.constraints
+        counts = {name: 0 for name, _ in FIELDS}
+        venue = {}
+
+        for team in range(n):
+            slots = [(opponents[s], bool(home[s])) for s in range(team * m, team * m + m)
+                     if 0 <= opponents[s] < n]
+            home_count = sum(1 for _, is_home in slots if is_home)
+
+            if len(slots) != m:
+                counts['degree'] += 1
+            if home_count != constraints.home_matches or len(slots) - home_count != constraints.away_matches:
+                counts['home_away'] += 1
+
+            pots = [0] * self.num_pots
+            countries = [0] * self.num_countries
+            for opponent, is_home in slots:
+                pots[self.team_pot[opponent]] += 1
+                countries[self.team_country[opponent]] += 1
+                if self.excluded[team] >> opponent & 1:
+                    counts['same_country'] += 1
+                if (team, opponent) in venue:
+                    counts['asymmetric'] += 1
+                venue[team, opponent] = is_home
+
+            if any(count != constraints.matches_per_pot for count in pots):
+                counts['pot_quota'] += 1
+            if any(count > self.country_cap for count in countries):
+                counts['country_cap'] += 1
+
+        for (team, opponent), is_home in venue.items():
+            if team < opponent and venue.get((opponent, team)) != (not is_home):
+                counts['asymmetric'] += 1
+            elif team > opponent and (opponent, team) not in venue:
+                counts['asymmetric'] += 1
+
+        counts['code'] = int(violation_code(counts))
+        return counts
+
+    def validate_states(self, states: Iterable) -> "np.ndarray":
+        """Validate DrawState-like objects (anything with a slot table) in one batch"""
+
+        states = list(states)
+        opponents = np.array([list(s.opponents) for s in states], dtype=np.intp)
+        home = np.array([list(s.home) for s in states], dtype=bool)
+        return self.validate_batch(opponents, home)
+
+    def default_chunk_size(self) -> int:
+        """
+        Draws whose venue matrices and slot indices fit in CHUNK_BYTES, so
+        validate_pool() memory stays flat as leagues grow
+        """
+
+        n = self.num_teams
+        return max(1, CHUNK_BYTES // (n * (n + 8 * self.matches_per_team)))
+
+    def validate_pool(self, pool, chunk_size: Optional[int] = None):
+        """
+        Validate every draw of a DrawPool. With NumPy, returns a structured
+        array with one record per draw, computed chunk by chunk from the
+        memory map; otherwise a list of dicts from validate_slots().
+
+        chunk_size defaults to default_chunk_size().
+        """
+
+        if np is None:
+            return [self.validate_slots(*pool.decode(k)) for k in range(len(pool))]
+
+        if chunk_size is None:
+            chunk_size = self.default_chunk_size()
+
+        records = pool.as_numpy()
+        results = np.empty(len(records), dtype=self.dtype())
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start:start + chunk_size]
+            results[start:start + len(chunk)] = self.validate_batch(chunk['opponents'], pool.unpack_home(chunk))
+        del records
+        return results
+
+
+def violation_code(counts: Dict[str, int]) -> Violation:
+    """Combine per-check counts into a Violation code"""
+
+    code = Violation.NONE
+    for name, flag in FIELDS:
+        if counts[name]:
+            code |= flag
+    return code
+
+
+def describe(code: int) -> List[str]:
+    """Names of the checks set in a violation code"""
+
+    return [name for name, flag in FIELDS if code & flag]
@@ -0,0 +1,123 @@
+"""
+Unit tests for the benchmark suite
+"""
+
+import io
+import json
+import os
+import tempfile
+import unittest
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.__main__ import main
+from benchmarks.scaling import growth_exponent, run_scaling, search_budget
+from benchmarks.suite import ENGINES, compare, percentile, run_suite
+from src.constraints import DrawConstraints
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    """Tests for running and comparing benchmarks"""
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        values = [float(k) for k in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([3.0], 99), 3.0)
+
+    def test_default_engines(self):
+        """Test that both engine classes are covered by default"""
+        defaults = {name for name, engine in ENGINES.items() if engine.default}
+        self.assertIn("sequential", defaults)
+        self.assertIn("backtrack", defaults)
+        self.assertNotIn("restart", defaults)
+
+    def test_run_suite(self):
+        """Test the summary of a small run"""
+        results = run_suite(["pot_pairs"], draws=3, memory_draws=1)
+        summary = results['engines']['pot_pairs']
+
+        self.assertEqual(summary['draws'], 3)
+        self.assertEqual(summary['failures'], 0)
+        self.assertEqual(summary['attempts'], {'1': 3})
+        self.assertLessEqual(summary['p50_ms'], summary['p99_ms'])
+        self.assertGreater(summary['draws_per_second'], 0)
+        self.assertGreater(summary['peak_memory_kib'], 0)
+        self.assertEqual(set(results['host']), {'python', 'implementation', 'machine', 'platform', 'cpus'})
+        json.dumps(results)
+
+        with self.assertRaises(ValueError):
+            run_suite(["unknown"])
+
+    def test_compare(self):
+        """Test that only changes beyond the threshold are flagged"""
+        def run(rate, p50, failures=0):
+            return {'engines': {'pot_pairs': {
+                'draws_per_second': rate, 'p50_ms': p50, 'p99_ms': p50, 'attempts_mean': 1.0,
+                'dead_ends_mean': 0.0, 'peak_memory_kib': None, 'failures': failures,
+            }}}
+
+        baseline = run(100.0, 10.0)
+        self.assertEqual(compare(baseline, run(90.0, 11.0)), [])
+
+        regressions = compare(baseline, run(50.0, 20.0))
+        self.assertEqual({r.metric for r in regressions}, {'draws_per_second', 'p50_ms', 'p99_ms'})
+
+        regressions = compare(baseline, run(100.0, 10.0, failures=1))
+        self.assertEqual([r.metric for r in regressions], ['failures'])
+
+    def test_command_line(self):
+        """Test run --output followed by compare of the two files"""
+        handle, path = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+        try:
+            with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+                self.assertEqual(main(["run", "--engines", "two_phase", "--draws", "2",
+                                       "--memory-draws", "0", "--output", path]), 0)
+                self.assertEqual(main(["compare", path, path]), 0)
+            with open(path, encoding="utf-8") as f:
+                self.assertIn("two_phase", json.load(f)['engines'])
+        finally:
+            os.remove(path)
+
+
+class TestScaling(unittest.TestCase):
+    """Tests for the scaling benchmarks"""
+
+    def test_growth_exponent(self):
+        """Test the fitted power of growth"""
+        self.assertAlmostEqual(growth_exponent([(10, 1.0), (20, 4.0), (40, 16.0)]), 2.0)
+        self.assertIsNone(growth_exponent([(10, 1.0)]))
+
+    def test_search_budget(self):
+        """Test that the step limit never drops below the engines' default"""
+        constraints = DrawConstraints()
+        self.assertEqual(search_budget(36, constraints), 5000)
+        self.assertGreater(search_budget(1008, constraints), 5000)
+
+    def test_run_scaling(self):
+        """Test a small run and that larger sizes are skipped after a slow one"""
+        results = run_scaling(["pot_pairs"], sizes=[72, 36], draws=1, concentration=0.5)
+        self.assertEqual(results['league'], {'concentration': 0.5})
+        sizes = results['engines']['pot_pairs']['sizes']
+        self.assertEqual([size['teams'] for size in sizes], [36, 72])
+        self.assertEqual([size['failures'] for size in sizes], [0, 0])
+        self.assertIsNotNone(results['engines']['pot_pairs']['growth_exponent'])
+        json.dumps(results)
+
+        results = run_scaling(["two_phase"], sizes=[36, 72], draws=2, time_limit=0.0)
+        sizes = results['engines']['two_phase']['sizes']
+        self.assertEqual(sizes[0]['draws'], 1)
+        self.assertIn('skipped', sizes[1])
+
+        with self.assertRaises(ValueError):
+            run_scaling(["unknown"])
+
+
+if __name__ == '__main__':
+    unittest.main()
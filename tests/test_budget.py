@@ -0,0 +1,212 @@
+"""
+Unit tests for draw budgets, cancellation and anytime results
+"""
+
+import random
+import threading
+import time
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.budget import CANCELLED, TIMEOUT, Budget, CancellationToken
+from src.champions_league_draw import ChampionsLeagueDraw, DrawConstraints, create_sample_teams
+from src.champions_league_draw_sequential import SequentialChampionsLeagueDraw
+from src.champions_league_draw_sequential import create_sample_teams as create_sequential_teams
+from src.draw_state import DrawState
+from src.feasibility import FeasibilityOracle
+from src.search import complete_draw
+from src.synthetic import generate_league
+
+
+def assert_valid_partial(test, draw, result):
+    """The partial draw in result is the one left in draw, and breaks no limit"""
+    state = draw.state
+    test.assertEqual(len(result.partial), len(state.trail))
+    test.assertEqual(result.unplaced, state.num_teams * state.matches_per_team // 2 - len(state.trail))
+    constraints = state.constraints
+    for i in range(state.num_teams):
+        test.assertLessEqual(state.home_count[i], constraints.home_matches)
+        test.assertLessEqual(state.away_count[i], constraints.away_matches)
+        for p in range(state.num_pots):
+            test.assertLessEqual(state.pot_count[i * state.num_pots + p], constraints.matches_per_pot)
+
+
+class TestBudget(unittest.TestCase):
+    """Test deadlines and cancellation tokens"""
+
+    def test_unlimited(self):
+        """A budget without timeout or token never runs out"""
+        budget = Budget()
+        self.assertFalse(budget.exhausted())
+        self.assertIsNone(budget.stopped)
+
+    def test_timeout(self):
+        """A passed deadline stops the budget for good"""
+        budget = Budget(timeout=0)
+        self.assertTrue(budget.exhausted())
+        self.assertEqual(budget.stopped, TIMEOUT)
+        self.assertTrue(budget.exhausted())
+
+    def test_cancel(self):
+        """Cancelling the token stops the budget"""
+        token = CancellationToken()
+        budget = Budget(timeout=60, cancel=token)
+        self.assertFalse(budget.exhausted())
+        token.cancel()
+        self.assertTrue(token.cancelled)
+        self.assertTrue(budget.exhausted())
+        self.assertEqual(budget.stopped, CANCELLED)
+
+    def test_record_and_restore(self):
+        """The largest partial draw recorded is restored"""
+        teams = create_sample_teams()
+        state = DrawState(teams, DrawConstraints())
+        complete_draw(state, 5000, rng=random.Random(1))
+        matches = list(state.trail)
+
+        budget = Budget()
+        state.rollback(20)
+        budget.record(state)
+        state.rollback(10)
+        budget.record(state)
+        self.assertEqual(budget.restore(state), len(matches) - 20)
+        self.assertEqual(state.trail, matches[:20])
+
+    def test_fork(self):
+        """A forked budget runs out with its parent but keeps its own partial draw"""
+        token = CancellationToken()
+        budget = Budget(timeout=60, cancel=token)
+        fork = budget.fork()
+        self.assertEqual(fork.deadline, budget.deadline)
+
+        state = DrawState(create_sample_teams(), DrawConstraints())
+        complete_draw(state, 5000, rng=random.Random(1))
+        fork.record(state)
+        self.assertEqual(budget.best, [])
+
+        token.cancel()
+        self.assertTrue(fork.exhausted())
+        self.assertEqual(fork.stopped, CANCELLED)
+
+    def test_oracle_stops(self):
+        """The feasibility oracle gives up on an exhausted budget"""
+        state = DrawState(create_sample_teams(), DrawConstraints())
+        budget = Budget(timeout=0)
+        self.assertIsNone(FeasibilityOracle(rng=random.Random(1)).is_feasible(state, 10 ** 6, budget))
+        self.assertEqual(state.trail, [])
+        self.assertEqual(budget.best, [])
+
+    def test_search_stops(self):
+        """complete_draw gives up on an exhausted budget and rolls back"""
+        state = DrawState(create_sample_teams(), DrawConstraints())
+        self.assertIsNone(complete_draw(state, 5000, budget=Budget(timeout=0)))
+        self.assertEqual(state.trail, [])
+
+
+class TestPerformDraw(unittest.TestCase):
+    """Test budgets on ChampionsLeagueDraw.perform_draw"""
+
+    def test_no_budget_left(self):
+        """A zero timeout returns at once with nothing drawn"""
+        draw = ChampionsLeagueDraw(create_sample_teams())
+        result = draw.perform_draw(method="backtrack", timeout=0)
+        self.assertFalse(result)
+        self.assertEqual(result.stopped, TIMEOUT)
+        self.assertEqual(result.metrics.attempts, 0)
+        self.assertEqual(result.partial, ())
+        self.assertEqual(result.unplaced, 144)
+
+    def test_completed_draw(self):
+        """A draw completed within its budget is not marked stopped"""
+        draw = ChampionsLeagueDraw(create_sample_teams(), rng=random.Random(3))
+        result = draw.perform_draw(method="backtrack", timeout=60, cancel=CancellationToken())
+        self.assertTrue(result)
+        self.assertIsNone(result.stopped)
+        self.assertEqual(result.unplaced, 0)
+
+    def test_failed_draw_keeps_best_partial(self):
+        """Running out of attempts leaves the largest partial draw"""
+        for method in ("restart", "backtrack", "pot_pairs"):
+            with self.subTest(method=method):
+                draw = ChampionsLeagueDraw(create_sample_teams(), rng=random.Random(5))
+                result = draw.perform_draw(max_attempts=2, method=method, max_steps=40)
+                self.assertFalse(result)
+                self.assertIsNone(result.stopped)
+                self.assertTrue(result.partial)
+                assert_valid_partial(self, draw, result)
+
+    def test_timeout(self):
+        """A draw that cannot finish in time stops near its deadline"""
+        teams, constraints = generate_league(1008, rng=random.Random(2))
+        draw = ChampionsLeagueDraw(teams, rng=random.Random(2), constraints=constraints)
+        start = time.perf_counter()
+        result = draw.perform_draw(max_attempts=10 ** 6, method="backtrack", max_steps=10 ** 6, timeout=0.3)
+        self.assertLess(time.perf_counter() - start, 2.0)
+        self.assertFalse(result)
+        self.assertEqual(result.stopped, TIMEOUT)
+        self.assertTrue(result.partial)
+        assert_valid_partial(self, draw, result)
+
+    def test_cancel_from_thread(self):
+        """A token cancelled by another thread stops the draw"""
+        teams, constraints = generate_league(1008, rng=random.Random(4))
+        draw = ChampionsLeagueDraw(teams, rng=random.Random(4), constraints=constraints)
+        token = CancellationToken()
+        timer = threading.Timer(0.2, token.cancel)
+        timer.start()
+        try:
+            result = draw.perform_draw(max_attempts=10 ** 6, method="restart", timeout=30, cancel=token)
+        finally:
+            timer.cancel()
+        self.assertEqual(result.stopped, CANCELLED)
+        assert_valid_partial(self, draw, result)
+
+
+class TestSequentialDraw(unittest.TestCase):
+    """Test budgets on the sequential draw and ceremony"""
+
+    def test_no_budget_left(self):
+        """A zero timeout returns at once"""
+        draw = SequentialChampionsLeagueDraw(create_sequential_teams())
+        result = draw.perform_draw_sequential(timeout=0)
+        self.assertEqual(result.stopped, TIMEOUT)
+        self.assertEqual(result.metrics.attempts, 0)
+        self.assertEqual(result.unplaced, 144)
+
+    def test_timeout(self):
+        """The lookahead searches stop at the deadline too"""
+        for seed in range(10):
+            draw = SequentialChampionsLeagueDraw(create_sequential_teams(), rng=random.Random(seed))
+            start = time.perf_counter()
+            result = draw.perform_draw_sequential(timeout=0.02)
+            self.assertLess(time.perf_counter() - start, 0.07)
+            if not result:
+                self.assertEqual(result.stopped, TIMEOUT)
+                assert_valid_partial(self, draw, result)
+
+    def test_cancel_ceremony(self):
+        """Cancelling a ceremony keeps the teams drawn so far"""
+        draw = SequentialChampionsLeagueDraw(create_sequential_teams(), rng=random.Random(6))
+        token = CancellationToken()
+        drawn = []
+        for event in draw.ceremony(cancel=token):
+            if event.kind == "team_drawn":
+                drawn.append(event.team)
+                if len(drawn) == 3:
+                    token.cancel()
+
+        result = event.result
+        self.assertEqual(len(drawn), 3)
+        self.assertEqual(result.stopped, CANCELLED)
+        self.assertGreaterEqual(len(result.partial), 3 * 8 - 3)
+        for team in drawn:
+            self.assertEqual(len(draw.fixtures[team]), 8)
+        assert_valid_partial(self, draw, result)
+
+
+if __name__ == '__main__':
+    unittest.main()
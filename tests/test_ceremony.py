@@ -0,0 +1,110 @@
+"""
+Unit tests for the live ceremony stream
+"""
+
+import asyncio
+import json
+import random
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ceremony import event_to_dict, sse_message, stream_ceremony
+from src.champions_league_draw import create_sample_teams
+from src.champions_league_draw_sequential import SequentialChampionsLeagueDraw
+from src.server import DrawServer, DrawService
+
+
+class TestCeremony(unittest.TestCase):
+    """Tests for the ceremony generator"""
+
+    def test_event_order(self):
+        """Test that every team is announced with its fixtures and the result comes last"""
+        draw = SequentialChampionsLeagueDraw(create_sample_teams(), rng=random.Random(5))
+        events = list(draw.ceremony())
+        self.assertEqual(events[0].kind, "attempt_started")
+        self.assertEqual(events[-1].kind, "draw_finished")
+        self.assertTrue(events[-1].result)
+
+        last_attempt = max(i for i, event in enumerate(events) if event.kind == "attempt_started")
+        drawn = [event for event in events[last_attempt:] if event.kind == "team_drawn"]
+        self.assertEqual(len(drawn), 36)
+        self.assertEqual(len({event.team.name for event in drawn}), 36)
+        for event in drawn:
+            self.assertEqual(len(event.fixtures), 8)
+            self.assertEqual(list(event.fixtures), draw.fixtures[event.team])
+
+        # Each team is selected just before it is drawn
+        for i, event in enumerate(events):
+            if event.kind == "team_drawn":
+                self.assertEqual(events[i - 1][:4], ("team_selected", event.attempt, event.pot, event.team))
+
+    def test_perform_draw_unchanged(self):
+        """Test that perform_draw_sequential gives the ceremony's draw"""
+        seeded = SequentialChampionsLeagueDraw(create_sample_teams(), rng=random.Random(5))
+        result = seeded.perform_draw_sequential()
+        self.assertTrue(result)
+
+        replay = SequentialChampionsLeagueDraw(create_sample_teams(), rng=random.Random(5))
+        for _ in replay.ceremony():
+            pass
+        fixtures = [replay.state.team_fixtures(i) for i in range(36)]
+        self.assertEqual(fixtures, [seeded.state.team_fixtures(i) for i in range(36)])
+
+    def test_sse_message(self):
+        """Test the event name and JSON payload of a message"""
+        draw = SequentialChampionsLeagueDraw(create_sample_teams(), rng=random.Random(1))
+        event = next(event for event in draw.ceremony() if event.kind == "team_drawn")
+        name, data, blank, end = sse_message(event).decode("utf-8").split("\n", 3)
+        self.assertEqual(name, "event: team_drawn")
+        self.assertEqual((blank, end), ("", ""))
+        payload = json.loads(data[len("data: "):])
+        self.assertEqual(payload, event_to_dict(event))
+        self.assertEqual(payload['team']['name'], event.team.name)
+        self.assertEqual(len(payload['fixtures']), 8)
+
+
+class TestCeremonyStream(unittest.IsolatedAsyncioTestCase):
+    """Tests for the async stream and the SSE endpoint"""
+
+    async def test_stream(self):
+        """Test that the async stream yields the same events as the generator"""
+        draw = SequentialChampionsLeagueDraw(create_sample_teams(), rng=random.Random(2))
+        kinds = [event.kind async for event in stream_ceremony(draw)]
+        self.assertEqual(kinds[-1], "draw_finished")
+        self.assertGreaterEqual(kinds.count("team_drawn"), 36)
+
+    async def test_endpoint(self):
+        """Test that /ceremony streams events and rejects bad seeds"""
+        server = DrawServer(DrawService(create_sample_teams(), capacity=1, seed=1), port=0)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"GET /ceremony?seed=4 HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            await writer.drain()
+            head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").lower()
+            self.assertIn("200 ok", head)
+            self.assertIn("content-type: text/event-stream", head)
+            self.assertIn("access-control-allow-origin: *", head)
+            self.assertNotIn("content-length", head)
+
+            messages = (await reader.read()).decode("utf-8").strip().split("\n\n")
+            writer.close()
+            names = [message.split("\n")[0] for message in messages]
+            self.assertEqual(names[0], "event: attempt_started")
+            self.assertEqual(names[-1], "event: draw_finished")
+            self.assertTrue(json.loads(messages[-1].split("data: ", 1)[1])['success'])
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"GET /ceremony?seed=x HTTP/1.1\r\nConnection: close\r\n\r\n")
+            self.assertIn(b" 400 ", await reader.readline())
+            writer.close()
+        finally:
+            await server.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Unit tests for conditional matchup probabilities
+"""
+
+import random
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import DrawConstraints, create_sample_teams
+from src.champions_league_draw_sequential import SequentialChampionsLeagueDraw
+from src.conditional import ConditionalMatchups
+from src.counting import CompletionCounter, remaining_matches
+from src.draw_state import DrawState
+
+
+class TestConditionalMatchups(unittest.TestCase):
+    """Tests for the ConditionalMatchups class"""
+
+    def setUp(self):
+        """Initialize before each test"""
+        self.teams = create_sample_teams()
+        self.estimator = ConditionalMatchups(samples=300, rng=random.Random(1))
+
+    def test_empty_draw(self):
+        """Test that probabilities respect the quotas and country rules"""
+        state = DrawState(self.teams, DrawConstraints())
+        real_madrid = self.teams[0]
+        probabilities = self.estimator.probabilities(state, real_madrid)
+
+        self.assertAlmostEqual(sum(probabilities.values()), 8.0)
+        for pot in range(1, 5):
+            self.assertAlmostEqual(sum(p for team, p in probabilities.items() if team.pot == pot), 2.0)
+        self.assertFalse(any(team.country == "ESP" for team in probabilities))
+        self.assertTrue(all(p < 1.0 for p in probabilities.values()))
+
+    def test_partial_ceremony(self):
+        """Test the selected team's chances in a paused ceremony and the cache"""
+        draw = SequentialChampionsLeagueDraw(self.teams, rng=random.Random(4))
+        drawn = 0
+        for event in draw.ceremony():
+            if event.kind == "team_drawn":
+                drawn += 1
+                self.assertIsNone(draw.current_team)
+            if event.kind == "team_selected" and drawn == 12:
+                break
+
+        # Matches earlier teams drew against it are certain, its open slots are not
+        team = event.team
+        self.assertIs(draw.current_team, team)
+        fixed = {opponent for opponent, _ in draw.fixtures[team]}
+        self.assertLess(len(fixed), 8)
+        probabilities = self.estimator.probabilities(draw)
+        self.assertAlmostEqual(sum(probabilities.values()), 8.0)
+        self.assertTrue(all(probabilities[opponent] == 1.0 for opponent in fixed))
+        self.assertGreater(len(probabilities), 8)
+        self.assertFalse(any(opponent.country == team.country for opponent in probabilities))
+
+        # Opponents another team has already drawn are certain
+        drawn_team = next(t for t in self.teams if len(draw.fixtures[t]) == 8)
+        self.assertEqual(self.estimator.probabilities(draw, drawn_team),
+                         {opponent: 1.0 for opponent, _ in draw.fixtures[drawn_team]})
+        self.assertEqual((self.estimator.misses, self.estimator.hits), (1, 1))
+
+        counts = self.estimator.counts(draw.state)
+        self.assertEqual(counts.draws, 300)
+        self.assertEqual(self.estimator.hits, 2)
+
+    def test_sampled_matches_exact(self):
+        """Test sampled probabilities against the exact ones on a partial draw"""
+        draw = SequentialChampionsLeagueDraw(self.teams, rng=random.Random(4))
+        for event in draw.ceremony():
+            if event.kind == "team_drawn" and remaining_matches(draw.state) <= 24:
+                break
+
+        # Too many matches are left to count, so the completions are sampled
+        state = draw.state
+        estimator = ConditionalMatchups(samples=2000, time_limit=10, rng=random.Random(1))
+        self.assertGreater(remaining_matches(state), estimator.exact_matches)
+        sampled = estimator.counts(state)
+        self.assertEqual((estimator.exact, sampled.draws), (0, 2000))
+
+        exact = CompletionCounter().matchup_counts(state)
+        for count, expected in zip(sampled.matchups, exact.matchups):
+            self.assertAlmostEqual(count / sampled.draws, expected / exact.draws, delta=0.1)
+
+    def test_complete_and_missing_team(self):
+        """Test a finished draw and a draw with no team selected"""
+        draw = SequentialChampionsLeagueDraw(self.teams, rng=random.Random(2))
+        with self.assertRaises(ValueError):
+            self.estimator.probabilities(draw)
+
+        self.assertTrue(draw.perform_draw_sequential())
+        counts = self.estimator.counts(draw.state)
+        self.assertEqual(counts.draws, 1)
+
+    def test_invalid_attempts(self):
+        """Test that an estimator that could never search is refused"""
+        with self.assertRaises(ValueError):
+            ConditionalMatchups(max_attempts=0)
+
+    def test_cache_size(self):
+        """Test that the least recently used answer is evicted"""
+        estimator = ConditionalMatchups(samples=10, burn_in=100, cache_size=1, rng=random.Random(3))
+        state = DrawState(self.teams, DrawConstraints())
+        estimator.counts(state)
+        state.add_match(0, 9, True)
+        estimator.counts(state)
+        self.assertEqual(len(estimator.cache), 1)
+        state.rollback(0)
+        estimator.counts(state)
+        self.assertEqual(estimator.misses, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
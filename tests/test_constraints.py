@@ -0,0 +1,201 @@
+"""
+Unit tests for draw formats and compiled constraints
+"""
+
+import json
+import os
+import random
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import (
+    ChampionsLeagueDraw, Team, create_conference_league_teams, create_europa_league_teams,
+    create_sample_teams,
+)
+from src.constraints import (
+    CHAMPIONS_LEAGUE, CONFERENCE_LEAGUE, EUROPA_LEAGUE, FORMATS, DrawConstraints, compile_format,
+)
+from src.draw_pool import HEADER, MAGIC, DrawPool, DrawPoolWriter
+from src.draw_state import DrawState
+from src.validation import DrawValidator
+
+
+class TestDrawConstraints(unittest.TestCase):
+    """Tests for DrawConstraints and the presets"""
+
+    def test_presets(self):
+        """Test the league-phase formats"""
+        self.assertIs(FORMATS['ucl'], CHAMPIONS_LEAGUE)
+        self.assertEqual(CHAMPIONS_LEAGUE.matches_per_team, 8)
+        self.assertEqual(EUROPA_LEAGUE.matches_per_team, 8)
+        self.assertEqual(CONFERENCE_LEAGUE.matches_per_team, 6)
+        self.assertEqual(CONFERENCE_LEAGUE.matches_per_pot, 1)
+
+        for teams, constraints in ((create_europa_league_teams(), EUROPA_LEAGUE),
+                                   (create_conference_league_teams(), CONFERENCE_LEAGUE)):
+            state = DrawState(teams, constraints)
+            self.assertEqual(state.num_teams, 36)
+            self.assertEqual(state.num_pots * constraints.matches_per_pot, constraints.matches_per_team)
+
+    def test_dict_round_trip(self):
+        """Test that to_dict survives JSON and from_dict restores equal constraints"""
+        constraints = DrawConstraints(forbidden_pairs=[("UKR", "RUS")],
+                                      protected_pairs=[("Celtic", "Rangers")])
+        data = json.loads(json.dumps(constraints.to_dict()))
+        self.assertEqual(DrawConstraints.from_dict(data), constraints)
+        self.assertEqual(constraints.forbidden_pairs, (("UKR", "RUS"),))
+
+        with self.assertRaises(ValueError):
+            DrawConstraints(forbidden_pairs=[("ESP",)])
+
+    def test_compile_cache(self):
+        """Test that states for the same teams and constraints share one compiled format"""
+        teams = create_sample_teams()
+        first = compile_format(teams, CHAMPIONS_LEAGUE)
+        self.assertIs(compile_format(create_sample_teams(), DrawConstraints()), first)
+        self.assertIsNot(compile_format(teams, DrawConstraints(max_per_country=3)), first)
+        self.assertIs(DrawState(teams, CHAMPIONS_LEAGUE).format, first)
+
+
+class TestCompiledRules(unittest.TestCase):
+    """Tests for the pair rules compiled into the format"""
+
+    def setUp(self):
+        """Index the sample teams by name"""
+        self.teams = create_sample_teams()
+        self.id = {team.name: i for i, team in enumerate(self.teams)}
+
+    def test_forbidden_and_protected_pairs(self):
+        """Test that banned pairs never start in a domain"""
+        constraints = DrawConstraints(forbidden_pairs=[("ESP", "ENG")],
+                                      protected_pairs=[("PSG", "Benfica")])
+        compiled = compile_format(self.teams, constraints)
+        real, arsenal = self.id["Real Madrid"], self.id["Arsenal"]
+        psg, benfica, juventus = self.id["PSG"], self.id["Benfica"], self.id["Juventus"]
+
+        self.assertFalse(compiled.can_meet(real, arsenal))
+        self.assertFalse(compiled.can_meet(arsenal, real))
+        self.assertFalse(compiled.can_meet(psg, benfica))
+        self.assertFalse(compiled.can_meet(benfica, psg))
+        self.assertTrue(compiled.can_meet(psg, juventus))
+        self.assertFalse(compiled.can_meet(real, self.id["Barcelona"]))
+
+        state = DrawState(self.teams, constraints)
+        self.assertFalse(state.can_play(real, arsenal, True))
+        self.assertTrue(state.can_play(psg, juventus, True))
+
+        state.add_match(psg, benfica, True)
+        self.assertIn("PSG plays Benfica (forbidden pair)", state.constraint_errors())
+
+    def test_same_country_allowed(self):
+        """Test that same-country teams can meet when allowed"""
+        constraints = DrawConstraints(same_country_allowed=True)
+        state = DrawState(self.teams, constraints)
+        real, barca = self.id["Real Madrid"], self.id["Barcelona"]
+
+        self.assertTrue(state.can_play(real, barca, True))
+        self.assertFalse(state.format.can_meet(real, real))
+        state.add_match(real, barca, True)
+        self.assertFalse(any("same country" in error for error in state.constraint_errors()))
+
+    def test_country_cap(self):
+        """Test that a custom country cap is used by the domains"""
+        state = DrawState(self.teams, DrawConstraints(max_per_country=1))
+        real = self.id["Real Madrid"]
+        state.add_match(real, self.id["Inter Milan"], True)
+        self.assertFalse(state.can_play(real, self.id["Juventus"], False))
+        self.assertFalse(state.can_play(self.id["Juventus"], real, True))
+
+
+class TestOtherFormats(unittest.TestCase):
+    """Tests for drawing the Europa League and Conference League formats"""
+
+    def check(self, teams, constraints, method):
+        draw = ChampionsLeagueDraw(teams, rng=random.Random(5), constraints=constraints)
+        result = draw.perform_draw(max_attempts=10, method=method)
+        self.assertTrue(result, method)
+        self.assertEqual(draw.state.constraint_errors(), [])
+        return draw
+
+    def test_conference_league(self):
+        """Test that every solver draws six pots with one opponent from each"""
+        for method in ("backtrack", "pot_pairs", "two_phase"):
+            draw = self.check(create_conference_league_teams(), CONFERENCE_LEAGUE, method)
+            for team in draw.teams:
+                self.assertEqual(set(draw.opponents_by_pot[team].values()), {1})
+                self.assertEqual(draw.home_away_count[team], {'home': 3, 'away': 3})
+
+    def test_europa_league(self):
+        """Test a Europa League draw"""
+        self.check(create_europa_league_teams(), EUROPA_LEAGUE, "pot_pairs")
+
+    def test_forbidden_pairs_respected(self):
+        """Test that solved draws never contain a forbidden or protected pair"""
+        constraints = DrawConstraints(forbidden_pairs=[("ESP", "ENG")],
+                                      protected_pairs=[("PSG", "Benfica")])
+        for method in ("pot_pairs", "two_phase"):
+            draw = self.check(create_sample_teams(), constraints, method)
+            for team, fixtures in draw.fixtures.items():
+                for opponent, _ in fixtures:
+                    self.assertNotEqual({team.country, opponent.country}, {"ESP", "ENG"})
+                    self.assertNotEqual({team.name, opponent.name}, {"PSG", "Benfica"})
+
+    def test_validator_uses_format(self):
+        """Test that the bulk validator reports forbidden pairs"""
+        teams = create_sample_teams()
+        draw = self.check(teams, CHAMPIONS_LEAGUE, "pot_pairs")
+        state = draw.state
+        i, j = state.trail[0][:2]
+        constraints = DrawConstraints(protected_pairs=[(teams[i].name, teams[j].name)])
+
+        counts = DrawValidator(teams, constraints).validate_slots(state.opponents, state.home)
+        self.assertEqual(counts['same_country'], 2)
+        counts = DrawValidator(teams, CHAMPIONS_LEAGUE).validate_slots(state.opponents, state.home)
+        self.assertEqual(counts['code'], 0)
+
+
+class TestPoolConstraints(unittest.TestCase):
+    """Tests for storing constraints in pool files"""
+
+    def setUp(self):
+        """Reserve a pool file"""
+        handle, self.path = tempfile.mkstemp(suffix=".pool")
+        os.close(handle)
+
+    def tearDown(self):
+        """Remove the pool file"""
+        os.remove(self.path)
+
+    def test_round_trip(self):
+        """Test that a Conference League pool keeps its constraints"""
+        teams = create_conference_league_teams()
+        constraints = DrawConstraints(matches_per_pot=1, home_matches=3, away_matches=3,
+                                      forbidden_pairs=[("CYP", "TUR")])
+        draw = ChampionsLeagueDraw(teams, rng=random.Random(2), constraints=constraints)
+        self.assertTrue(draw.perform_draw(method="pot_pairs"))
+        with DrawPoolWriter(self.path, teams, constraints) as writer:
+            writer.write(draw.state)
+
+        with DrawPool(self.path) as pool:
+            self.assertEqual(pool.constraints, constraints)
+            self.assertEqual(pool.to_state(0).constraint_errors(), [])
+
+    def test_refuses_other_versions(self):
+        """Test that pools of another format version are refused"""
+        teams = [Team("A", "ESP", 1), Team("B", "ENG", 1)]
+        table = json.dumps([[t.name, t.country, t.pot] for t in teams]).encode("utf-8")
+        with open(self.path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, 1, 2, 8, 1, 2, 4, 4, len(table)))
+            f.write(table)
+
+        with self.assertRaisesRegex(ValueError, "version"):
+            DrawPool(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Unit tests for exact completion counting
+"""
+
+import random
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import DrawConstraints, create_sample_teams
+from src.conditional import ConditionalMatchups
+from src.counting import CompletionCounter, CountLimitExceeded, count_completions, remaining_matches
+from src.draw_state import DrawState
+from src.search import complete_draw, select_slot
+
+
+def enumerate_completions(state):
+    """Every completion of state, found by exhaustive search"""
+    completions = set()
+
+    def search():
+        slot = select_slot(state)
+        if slot is None:
+            completions.add(frozenset((i, j) if i_home else (j, i) for i, j, i_home in state.trail))
+            return
+        if slot is False:
+            return
+        team, _, candidates = slot
+        mark = state.checkpoint()
+        for opponent, is_home in candidates:
+            state.add_match(team, opponent, is_home)
+            search()
+            state.rollback(mark)
+
+    search()
+    return completions
+
+
+class TestCompletionCounter(unittest.TestCase):
+    """Tests for the CompletionCounter class"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Solve one draw to cut partial draws from"""
+        cls.teams = create_sample_teams()
+        cls.full = DrawState(cls.teams, DrawConstraints())
+        assert complete_draw(cls.full, 5000, rng=random.Random(1))
+
+    def partial(self, open_matches):
+        """The solved draw without its last open_matches matches"""
+        state = DrawState(self.teams, DrawConstraints())
+        for i, j, i_home in self.full.trail[:len(self.full.trail) - open_matches]:
+            state.add_match(i, j, i_home)
+        return state
+
+    def test_counts_match_enumeration(self):
+        """Test exact counts against exhaustive search"""
+        for open_matches in (0, 3, 6, 8):
+            state = self.partial(open_matches)
+            self.assertEqual(remaining_matches(state), open_matches)
+            self.assertEqual(CompletionCounter().count(state), len(enumerate_completions(state)))
+
+    def test_probabilities_match_enumeration(self):
+        """Test exact matchup and venue counts against exhaustive search"""
+        state = self.partial(8)
+        completions = enumerate_completions(state)
+        counts = CompletionCounter().matchup_counts(state)
+        self.assertEqual(counts.draws, len(completions))
+
+        n = state.num_teams
+        for host in range(n):
+            for guest in range(n):
+                hosting = sum(1 for draw in completions if (host, guest) in draw)
+                self.assertEqual(counts.hosted[host * n + guest], hosting)
+                meeting = hosting + sum(1 for draw in completions if (guest, host) in draw)
+                self.assertEqual(counts.matchups[host * n + guest], meeting)
+
+    def test_state_limit(self):
+        """Test that large residual problems are abandoned"""
+        state = self.partial(30)
+        with self.assertRaises(CountLimitExceeded):
+            CompletionCounter(max_states=50).count(state)
+        self.assertIsNone(count_completions(state, max_states=50))
+        self.assertEqual(count_completions(self.partial(0)), 1)
+
+
+class TestExactConditional(unittest.TestCase):
+    """Tests for the switch from sampling to counting"""
+
+    def test_switch(self):
+        """Test that late partial draws are counted and early ones sampled"""
+        teams = create_sample_teams()
+        full = DrawState(teams, DrawConstraints())
+        self.assertTrue(complete_draw(full, 5000, rng=random.Random(2)))
+        estimator = ConditionalMatchups(samples=50, burn_in=100, rng=random.Random(3))
+
+        late = DrawState(teams, DrawConstraints())
+        for i, j, i_home in full.trail[:-10]:
+            late.add_match(i, j, i_home)
+        counts = estimator.counts(late)
+        self.assertEqual(estimator.exact, 1)
+        self.assertEqual(counts.draws, CompletionCounter().count(late))
+
+        team = next(i for i in range(36) if late.degree[i] < 8)
+        probabilities = estimator.probabilities(late, teams[team])
+        self.assertAlmostEqual(sum(probabilities.values()), 8.0)
+
+        early = DrawState(teams, DrawConstraints())
+        for i, j, i_home in full.trail[:40]:
+            early.add_match(i, j, i_home)
+        self.assertEqual(estimator.counts(early).draws, 50)
+        self.assertEqual(estimator.exact, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Unit tests for the pot-pair decomposition solver
+"""
+
+import io
+import unittest
+import sys
+from collections import Counter
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import ChampionsLeagueDraw, DrawConstraints, create_sample_teams
+from src.decomposition import PotPairSolver, orient_euler, pot_pairs
+from src.draw_state import DrawState
+
+
+class TestOrientEuler(unittest.TestCase):
+    """Tests for the Euler orientation"""
+
+    def test_balanced_orientation(self):
+        """Test that every team hosts as many matches as it visits"""
+        # Two triangles sharing team 0, plus a square
+        edges = [(0, 1), (1, 2), (2, 0), (0, 3), (3, 4), (4, 0),
+                 (5, 6), (6, 7), (7, 8), (8, 5)]
+        oriented = orient_euler(edges)
+
+        self.assertEqual(sorted(tuple(sorted(e)) for e in oriented), sorted(tuple(sorted(e)) for e in edges))
+        home = Counter(h for h, _ in oriented)
+        away = Counter(a for _, a in oriented)
+        self.assertEqual(home, away)
+
+
+class TestPotPairSolver(unittest.TestCase):
+    """Tests for the PotPairSolver class"""
+
+    def setUp(self):
+        """Initialize before each test"""
+        self.state = DrawState(create_sample_teams(), DrawConstraints())
+
+    def test_pot_pairs(self):
+        """Test that 4 pots give 10 subproblems"""
+        pairs = pot_pairs(self.state)
+        self.assertEqual(len(pairs), 10)
+        self.assertEqual(pairs[:4], [(0, 0), (1, 1), (2, 2), (3, 3)])
+
+    def test_solve_pair(self):
+        """Test that one subproblem gives each team one home and one away match"""
+        solver = PotPairSolver(self.state)
+        self.assertTrue(solver.solve_pair(0, 1))
+
+        for team in self.state.pot_members[0] + self.state.pot_members[1]:
+            self.assertEqual(self.state.degree[team], 2)
+            self.assertEqual(self.state.home_count[team], 1)
+            self.assertEqual(self.state.away_count[team], 1)
+
+    def test_solve(self):
+        """Test that the solver completes a valid draw"""
+        solver = PotPairSolver(self.state, max_steps=100000)
+        self.assertTrue(solver.solve())
+        self.assertEqual(self.state.constraint_errors(), [])
+
+    def test_perform_draw(self):
+        """Test the pot_pairs mode of ChampionsLeagueDraw"""
+        draw = ChampionsLeagueDraw(create_sample_teams())
+
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(draw.perform_draw(method="pot_pairs"))
+            self.assertTrue(draw.verify_constraints())
+
+
+if __name__ == "__main__":
+    unittest.main()
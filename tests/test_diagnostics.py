@@ -0,0 +1,146 @@
+"""
+Unit tests for dead-end diagnostics
+"""
+
+import json
+import random
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import ChampionsLeagueDraw, DrawConstraints, create_sample_teams
+from src.champions_league_draw_sequential import SequentialChampionsLeagueDraw
+from src.champions_league_draw_sequential import create_sample_teams as create_sequential_teams
+from src.diagnostics import (
+    AWAY_LIMIT, COUNTRY_CAP, HOME_LIMIT, NO_COMPLETION, POT_QUOTA, REASONS,
+    REPEAT_OPPONENT, SAME_COUNTRY, DeadEndRecorder, exclusion_reason,
+)
+from src.draw_state import DrawState
+
+
+class TestExclusionReason(unittest.TestCase):
+    """Tests for exclusion_reason"""
+
+    def setUp(self):
+        """Create an empty state"""
+        self.teams = create_sample_teams()
+        self.state = DrawState(self.teams, DrawConstraints())
+        self.id = {team.name: i for i, team in enumerate(self.teams)}
+
+    def test_static_and_played(self):
+        """Test same country and repeated opponents"""
+        state = self.state
+        real, barca, arsenal = self.id["Real Madrid"], self.id["Barcelona"], self.id["Arsenal"]
+
+        self.assertEqual(exclusion_reason(state, real, barca), SAME_COUNTRY)
+        self.assertIsNone(exclusion_reason(state, real, arsenal))
+
+        state.add_match(real, arsenal, True)
+        self.assertEqual(exclusion_reason(state, real, arsenal), REPEAT_OPPONENT)
+
+    def test_pot_quota_and_country_cap(self):
+        """Test that filled pot quotas and country caps are named"""
+        state = self.state
+        real = self.id["Real Madrid"]
+        state.add_match(real, self.id["Arsenal"], True)
+        state.add_match(real, self.id["Benfica"], False)
+        self.assertEqual(exclusion_reason(state, real, self.id["Juventus"]), POT_QUOTA)
+
+        state.reset()
+        state.add_match(real, self.id["Inter Milan"], True)
+        state.add_match(real, self.id["Atalanta"], False)
+        self.assertEqual(exclusion_reason(state, real, self.id["Bologna"]), COUNTRY_CAP)
+
+    def fill(self, team, other, is_home):
+        """Give team four matches with the same venue, one from each pot, avoiding other"""
+        state = self.state
+        avoid = {state.team_country[team], state.team_country[other]}
+        for pot in range(state.num_pots):
+            for k in state.pot_members[pot]:
+                if (k not in (team, other) and state.team_country[k] not in avoid
+                        and state.can_play(team, k, is_home)):
+                    state.add_match(team, k, is_home)
+                    avoid.add(state.team_country[k])
+                    break
+
+    def test_venue_limits(self):
+        """Test that pairs blocked only by home/away are named"""
+        real, benfica = self.id["Real Madrid"], self.id["Benfica"]
+        self.fill(real, benfica, True)
+        self.fill(benfica, real, True)
+        self.assertEqual(exclusion_reason(self.state, real, benfica), HOME_LIMIT)
+
+        self.state.reset()
+        self.fill(real, benfica, False)
+        self.fill(benfica, real, False)
+        self.assertEqual(exclusion_reason(self.state, real, benfica), AWAY_LIMIT)
+
+
+class TestDeadEndRecorder(unittest.TestCase):
+    """Tests for DeadEndRecorder"""
+
+    def test_restart_dead_ends(self):
+        """Test that every restart dead end is classified and aggregated"""
+        draw = ChampionsLeagueDraw(create_sample_teams(), rng=random.Random(4))
+        recorder = DeadEndRecorder()
+        draw.add_observer(recorder)
+        result = draw.perform_draw(max_attempts=30)
+
+        self.assertEqual(recorder.total, result.metrics.dead_ends)
+        self.assertEqual(recorder.attempts, result.metrics.attempts)
+        self.assertEqual(len(recorder.dead_ends), recorder.total)
+        self.assertEqual(sum(recorder.by_reason.values()), recorder.total)
+        for dead_end in recorder.dead_ends:
+            self.assertIn(dead_end.reason, REASONS)
+            self.assertGreater(dead_end.depth, 0)
+            self.assertLess(dead_end.depth, 36 * 4)
+
+        summary = recorder.summary()
+        self.assertEqual(summary['dead_ends'], recorder.total)
+        json.dumps(summary)
+        self.assertIn("Blocking constraint:", recorder.report())
+
+    def test_aggregates_across_draws(self):
+        """Test that one recorder adds up several draws, and keep=False stores nothing"""
+        recorder = DeadEndRecorder(keep=False)
+        for seed in range(2):
+            draw = ChampionsLeagueDraw(create_sample_teams(), rng=random.Random(seed))
+            draw.add_observer(recorder)
+            draw.perform_draw(max_attempts=5)
+
+        self.assertEqual(recorder.draws, 2)
+        self.assertEqual(recorder.attempts, recorder.total + recorder.completed)
+        self.assertEqual(recorder.dead_ends, [])
+        self.assertGreater(recorder.total, 0)
+
+    def test_sequential_dead_ends(self):
+        """Test that sequential dead ends are seen before they are rolled back"""
+        draw = SequentialChampionsLeagueDraw(create_sequential_teams(), lookahead=False,
+                                             rng=random.Random(1))
+        recorder = DeadEndRecorder()
+        draw.add_observer(recorder)
+        draw.perform_draw_sequential(max_attempts_per_team=2, max_global_attempts=3)
+
+        self.assertGreater(recorder.total, 0)
+        for dead_end in recorder.dead_ends:
+            self.assertNotEqual(dead_end.reason, NO_COMPLETION)
+            self.assertIn(dead_end.reason, REASONS)
+
+    def test_solver_dead_ends(self):
+        """Test that solver dead ends are only counted"""
+        recorder = DeadEndRecorder()
+        draw = ChampionsLeagueDraw(create_sample_teams(), rng=random.Random(0))
+        draw.add_observer(recorder)
+        result = draw.perform_draw(max_attempts=2, method="backtrack", max_steps=1)
+
+        self.assertFalse(result)
+        self.assertEqual(recorder.unclassified, 2)
+        self.assertEqual(recorder.total, 0)
+        self.assertIn("Unclassified", recorder.report())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -208,6 +208,43 @@ class TestChampionsLeagueDraw(unittest.TestCase):
             self.assertTrue(success, f"Draw {i+1} should succeed")
 
 
+class TestBacktrackingDraw(unittest.TestCase):
+    """Tests for the backtracking solver mode"""
+    
+    def setUp(self):
+        """Initialize before each test"""
+        self.teams = create_sample_teams()
+        self.draw = ChampionsLeagueDraw(self.teams)
+    
+    def test_remove_match(self):
+        """Test that remove_match undoes add_match"""
+        team1 = self.teams[0]
+        team2 = [t for t in self.teams if t.pot != team1.pot and t.country != team1.country][0]
+        
+        self.draw.add_match(team1, team2, True)
+        self.draw.remove_match(team1, team2, True)
+        
+        self.assertEqual(len(self.draw.fixtures[team1]), 0)
+        self.assertEqual(len(self.draw.fixtures[team2]), 0)
+        self.assertEqual(self.draw.home_away_count[team1]['home'], 0)
+        self.assertEqual(self.draw.home_away_count[team2]['away'], 0)
+        self.assertEqual(self.draw.opponents_by_pot[team1][team2.pot], 0)
+        self.assertEqual(self.draw.opponents_by_country[team2][team1.country], 0)
+        self.assertTrue(self.draw.can_play_against(team1, team2, True))
+    
+    def test_backtracking_draw(self):
+        """Test that the backtracking solver produces a valid draw"""
+        success = self.draw.perform_draw(max_attempts=5, method="backtrack")
+        
+        self.assertTrue(success)
+        self.assertTrue(self.draw.verify_constraints())
+    
+    def test_unknown_method(self):
+        """Test that an unknown solver mode is rejected"""
+        with self.assertRaises(ValueError):
+            self.draw.perform_draw(method="unknown")
+
+
 class TestSampleTeams(unittest.TestCase):
     """Tests for sample teams creation"""
     
@@ -244,6 +281,7 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestTeam))
     suite.addTests(loader.loadTestsFromTestCase(TestDrawConstraints))
     suite.addTests(loader.loadTestsFromTestCase(TestChampionsLeagueDraw))
+    suite.addTests(loader.loadTestsFromTestCase(TestBacktrackingDraw))
     suite.addTests(loader.loadTestsFromTestCase(TestSampleTeams))
     
     runner = unittest.TextTestRunner(verbosity=2)
@@ -0,0 +1,116 @@
+"""
+Unit tests for the binary draw pool format
+"""
+
+import gc
+import os
+import random
+import tempfile
+import unittest
+import sys
+import warnings
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import DrawConstraints, create_sample_teams
+from src.draw_pool import DrawPool, DrawPoolWriter, decode_record, encode_draw, np
+from src.draw_state import DrawState
+from src.search import solve_two_phase
+
+
+class TestDrawPool(unittest.TestCase):
+    """Tests for DrawPoolWriter and DrawPool"""
+
+    def setUp(self):
+        """Write a small pool of draws"""
+        self.teams = create_sample_teams()
+        self.constraints = DrawConstraints()
+        self.draws = []
+        rng = random.Random(3)
+        for _ in range(5):
+            state = DrawState(self.teams, self.constraints)
+            self.assertTrue(solve_two_phase(state, 5000, rng))
+            self.draws.append(state)
+
+        handle, self.path = tempfile.mkstemp(suffix=".pool")
+        os.close(handle)
+        with DrawPoolWriter(self.path, self.teams, self.constraints) as writer:
+            for state in self.draws:
+                writer.write(state)
+
+    def tearDown(self):
+        """Remove the pool file"""
+        os.remove(self.path)
+
+    def test_record_size(self):
+        """Test that a 36-team draw takes 288 opponent bytes and 36 home bytes"""
+        record = encode_draw(self.draws[0])
+        self.assertEqual(len(record), 324)
+
+        opponents, home = decode_record(record, 36, 8)
+        self.assertEqual(opponents, list(self.draws[0].opponents))
+        self.assertEqual(home, [bool(h) for h in self.draws[0].home])
+
+    def test_header(self):
+        """Test that the team table and constraints are read back"""
+        with DrawPool(self.path) as pool:
+            self.assertEqual(len(pool), 5)
+            self.assertEqual(pool.teams, self.teams)
+            self.assertEqual([t.pot for t in pool.teams], [t.pot for t in self.teams])
+            self.assertEqual(pool.constraints, self.constraints)
+
+    def test_round_trip(self):
+        """Test that every stored draw is rebuilt exactly"""
+        with DrawPool(self.path) as pool:
+            for k, original in enumerate(self.draws):
+                state = pool.to_state(k)
+                self.assertEqual(state.constraint_errors(), [])
+                self.assertEqual(state.played, original.played)
+                self.assertEqual(list(state.home_count), list(original.home_count))
+
+            with self.assertRaises(IndexError):
+                pool.record(5)
+
+    def test_rejects_other_files(self):
+        """Test that a file without the pool header is refused"""
+        with open(self.path, "wb") as f:
+            f.write(b"{}" * 40)
+        with self.assertRaises(ValueError):
+            DrawPool(self.path)
+
+    def test_rejected_file_is_closed(self):
+        """Test that a refused file leaves nothing open"""
+        for content in (b"", b"{}" * 40):
+            with open(self.path, "wb") as f:
+                f.write(content)
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always", ResourceWarning)
+                with self.assertRaises(ValueError):
+                    DrawPool(self.path)
+                gc.collect()
+            self.assertEqual([w for w in caught if issubclass(w.category, ResourceWarning)], [])
+
+    def test_incomplete_draw_is_refused(self):
+        """Test that encoding a partial draw raises a clear error"""
+        state = DrawState(self.teams, self.constraints)
+        with self.assertRaisesRegex(ValueError, "complete"):
+            encode_draw(state)
+
+    @unittest.skipUnless(np is not None, "NumPy is not installed")
+    def test_numpy_view(self):
+        """Test the zero-copy NumPy view of all records"""
+        with DrawPool(self.path) as pool:
+            records = pool.as_numpy()
+            self.assertEqual(records['opponents'].shape, (5, 36, 8))
+            self.assertEqual(records['opponents'][2].ravel().tolist(), list(self.draws[2].opponents))
+
+            home = pool.unpack_home(records)
+            self.assertEqual(home.shape, (5, 36, 8))
+            self.assertTrue((home.sum(axis=2) == 4).all())
+            del records, home
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+"""
+Unit tests for the array-backed draw state
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import DrawConstraints, create_sample_teams
+from src.draw_state import DrawState, iter_bits
+
+
+class TestDrawState(unittest.TestCase):
+    """Tests for the DrawState class"""
+
+    def setUp(self):
+        """Initialize before each test"""
+        self.teams = create_sample_teams()
+        self.state = DrawState(self.teams, DrawConstraints())
+        self.index = self.state.index
+
+    def find(self, name):
+        """Return the id of a team by name"""
+        return next(i for i, t in enumerate(self.teams) if t.name == name)
+
+    def test_initialization(self):
+        """Test ids, pots and counters after construction"""
+        self.assertEqual(self.state.num_teams, 36)
+        self.assertEqual(self.state.num_pots, 4)
+        self.assertEqual(self.state.matches_per_team, 8)
+        self.assertEqual([len(members) for members in self.state.pot_members], [9, 9, 9, 9])
+        self.assertFalse(self.state.is_complete())
+
+    def test_add_and_remove_match(self):
+        """Test that remove_match restores every counter"""
+        real, arsenal = self.find("Real Madrid"), self.find("Arsenal")
+
+        self.state.add_match(real, arsenal, True)
+        self.assertEqual(self.state.team_fixtures(real), [(arsenal, True)])
+        self.assertEqual(self.state.team_fixtures(arsenal), [(real, False)])
+        self.assertFalse(self.state.can_play(real, arsenal, False))
+
+        self.state.remove_match(real, arsenal, True)
+        self.assertEqual(self.state.team_fixtures(real), [])
+        self.assertEqual(self.state.played[real], 0)
+        self.assertEqual(sum(self.state.pot_count), 0)
+        self.assertEqual(sum(self.state.country_count), 0)
+        self.assertTrue(self.state.can_play(real, arsenal, False))
+
+    def test_remove_keeps_other_fixtures(self):
+        """Test removing a fixture that is not the most recent one"""
+        real = self.find("Real Madrid")
+        arsenal, monaco = self.find("Arsenal"), self.find("Monaco")
+
+        self.state.add_match(real, arsenal, True)
+        self.state.add_match(real, monaco, False)
+        self.state.remove_match(real, arsenal, True)
+
+        self.assertEqual(self.state.team_fixtures(real), [(monaco, False)])
+        self.assertEqual(self.state.home_count[real], 0)
+        self.assertEqual(self.state.away_count[real], 1)
+
+    def test_country_limit(self):
+        """Test the maximum of 2 opponents from one country"""
+        real = self.find("Real Madrid")
+        english = [i for i, t in enumerate(self.teams) if t.country == "ENG"]
+
+        self.state.add_match(real, english[0], True)
+        self.state.add_match(real, english[2], False)
+
+        self.assertFalse(self.state.can_play(real, english[1], True))
+        self.assertFalse(self.state.can_play(english[1], real, True))
+
+    def test_copy_is_independent(self):
+        """Test that a copy does not share counters with the original"""
+        real, arsenal = self.find("Real Madrid"), self.find("Arsenal")
+
+        copy = self.state.copy()
+        copy.add_match(real, arsenal, True)
+
+        self.assertEqual(self.state.degree[real], 0)
+        self.assertEqual(copy.degree[real], 1)
+
+    def test_checkpoint_rollback(self):
+        """Test that rollback undoes only the matches added after the mark"""
+        real = self.find("Real Madrid")
+        arsenal, monaco, celtic = self.find("Arsenal"), self.find("Monaco"), self.find("Celtic")
+
+        self.state.add_match(real, arsenal, True)
+        mark = self.state.checkpoint()
+        self.state.add_match(real, monaco, False)
+        self.state.add_match(celtic, real, True)
+        self.state.rollback(mark)
+
+        self.assertEqual(self.state.team_fixtures(real), [(arsenal, True)])
+        self.assertEqual(self.state.degree[monaco], 0)
+        self.assertEqual(self.state.degree[celtic], 0)
+        self.assertEqual(self.state.away_count[real], 0)
+        self.assertEqual(len(self.state.trail), mark)
+        self.assertTrue(self.state.can_play(real, monaco, False))
+
+    def test_remove_match_updates_trail(self):
+        """Test that remove_match drops the match from the undo trail"""
+        real, arsenal = self.find("Real Madrid"), self.find("Arsenal")
+
+        self.state.add_match(real, arsenal, True)
+        self.state.remove_match(arsenal, real, False)
+
+        self.assertEqual(self.state.trail, [])
+
+    def test_domains_follow_matches(self):
+        """Test that domains match a full rebuild after adds and rollbacks"""
+        real, arsenal, monaco = self.find("Real Madrid"), self.find("Arsenal"), self.find("Monaco")
+        atalanta = self.find("Atalanta")
+
+        mark = self.state.checkpoint()
+        self.state.add_match(real, arsenal, True)
+        self.state.add_match(real, atalanta, True)
+
+        # Real Madrid has filled its pot 2 quota
+        home, away = self.state.candidates(real, 1)
+        self.assertEqual(home | away, 0)
+        home, away = self.state.candidates(self.find("Juventus"), 0)
+        self.assertFalse((home | away) >> real & 1)
+
+        expected = self.state.copy()
+        expected._rebuild_domains()
+        self.assertEqual(self.state.domain, expected.domain)
+
+        self.state.rollback(mark)
+        home, away = self.state.candidates(real, 3)
+        self.assertTrue(home >> monaco & 1)
+        self.assertTrue(away >> monaco & 1)
+        self.assertEqual(list(iter_bits(home & away)), list(iter_bits(home)))
+
+    def test_candidates_respect_home_limit(self):
+        """Test that a team with 4 home matches can only be drawn away"""
+        real = self.find("Real Madrid")
+        for name in ["Arsenal", "Atalanta", "Monaco", "Celtic"]:
+            self.state.add_match(real, self.find(name), True)
+
+        home, away = self.state.candidates(real, 2)
+        self.assertEqual(home, 0)
+        self.assertNotEqual(away, 0)
+
+    def test_team_views(self):
+        """Test the Team-keyed views"""
+        real, arsenal = self.find("Real Madrid"), self.find("Arsenal")
+        self.state.add_match(real, arsenal, True)
+
+        team = self.teams[real]
+        self.assertEqual(self.state.fixtures_view()[team], [(self.teams[arsenal], True)])
+        self.assertEqual(self.state.opponents_by_pot_view()[team], {1: 0, 2: 1, 3: 0, 4: 0})
+        self.assertEqual(self.state.home_away_view()[team], {'home': 1, 'away': 0})
+        self.assertEqual(self.state.opponents_by_country_view()[team]["ENG"], 1)
+        self.assertEqual(len(self.state.fixtures_view()), 36)
+
+    def test_constraint_errors(self):
+        """Test that an empty draw reports missing matches"""
+        errors = self.state.constraint_errors()
+        self.assertTrue(any("0 matches instead of 8" in error for error in errors))
+
+
+if __name__ == "__main__":
+    unittest.main()
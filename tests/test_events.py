@@ -0,0 +1,150 @@
+"""
+Unit tests for draw events, observers and metrics
+"""
+
+import io
+import random
+import unittest
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import ChampionsLeagueDraw, create_sample_teams
+from src.champions_league_draw_sequential import SequentialChampionsLeagueDraw
+from src.champions_league_draw_sequential import create_sample_teams as create_sequential_teams
+from src.events import ConsoleObserver, DrawMetrics, DrawObserver, DrawResult
+
+
+class RecordingObserver(DrawObserver):
+    """Records every event as a tuple"""
+
+    def __init__(self):
+        self.events = []
+
+    def on_attempt_started(self, draw, attempt):
+        self.events.append(('attempt', attempt))
+
+    def on_pot_started(self, draw, pot):
+        self.events.append(('pot_started', pot))
+
+    def on_match_added(self, draw, team, opponent, is_home):
+        self.events.append(('match', team, opponent, is_home))
+
+    def on_dead_end(self, draw, team):
+        self.events.append(('dead_end', team))
+
+    def on_team_completed(self, draw, team):
+        self.events.append(('team', team))
+
+    def on_pot_completed(self, draw, pot, seconds):
+        self.events.append(('pot', pot))
+
+    def on_draw_finished(self, draw, result):
+        self.events.append(('finished', bool(result)))
+
+    def kinds(self, kind):
+        return [event for event in self.events if event[0] == kind]
+
+
+class TestDrawResult(unittest.TestCase):
+    """Tests for DrawResult"""
+
+    def test_truth_value(self):
+        """Test that a result is true exactly when the draw succeeded"""
+        self.assertTrue(DrawResult(True, "restart", DrawMetrics()))
+        self.assertFalse(DrawResult(False, "restart", DrawMetrics()))
+
+
+class TestDrawEvents(unittest.TestCase):
+    """Tests for observers on ChampionsLeagueDraw"""
+
+    def setUp(self):
+        """Create a seeded draw with a recording observer"""
+        self.draw = ChampionsLeagueDraw(create_sample_teams(), rng=random.Random(5))
+        self.observer = RecordingObserver()
+        self.draw.add_observer(self.observer)
+
+    def test_solver_events(self):
+        """Test that a solved draw reports every match and team once"""
+        result = self.draw.perform_draw(method="two_phase")
+
+        self.assertTrue(result)
+        self.assertEqual(result.method, "two_phase")
+        self.assertEqual(len(self.observer.kinds('match')), 36 * 4)
+        self.assertEqual(len(self.observer.kinds('team')), 36)
+        self.assertEqual(len(self.observer.kinds('attempt')), result.metrics.attempts)
+        self.assertEqual(self.observer.events[-1], ('finished', True))
+
+    def test_restart_events(self):
+        """Test that every failed restart attempt reports one dead end at a team"""
+        result = self.draw.perform_draw(max_attempts=20)
+        metrics = result.metrics
+
+        self.assertEqual(metrics.attempts, len(self.observer.kinds('attempt')))
+        self.assertEqual(metrics.dead_ends, len(self.observer.kinds('dead_end')))
+        self.assertEqual(metrics.dead_ends, metrics.attempts - int(bool(result)))
+        self.assertTrue(all(event[1] is not None for event in self.observer.kinds('dead_end')))
+        self.assertGreater(metrics.pot_scans, 0)
+        self.assertEqual(self.observer.events[-1], ('finished', bool(result)))
+
+        # Each match is reported with the team that drew it
+        for _, team, opponent, _ in self.observer.kinds('match'):
+            self.assertNotEqual(team.country, opponent.country)
+
+    def test_remove_observer(self):
+        """Test that a removed observer receives nothing"""
+        self.draw.remove_observer(self.observer)
+        self.assertTrue(self.draw.perform_draw(method="backtrack"))
+        self.assertEqual(self.observer.events, [])
+
+    def test_silent_without_console_observer(self):
+        """Test that nothing is printed unless a ConsoleObserver is added"""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.draw.perform_draw(method="backtrack")
+        self.assertEqual(output.getvalue(), "")
+
+        self.draw.add_observer(ConsoleObserver())
+        with redirect_stdout(output):
+            result = self.draw.perform_draw(method="backtrack")
+        self.assertIn(f"after {result.metrics.attempts} attempt(s)", output.getvalue())
+
+    def test_pot_scans(self):
+        """Test that every opponent pick scans each pot once"""
+        result = self.draw.perform_draw(max_attempts=20)
+        state = self.draw.state
+
+        # Each pick either adds a match or ends its attempt at a dead end
+        picks = len(self.observer.kinds('match')) + len(self.observer.kinds('dead_end'))
+        self.assertEqual(result.metrics.pot_scans, picks * state.num_pots)
+
+        # The solver methods do not pick from candidates() scans
+        self.assertEqual(self.draw.perform_draw(method="backtrack").metrics.pot_scans, 0)
+
+
+class TestSequentialEvents(unittest.TestCase):
+    """Tests for observers on SequentialChampionsLeagueDraw"""
+
+    def test_pot_events(self):
+        """Test pot and team events and the per-pot timings"""
+        draw = SequentialChampionsLeagueDraw(create_sequential_teams(), rng=random.Random(2))
+        observer = RecordingObserver()
+        draw.add_observer(observer)
+
+        result = draw.perform_draw_sequential()
+
+        self.assertTrue(result)
+        self.assertEqual(result.method, "sequential")
+        self.assertEqual([event[1] for event in observer.kinds('pot')], [1, 2, 3, 4])
+        self.assertEqual(len(observer.kinds('team')), 36)
+        self.assertEqual(len(observer.kinds('match')), 36 * 4)
+        self.assertEqual(sorted(result.metrics.pot_seconds), [1, 2, 3, 4])
+        self.assertGreaterEqual(result.metrics.seconds, sum(result.metrics.pot_seconds.values()))
+        self.assertGreater(result.metrics.pot_scans, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Unit tests for the JSON and NDJSON exporters
+"""
+
+import gzip
+import io
+import json
+import os
+import random
+import tempfile
+import unittest
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import ChampionsLeagueDraw, create_conference_league_teams, create_sample_teams
+from src.constraints import CONFERENCE_LEAGUE
+from src.export_json import draw_to_dict, export_draw_to_json, export_draws_ndjson
+from src.sampler import DrawSampler
+
+
+class TestExport(unittest.TestCase):
+    """Tests for draw_to_dict and the exporters"""
+
+    def setUp(self):
+        """Perform a draw and prepare a scratch directory"""
+        self.draw = ChampionsLeagueDraw(create_sample_teams(), rng=random.Random(8))
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(self.draw.perform_draw(method="two_phase"))
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the scratch directory"""
+        self.directory.cleanup()
+
+    def test_draw_to_dict(self):
+        """Test the team and match schema"""
+        results = draw_to_dict(self.draw)
+        self.assertEqual(results["format"]["total_teams"], 36)
+        self.assertEqual(len(results["teams"]), 36)
+        self.assertEqual(len(results["matches"]), 144)
+        for team in results["teams"]:
+            self.assertEqual(len(team["fixtures"]["home"]), 4)
+            self.assertEqual(len(team["fixtures"]["away"]), 4)
+
+        # The state and the draw give the same document
+        self.assertEqual(draw_to_dict(self.draw.state), results)
+
+    def test_tournament_follows_format(self):
+        """Test that the tournament name comes from the draw's constraints"""
+        self.assertEqual(draw_to_dict(self.draw)["tournament"], "UEFA Champions League 2024-2025")
+
+        draw = ChampionsLeagueDraw(create_conference_league_teams(), rng=random.Random(8),
+                                   constraints=CONFERENCE_LEAGUE)
+        self.assertTrue(draw.perform_draw(method="pot_pairs"))
+        self.assertEqual(draw_to_dict(draw)["tournament"], "UEFA Conference League 2024-2025")
+
+    def test_export_draw_to_json(self):
+        """Test that the single-draw export writes the same document"""
+        filename = os.path.join(self.directory.name, "draw.json")
+        with redirect_stdout(io.StringIO()):
+            results = export_draw_to_json(self.draw, filename)
+        with open(filename, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), results)
+
+    def test_ndjson_stream(self):
+        """Test that every draw from a generator becomes one gzip line"""
+        sampler = DrawSampler(self.draw.state, rng=random.Random(1))
+        filename = os.path.join(self.directory.name, "draws.ndjson.gz")
+
+        count = export_draws_ndjson(sampler.sample(5, burn_in=10, thinning=10), filename)
+        self.assertEqual(count, 5)
+
+        with gzip.open(filename, "rt", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 5)
+        for line in lines:
+            self.assertEqual(len(json.loads(line)["matches"]), 144)
+
+    def test_ndjson_plain(self):
+        """Test uncompressed output"""
+        filename = os.path.join(self.directory.name, "draws.ndjson")
+        self.assertEqual(export_draws_ndjson([self.draw], filename), 1)
+        with open(filename, encoding="utf-8") as f:
+            self.assertEqual(json.loads(f.readline()), draw_to_dict(self.draw))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Unit tests for seeded draws and the parallel draw farm
+"""
+
+import io
+import random
+import unittest
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import ChampionsLeagueDraw, DrawConstraints, create_sample_teams
+from src.farm import DrawFarm, split_draws, worker_seeds
+from src.montecarlo import MonteCarloEngine
+
+
+class TestSeededDraws(unittest.TestCase):
+    """Tests that engines given the same rng produce the same draw"""
+
+    def draw_matches(self, method, seed):
+        draw = ChampionsLeagueDraw(create_sample_teams(), rng=random.Random(seed))
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(draw.perform_draw(method=method))
+        return list(draw.state.trail)
+
+    def test_same_seed_same_draw(self):
+        """Test that every method is reproducible from its seed"""
+        for method in ("backtrack", "pot_pairs", "two_phase"):
+            self.assertEqual(self.draw_matches(method, 42), self.draw_matches(method, 42))
+
+    def test_different_seeds_differ(self):
+        """Test that different seeds give different draws"""
+        self.assertNotEqual(self.draw_matches("two_phase", 1), self.draw_matches("two_phase", 2))
+
+
+class TestDrawFarm(unittest.TestCase):
+    """Tests for the DrawFarm class"""
+
+    def setUp(self):
+        """Initialize before each test"""
+        self.teams = create_sample_teams()
+
+    def test_worker_seeds(self):
+        """Test that worker seeds are reproducible and distinct"""
+        self.assertEqual(worker_seeds(5, 4), worker_seeds(5, 4))
+        self.assertEqual(len(set(worker_seeds(5, 4))), 4)
+        self.assertNotEqual(worker_seeds(5, 4), worker_seeds(6, 4))
+
+    def test_split_draws(self):
+        """Test that draws are split evenly"""
+        self.assertEqual(split_draws(10, 3), [4, 3, 3])
+        self.assertEqual(split_draws(2, 4), [1, 1, 0, 0])
+
+    def test_reproducible(self):
+        """Test that the same master seed and worker count give identical counts"""
+        def run():
+            farm = DrawFarm(self.teams, DrawConstraints(), workers=2, master_seed=11,
+                            method="mcmc", thinning=10)
+            counts = farm.run(30)
+            return counts.draws, bytes(counts.matchups), bytes(counts.hosted), bytes(counts.countries_played)
+
+        first = run()
+        self.assertEqual(first[0], 30)
+        self.assertEqual(first, run())
+
+    def test_exact_draw_count(self):
+        """Test that workers left without draws add none"""
+        farm = DrawFarm(self.teams, DrawConstraints(), workers=4, master_seed=3,
+                        method="mcmc", thinning=5)
+        self.assertEqual(farm.run(2).draws, 2)
+        self.assertEqual(farm.run(0).draws, 0)
+
+    def test_merge(self):
+        """Test that merged counts are the sum of both runs"""
+        first = MonteCarloEngine(self.teams, DrawConstraints(), method="mcmc", thinning=5,
+                                 rng=random.Random(1)).run(5)
+        second = MonteCarloEngine(self.teams, DrawConstraints(), method="mcmc", thinning=5,
+                                  rng=random.Random(2)).run(7)
+        expected = [a + b for a, b in zip(first.matchups, second.matchups)]
+
+        first.merge(second)
+        self.assertEqual(first.draws, 12)
+        self.assertEqual(list(first.matchups), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
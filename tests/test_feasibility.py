@@ -0,0 +1,84 @@
+"""
+Unit tests for the feasibility oracle and the sequential lookahead draw
+"""
+
+import io
+import random
+import unittest
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import Team, DrawConstraints, create_sample_teams
+from src.champions_league_draw_sequential import SequentialChampionsLeagueDraw
+from src.champions_league_draw_sequential import create_sample_teams as create_sequential_teams
+from src.draw_state import DrawState
+from src.events import ConsoleObserver
+from src.feasibility import FeasibilityOracle
+
+
+class TestFeasibilityOracle(unittest.TestCase):
+    """Tests for the FeasibilityOracle class"""
+
+    def setUp(self):
+        """Initialize before each test"""
+        self.state = DrawState(create_sample_teams(), DrawConstraints())
+        # Seeded: an unlucky shuffle can exhaust the default search budget
+        self.oracle = FeasibilityOracle(rng=random.Random(0))
+
+    def test_empty_draw_is_feasible(self):
+        """Test that an empty draw can be completed"""
+        self.assertTrue(self.oracle.is_feasible(self.state))
+        self.assertEqual(self.state.trail, [])
+
+    def test_witness_answers_without_search(self):
+        """Test that partial draws extending the witness need no search"""
+        self.assertTrue(self.oracle.is_feasible(self.state))
+        searches = self.oracle.searches
+
+        i, j, i_home = sorted(self.oracle.witness)[0]
+        self.state.add_match(i, j, i_home)
+
+        self.assertTrue(self.oracle.is_feasible(self.state))
+        self.assertEqual(self.oracle.searches, searches)
+
+    def test_infeasible_draw_is_memoized(self):
+        """Test that a stuck draw is reported and remembered"""
+        teams = [
+            Team("A", "XXX", 1), Team("B", "XXX", 1),
+            Team("C", "YYY", 2), Team("D", "ZZZ", 2),
+        ]
+        constraints = DrawConstraints(matches_per_pot=1, home_matches=1, away_matches=1)
+        state = DrawState(teams, constraints)
+
+        self.assertFalse(self.oracle.is_feasible(state))
+        self.assertFalse(self.oracle.is_feasible(state))
+        self.assertEqual(self.oracle.searches, 1)
+
+
+class TestSequentialLookahead(unittest.TestCase):
+    """Tests for the pot-by-pot draw with the feasibility oracle"""
+
+    def test_draw_never_restarts(self):
+        """Test that the lookahead ceremony completes on its first attempt"""
+        draw = SequentialChampionsLeagueDraw(create_sequential_teams())
+        draw.add_observer(ConsoleObserver())
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            result = draw.perform_draw_sequential(max_attempts_per_team=1, max_global_attempts=1)
+            valid = draw.verify_constraints()
+
+        self.assertTrue(result)
+        self.assertTrue(valid)
+        self.assertEqual(result.metrics.attempts, 1)
+        self.assertEqual(result.metrics.dead_ends, 0)
+        self.assertNotIn("restarting", output.getvalue())
+        self.assertIn("DRAW COMPLETED SUCCESSFULLY", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
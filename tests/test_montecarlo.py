@@ -0,0 +1,133 @@
+"""
+Unit tests for the Monte Carlo matchup engine
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import DrawConstraints, create_sample_teams
+from src.montecarlo import MatchupCounts, MonteCarloEngine, np, wilson_interval
+from src.precheck import InfeasibleDraw
+from src.synthetic import generate_league
+
+
+class TestMatchupCounts(unittest.TestCase):
+    """Tests for the MatchupCounts class"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Run one batch of draws shared by all tests"""
+        cls.teams = create_sample_teams()
+        cls.engine = MonteCarloEngine(cls.teams, DrawConstraints(), method="mcmc", thinning=20)
+        cls.counts = cls.engine.run(50)
+
+    def test_draw_count(self):
+        """Test that the requested number of draws was accumulated"""
+        self.assertEqual(self.counts.draws, 50)
+
+    def test_counts_are_consistent(self):
+        """Test that every draw adds 8 opponents and 4 home matches per team"""
+        counts = self.counts
+        n = counts.num_teams
+        for i in range(n):
+            row = range(i * n, (i + 1) * n)
+            self.assertEqual(sum(counts.matchups[k] for k in row), 8 * counts.draws)
+            self.assertEqual(sum(counts.hosted[k] for k in row), 4 * counts.draws)
+            for j in range(n):
+                self.assertEqual(counts.matchups[i * n + j], counts.matchups[j * n + i])
+                self.assertEqual(counts.hosted[i * n + j] + counts.hosted[j * n + i],
+                                 counts.matchups[i * n + j])
+
+    def test_same_country_never_meets(self):
+        """Test that same-country probabilities stay at zero"""
+        real_madrid, barcelona = self.teams[0], self.teams[8]
+        self.assertEqual(self.counts.probability(real_madrid, barcelona), 0.0)
+        self.assertEqual(self.counts.country_mean("ESP", "ESP"), 0.0)
+
+    def test_interval_contains_estimate(self):
+        """Test that the confidence interval brackets the estimate"""
+        team1, team2 = self.teams[0], self.teams[9]
+        low, high = self.counts.interval(team1, team2)
+        self.assertLessEqual(low, self.counts.probability(team1, team2))
+        self.assertGreaterEqual(high, self.counts.probability(team1, team2))
+        self.assertLessEqual(high - low, 2 * self.counts.max_half_width() + 1e-12)
+
+    @unittest.skipUnless(np is not None, "NumPy is not installed")
+    def test_numpy_path_matches_arrays(self):
+        """Test that NumPy and plain array updates give the same counts"""
+        plain = MatchupCounts(self.engine.state)
+        plain._views = None
+        vectorized = MatchupCounts(self.engine.state)
+
+        for k, draw in enumerate(self.engine.draws()):
+            plain.add(draw)
+            vectorized.add(draw)
+            if k == 10:
+                break
+
+        self.assertEqual(plain.matchups, vectorized.matchups)
+        self.assertEqual(plain.hosted, vectorized.hosted)
+        self.assertEqual(plain.countries_played, vectorized.countries_played)
+        self.assertEqual(vectorized.as_numpy()['matchups'].shape, (36, 36))
+
+
+class TestMonteCarloEngine(unittest.TestCase):
+    """Tests for the MonteCarloEngine class"""
+
+    def test_unknown_method(self):
+        """Test that an unknown method is rejected"""
+        with self.assertRaises(ValueError):
+            MonteCarloEngine(create_sample_teams(), DrawConstraints(), method="magic")
+
+    def test_independent_draws(self):
+        """Test that solver-based draws accumulate"""
+        engine = MonteCarloEngine(create_sample_teams(), DrawConstraints())
+        self.assertEqual(engine.run(3).draws, 3)
+
+    def test_zero_draws(self):
+        """Test that asking for no draws adds none"""
+        engine = MonteCarloEngine(create_sample_teams(), DrawConstraints())
+        self.assertEqual(engine.run(0).draws, 0)
+        self.assertEqual(engine.run(-1).draws, 0)
+        self.assertEqual(engine.run(2).draws, 2)
+
+    def test_infeasible_draws(self):
+        """Test that a format without draws is refused instead of retried forever"""
+        teams, constraints = generate_league(36, num_countries=2)
+        for method in ("two_phase", "mcmc"):
+            with self.subTest(method=method):
+                engine = MonteCarloEngine(teams, constraints, method=method)
+                with self.assertRaises(InfeasibleDraw):
+                    engine.run(1)
+
+    def test_failures_are_bounded(self):
+        """Test that a solver that keeps running out of steps gives up"""
+        for method in ("backtrack", "mcmc"):
+            with self.subTest(method=method):
+                engine = MonteCarloEngine(create_sample_teams(), DrawConstraints(), method=method,
+                                          max_steps=1, max_failures=3)
+                with self.assertRaises(RuntimeError):
+                    engine.run(1)
+                self.assertEqual(engine.failed_attempts, 3)
+
+    def test_early_stop(self):
+        """Test that a loose tolerance stops the run early"""
+        engine = MonteCarloEngine(create_sample_teams(), DrawConstraints(), method="mcmc", thinning=5)
+        counts = engine.run(100000, tolerance=0.2, check_every=10)
+        self.assertLess(counts.draws, 100000)
+        self.assertLessEqual(counts.max_half_width(), 0.2)
+
+    def test_wilson_interval(self):
+        """Test the Wilson interval on known values"""
+        self.assertEqual(wilson_interval(0, 0), (0.0, 1.0))
+        low, high = wilson_interval(50, 100)
+        self.assertAlmostEqual((low + high) / 2, 0.5)
+        self.assertAlmostEqual(high - low, 0.192, places=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
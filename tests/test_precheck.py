@@ -0,0 +1,145 @@
+"""
+Unit tests for the infeasibility pre-check
+"""
+
+import time
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import ChampionsLeagueDraw, Team, create_sample_teams
+from src.champions_league_draw_sequential import SequentialChampionsLeagueDraw
+from src.constraints import FORMATS, DrawConstraints
+from src.precheck import (
+    HOME_AWAY, POT_PAIRING, POT_QUOTA, POT_SIZES, TEAM_OPTIONS, FlowNetwork, InfeasibleDraw,
+    check_feasible, find_problems,
+)
+from src.synthetic import generate_league
+
+
+def crowded_pot_teams():
+    """Sample teams with six English clubs in pot 2, which cannot all be paired within the pot"""
+    teams = create_sample_teams()
+    crowded = []
+    moved = 0
+    for team in teams:
+        if team.pot == 2 and team.country != "ENG" and moved < 5:
+            team = Team(team.name, "ENG", 2)
+            moved += 1
+        crowded.append(team)
+    return crowded
+
+
+class TestFlowNetwork(unittest.TestCase):
+    """Test the max-flow used by the pot pairing check"""
+
+    def test_max_flow(self):
+        """Flow is limited by the narrowest cut"""
+        network = FlowNetwork(4)
+        network.add_edge(0, 1, 3)
+        network.add_edge(0, 2, 2)
+        network.add_edge(1, 2, 1)
+        network.add_edge(1, 3, 2)
+        network.add_edge(2, 3, 3)
+        self.assertEqual(network.max_flow(0, 3), 5)
+
+
+class TestFindProblems(unittest.TestCase):
+    """Test the necessary conditions and their explanations"""
+
+    def test_formats_pass(self):
+        """The sample teams pass in four pots, and a six-pot league in the Conference League format"""
+        teams = create_sample_teams()
+        self.assertEqual(find_problems(teams, FORMATS['ucl']), ())
+        self.assertEqual(find_problems(teams, FORMATS['uel']), ())
+
+        teams, constraints = generate_league(36, num_pots=6, matches_per_team=6)
+        self.assertEqual(find_problems(teams, FORMATS['uecl']), ())
+        self.assertEqual(find_problems(create_sample_teams(), FORMATS['uecl'])[0].rule, POT_QUOTA)
+
+    def test_home_away(self):
+        """Unequal home and away counts are reported"""
+        problems = find_problems(create_sample_teams(), DrawConstraints(home_matches=5, away_matches=3))
+        self.assertIn(HOME_AWAY, [problem.rule for problem in problems])
+
+    def test_pot_sizes(self):
+        """Unequal pots are reported"""
+        problems = find_problems(create_sample_teams()[:-1], DrawConstraints())
+        self.assertEqual([problem.rule for problem in problems], [POT_SIZES])
+        self.assertIn("pot 4: 8", problems[0].message)
+
+    def test_team_options(self):
+        """Teams that run out of countries to meet are reported"""
+        teams, constraints = generate_league(36, num_countries=2)
+        problems = find_problems(teams, constraints)
+        self.assertEqual(problems[0].rule, TEAM_OPTIONS)
+        self.assertIn("can meet at most 2", problems[0].message)
+
+    def test_pot_pairing(self):
+        """A pot too crowded with one country fails the flow check and names it"""
+        problems = find_problems(crowded_pot_teams(), DrawConstraints())
+        self.assertEqual([problem.rule for problem in problems], [POT_PAIRING])
+        self.assertIn("within pot 2", problems[0].message)
+        self.assertIn("ENG", problems[0].message)
+
+    def test_protected_pairs(self):
+        """Protected pairs that leave a draw possible are not reported"""
+        for pairs in ((("PSV Eindhoven", "Manchester City"),),
+                      (("PSV Eindhoven", "Bologna"),),
+                      (("Benfica", "Girona"), ("Barcelona", "Feyenoord"), ("Barcelona", "Borussia Dortmund"))):
+            with self.subTest(pairs=pairs):
+                constraints = DrawConstraints(protected_pairs=pairs)
+                self.assertEqual(find_problems(create_sample_teams(), constraints), ())
+                draw = ChampionsLeagueDraw(create_sample_teams(), constraints=constraints)
+                self.assertTrue(draw.perform_draw(method="two_phase"))
+
+    def test_large_league_is_fast(self):
+        """A thousand-team league is checked well under a second"""
+        teams, constraints = generate_league(1008)
+        start = time.perf_counter()
+        self.assertEqual(find_problems(teams, constraints), ())
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+    def test_check_feasible(self):
+        """check_feasible raises with the problems found"""
+        check_feasible(create_sample_teams(), DrawConstraints())
+        with self.assertRaises(InfeasibleDraw) as raised:
+            check_feasible(crowded_pot_teams(), DrawConstraints())
+        self.assertEqual(raised.exception.problems[0].rule, POT_PAIRING)
+        self.assertIsInstance(raised.exception, ValueError)
+
+
+class TestFailFast(unittest.TestCase):
+    """Test that the engines refuse infeasible draws without attempting them"""
+
+    def test_perform_draw(self):
+        """perform_draw fails with no attempts and reports the problems"""
+        draw = ChampionsLeagueDraw(crowded_pot_teams())
+        start = time.perf_counter()
+        result = draw.perform_draw(max_attempts=25000, method="backtrack")
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertFalse(result)
+        self.assertEqual(result.metrics.attempts, 0)
+        self.assertEqual(result.problems[0].rule, POT_PAIRING)
+
+    def test_feasible_draw_has_no_problems(self):
+        """A completed draw reports no problems"""
+        draw = ChampionsLeagueDraw(create_sample_teams())
+        result = draw.perform_draw(method="backtrack")
+        self.assertTrue(result)
+        self.assertEqual(result.problems, ())
+
+    def test_ceremony(self):
+        """The ceremony goes straight to a failed draw_finished"""
+        draw = SequentialChampionsLeagueDraw(crowded_pot_teams())
+        events = list(draw.ceremony())
+        self.assertEqual([event.kind for event in events], ["draw_finished"])
+        self.assertFalse(events[0].result)
+        self.assertTrue(events[0].result.problems)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Unit tests for the MCMC draw sampler
+"""
+
+import random
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import DrawConstraints, create_sample_teams
+from src.counting import CompletionCounter
+from src.draw_state import DrawState
+from src.montecarlo import MatchupCounts
+from src.sampler import DrawSampler, autocorrelation_time
+from src.search import complete_draw, solve_two_phase
+from src.synthetic import generate_league
+
+
+class TestDrawSampler(unittest.TestCase):
+    """Tests for the DrawSampler class"""
+
+    def setUp(self):
+        """Initialize before each test"""
+        self.state = DrawState(create_sample_teams(), DrawConstraints())
+        self.assertTrue(solve_two_phase(self.state, 5000))
+
+    def test_rejects_incomplete_draw(self):
+        """Test that the sampler needs a complete draw to start from"""
+        state = DrawState(create_sample_teams(), DrawConstraints())
+        with self.assertRaises(ValueError):
+            DrawSampler(state)
+
+    def test_steps_keep_draw_valid(self):
+        """Test that accepted moves never break a constraint"""
+        sampler = DrawSampler(self.state)
+        for _ in range(5000):
+            sampler.step()
+
+        self.assertGreater(sampler.accepted, 0)
+        new_state = sampler.to_state()
+        self.assertTrue(new_state.is_complete())
+        self.assertEqual(new_state.constraint_errors(), [])
+
+    def test_fixed_matches_stay(self):
+        """Test that fixed matches keep their teams and venue while the rest move"""
+        fixed = [(i, j) for i, j, is_home in self.state.trail[:60] if is_home]
+        sampler = DrawSampler(self.state, fixed=[(j, i) for i, j in fixed])
+        for _ in range(5000):
+            sampler.step()
+
+        self.assertGreater(sampler.accepted, 0)
+        self.assertTrue(set(fixed) <= set(sampler.matches))
+        self.assertLess(sampler.overlap_with_start(), 1.0)
+        self.assertEqual(sampler.to_state().constraint_errors(), [])
+
+    def test_chain_moves_away_from_start(self):
+        """Test that the chain forgets its starting draw"""
+        sampler = DrawSampler(self.state)
+        for _ in range(20000):
+            sampler.step()
+        self.assertLess(sampler.overlap_with_start(), 0.5)
+
+    def test_reaches_every_completion(self):
+        """Test that the chain reaches every completion of a small league, in the right proportions"""
+        teams, constraints = generate_league(8, 4, 4, num_countries=6, rng=random.Random(0))
+        state = DrawState(teams, constraints)
+        self.assertTrue(complete_draw(state, 10000, rng=random.Random(1)))
+        partial = DrawState(teams, constraints)
+        for match in state.trail[:3]:
+            partial.add_match(*match)
+        exact = CompletionCounter().matchup_counts(partial)
+
+        sampler = DrawSampler(state, rng=random.Random(0), fixed=[(i, j) for i, j, _ in partial.trail])
+        counts = MatchupCounts(partial)
+        reached = set()
+        for draw in sampler.sample(3000, burn_in=100, thinning=10):
+            reached.add(frozenset(draw.matches))
+            counts.add(draw)
+
+        self.assertEqual(len(reached), exact.draws)
+        for cell in range(len(exact.matchups)):
+            self.assertAlmostEqual(counts.matchups[cell] / counts.draws,
+                                   exact.matchups[cell] / exact.draws, delta=0.1)
+
+    def test_redraws_keep_draw_valid(self):
+        """Test that redraws alone keep the draw valid and move it"""
+        sampler = DrawSampler(self.state, reverse_probability=0.0, redraw_probability=1.0,
+                              rng=random.Random(3))
+        for _ in range(500):
+            sampler.step()
+        self.assertGreater(sampler.accepted, 0)
+        self.assertLess(sampler.overlap_with_start(), 1.0)
+        self.assertEqual(sampler.to_state().constraint_errors(), [])
+
+    def test_sample_and_diagnostic(self):
+        """Test that sample() yields the requested draws and records a trace"""
+        sampler = DrawSampler(self.state)
+        samples = list(sampler.sample(20, burn_in=100, thinning=50, trace=True))
+        self.assertEqual(len(samples), 20)
+
+        diagnostic = sampler.mixing_diagnostic()
+        self.assertEqual(diagnostic['steps'], 100 + 20 * 50)
+        self.assertEqual(diagnostic['samples'], 20)
+        self.assertGreaterEqual(diagnostic['autocorrelation_time'], 1.0)
+        self.assertLessEqual(diagnostic['effective_samples'], 20)
+
+    def test_sample_keeps_no_trace_by_default(self):
+        """Test that sampling without trace keeps nothing per draw"""
+        sampler = DrawSampler(self.state)
+        for _ in sampler.sample(20, burn_in=10, thinning=10):
+            pass
+        self.assertEqual(sampler.overlap_trace, [])
+
+    def test_autocorrelation_time(self):
+        """Test the autocorrelation time of short and correlated series"""
+        self.assertEqual(autocorrelation_time([0.5, 0.4]), 1.0)
+        self.assertEqual(autocorrelation_time([0.3] * 10), 1.0)
+        self.assertGreater(autocorrelation_time([float(k) for k in range(50)]), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
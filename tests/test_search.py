@@ -0,0 +1,73 @@
+"""
+Unit tests for the backtracking search and the two-phase draw
+"""
+
+import io
+import unittest
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import ChampionsLeagueDraw, DrawConstraints, create_sample_teams
+from src.draw_state import DrawState
+from src.search import complete_draw, select_slot, solve_two_phase
+
+
+class TestCompleteDraw(unittest.TestCase):
+    """Tests for complete_draw"""
+
+    def setUp(self):
+        """Initialize before each test"""
+        self.state = DrawState(create_sample_teams(), DrawConstraints())
+
+    def test_select_slot_on_complete_draw(self):
+        """Test that a completed draw has no open slot"""
+        self.assertTrue(complete_draw(self.state, 100000))
+        self.assertIsNone(select_slot(self.state))
+        self.assertEqual(self.state.constraint_errors(), [])
+
+    def test_budget_exhausted(self):
+        """Test that running out of steps leaves the state unchanged"""
+        self.assertIsNone(complete_draw(self.state, 5))
+        self.assertEqual(self.state.trail, [])
+
+    def test_undirected_draw(self):
+        """Test that an undirected search fills every pot quota"""
+        self.assertTrue(complete_draw(self.state, 100000, undirected=True))
+        self.assertTrue(self.state.is_complete())
+        self.assertEqual(set(self.state.pot_count), {2})
+
+
+class TestTwoPhaseDraw(unittest.TestCase):
+    """Tests for the two-phase draw"""
+
+    def test_solve_two_phase(self):
+        """Test that Euler orientation gives every team 4 home and 4 away matches"""
+        state = DrawState(create_sample_teams(), DrawConstraints())
+
+        self.assertTrue(solve_two_phase(state, 100000))
+        self.assertEqual(set(state.home_count), {4})
+        self.assertEqual(set(state.away_count), {4})
+        self.assertEqual(state.constraint_errors(), [])
+
+    def test_unbalanced_constraints(self):
+        """Test that unequal home/away counts are rejected"""
+        state = DrawState(create_sample_teams(), DrawConstraints(home_matches=5, away_matches=3))
+
+        with self.assertRaises(ValueError):
+            solve_two_phase(state, 100000)
+
+    def test_perform_draw(self):
+        """Test the two_phase mode of ChampionsLeagueDraw"""
+        draw = ChampionsLeagueDraw(create_sample_teams())
+
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(draw.perform_draw(method="two_phase"))
+            self.assertTrue(draw.verify_constraints())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+"""
+Unit tests for the draw service
+"""
+
+import asyncio
+import json
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import Team, create_conference_league_teams, create_sample_teams
+from src.constraints import CONFERENCE_LEAGUE, DrawConstraints
+from src.draw_pool import decode_record
+from src.draw_state import DrawState
+from src.precheck import InfeasibleDraw
+from src.server import DrawServer, DrawService
+
+
+def crowded_pot_teams():
+    """Sample teams with six English clubs in pot 2, for which no draw exists"""
+    teams = []
+    moved = 0
+    for team in create_sample_teams():
+        if team.pot == 2 and team.country != "ENG" and moved < 5:
+            team = Team(team.name, "ENG", 2)
+            moved += 1
+        teams.append(team)
+    return teams
+
+
+async def request(reader, writer, path, method="GET", headers=""):
+    """Send one request on an open connection and read the response"""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n".encode("latin-1"))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    fields = {}
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        fields[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(fields['content-length']))
+    return status, fields, body
+
+
+class TestDrawService(unittest.IsolatedAsyncioTestCase):
+    """Tests for the draw pool"""
+
+    async def test_pool_fills_and_serves(self):
+        """Test that a waiting request is a miss and the pool then refills to capacity"""
+        service = DrawService(create_sample_teams(), capacity=3, seed=1)
+        await service.start()
+        try:
+            pooled = await service.get_draw()
+            self.assertEqual(service.metrics()['pool_misses'], 1)
+            self.assertEqual(pooled.failed, 0)
+
+            while len(service.pool) < 3:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)
+            metrics = service.metrics()
+            self.assertEqual(metrics['pool_depth'], 3)
+            self.assertEqual(metrics['refilled'], 4)
+            self.assertGreater(metrics['refill_rate'], 0)
+
+            await service.get_draw()
+            metrics = service.metrics()
+            self.assertEqual((metrics['served'], metrics['pool_hits']), (2, 1))
+            json.dumps(metrics)
+        finally:
+            await service.stop()
+
+    async def test_seeded_draws_repeat(self):
+        """Test that the same seed gives the same draws"""
+        records = []
+        for _ in range(2):
+            service = DrawService(create_sample_teams(), capacity=1, seed=7)
+            await service.start()
+            try:
+                records.append((await service.get_draw()).record)
+            finally:
+                await service.stop()
+        self.assertEqual(records[0], records[1])
+
+    async def test_infeasible_draw(self):
+        """Test that a draw that cannot exist is reported instead of retried"""
+        service = DrawService(crowded_pot_teams(), capacity=1)
+        await service.start()
+        try:
+            with self.assertRaises(InfeasibleDraw) as raised:
+                await asyncio.wait_for(service.get_draw(), 30)
+            self.assertTrue(raised.exception.problems)
+            self.assertEqual(service.metrics()['refilled'], 0)
+
+            server = DrawServer(service)
+            status, _, body = await server.route("GET", "/draw", {})
+            self.assertEqual(status, 503)
+            self.assertIn("ENG", json.loads(body)['error'])
+        finally:
+            await service.stop()
+
+    async def test_invalid_options(self):
+        """Test that the restart loop and empty pools are refused"""
+        with self.assertRaises(ValueError):
+            DrawService(create_sample_teams(), method="restart")
+        with self.assertRaises(ValueError):
+            DrawService(create_sample_teams(), capacity=0)
+        with self.assertRaises(RuntimeError):
+            await DrawService(create_sample_teams()).get_draw()
+
+
+class TestDrawServer(unittest.IsolatedAsyncioTestCase):
+    """Tests for the HTTP endpoints"""
+
+    async def asyncSetUp(self):
+        """Serve Conference League draws on a free port"""
+        self.server = DrawServer(DrawService(create_conference_league_teams(), CONFERENCE_LEAGUE,
+                                             capacity=2, seed=3), port=0)
+        await self.server.start()
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.server.port)
+
+    async def asyncTearDown(self):
+        """Close the connection and stop the server"""
+        self.writer.close()
+        await self.server.stop()
+
+    async def test_json_and_binary_draws(self):
+        """Test both draw formats on one kept-alive connection"""
+        status, fields, body = await request(self.reader, self.writer, "/draw")
+        self.assertEqual(status, 200)
+        self.assertEqual(fields['content-type'], "application/json")
+        self.assertEqual(fields['connection'], "keep-alive")
+        document = json.loads(body)
+        self.assertEqual(len(document['matches']), 36 * 6 // 2)
+
+        status, _, body = await request(self.reader, self.writer, "/teams")
+        layout = json.loads(body)
+        teams = [Team(*entry) for entry in layout['teams']]
+        constraints = DrawConstraints.from_dict(layout['constraints'])
+
+        for path, headers in (("/draw?format=binary", ""), ("/draw", "Accept: application/octet-stream\r\n")):
+            status, fields, body = await request(self.reader, self.writer, path, headers=headers)
+            self.assertEqual(fields['content-type'], "application/octet-stream")
+            self.assertEqual(len(body), layout['record_size'])
+
+            opponents, home = decode_record(body, len(teams), layout['matches_per_team'])
+            state = DrawState(teams, constraints)
+            for slot, opponent in enumerate(opponents):
+                if home[slot]:
+                    state.add_match(slot // layout['matches_per_team'], opponent, True)
+            self.assertEqual(state.constraint_errors(), [])
+
+    async def test_metrics_and_health(self):
+        """Test the metrics and health endpoints"""
+        await request(self.reader, self.writer, "/draw?format=binary")
+        status, _, body = await request(self.reader, self.writer, "/metrics")
+        self.assertEqual(status, 200)
+        metrics = json.loads(body)
+        self.assertEqual(metrics['served'], 1)
+        self.assertEqual(metrics['pool_capacity'], 2)
+
+        status, _, body = await request(self.reader, self.writer, "/health")
+        self.assertEqual((status, json.loads(body)), (200, {'status': 'ok'}))
+
+    async def test_errors(self):
+        """Test unknown paths, methods and formats"""
+        status, _, _ = await request(self.reader, self.writer, "/nowhere")
+        self.assertEqual(status, 404)
+        status, _, _ = await request(self.reader, self.writer, "/draw", method="POST")
+        self.assertEqual(status, 405)
+        status, _, body = await request(self.reader, self.writer, "/draw?format=xml")
+        self.assertEqual(status, 400)
+        self.assertIn("xml", json.loads(body)['error'])
+
+        status, fields, _ = await request(self.reader, self.writer, "/health", headers="Connection: close\r\n")
+        self.assertEqual(fields['connection'], "close")
+        self.assertEqual(await self.reader.read(), b"")
+
+
+if __name__ == '__main__':
+    unittest.main()
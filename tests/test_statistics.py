@@ -0,0 +1,133 @@
+"""
+Unit tests for the aggregate draw statistics
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import unittest
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import DrawConstraints, Team, create_sample_teams
+from src.draw_pool import DrawPool, DrawPoolWriter
+from src.draw_state import DrawState
+from src.search import solve_two_phase
+from src.statistics import BIG_FOUR, AggregateStatistics, DrawStatistics, np
+from src.synthetic import generate_league
+
+
+class _Draw:
+    """Minimal stand-in for ChampionsLeagueDraw around a DrawState"""
+
+    def __init__(self, state):
+        self.state = state
+        self.teams = state.teams
+        self.fixtures = state.fixtures_view()
+        self.home_away_count = state.home_away_view()
+
+
+class TestAggregateStatistics(unittest.TestCase):
+    """Tests for the AggregateStatistics class"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Draw a small batch shared by all tests"""
+        cls.teams = create_sample_teams()
+        rng = random.Random(4)
+        cls.draws = []
+        for _ in range(12):
+            state = DrawState(cls.teams, DrawConstraints())
+            assert solve_two_phase(state, 5000, rng)
+            cls.draws.append(_Draw(state))
+
+    def test_matches_single_draw_statistics(self):
+        """Test that the aggregates are the sums of the per-draw statistics"""
+        aggregate = AggregateStatistics(self.teams)
+        countries = defaultdict(lambda: defaultdict(int))
+        pots = defaultdict(lambda: defaultdict(int))
+
+        for draw in self.draws:
+            aggregate.add(draw)
+            single = DrawStatistics(draw)
+            for a, row in single.country_matchups().items():
+                for b, count in row.items():
+                    countries[a][b] += count
+            for a, row in single.pot_matchups().items():
+                for b, count in row.items():
+                    pots[a][b] += count
+
+        self.assertEqual(aggregate.country_matchups(), {a: dict(row) for a, row in countries.items()})
+        self.assertEqual(aggregate.pot_matchups(), {a: dict(row) for a, row in pots.items()})
+        for row in aggregate.team_summary():
+            self.assertEqual((row['home'], row['away']), (4.0, 4.0))
+
+    def test_running_moments(self):
+        """Test the online mean and variance against a two-pass computation"""
+        aggregate = AggregateStatistics(self.teams)
+        for draw in self.draws:
+            aggregate.add(draw)
+
+        for team in self.teams:
+            values = [sum(1 for opponent, _ in draw.fixtures[team] if opponent.country in BIG_FOUR)
+                      for draw in self.draws]
+            i = aggregate.index[team]
+            self.assertAlmostEqual(aggregate.tracked_mean[i], statistics.mean(values))
+            self.assertAlmostEqual(aggregate.tracked_variance(team), statistics.variance(values))
+
+    def test_pool_matches_stream(self):
+        """Test that a pool pass gives the same results as adding draws one by one"""
+        handle, path = tempfile.mkstemp(suffix=".pool")
+        os.close(handle)
+        try:
+            with DrawPoolWriter(path, self.teams, DrawConstraints()) as writer:
+                for draw in self.draws:
+                    writer.write(draw.state)
+
+            streamed = AggregateStatistics(self.teams)
+            for draw in self.draws:
+                streamed.add(draw)
+
+            pooled = AggregateStatistics(self.teams)
+            with DrawPool(path) as pool:
+                pooled.add_pool(pool, chunk_size=5)
+
+            self.assertEqual(pooled.draws, streamed.draws)
+            self.assertEqual(pooled.country_counts, streamed.country_counts)
+            self.assertEqual(pooled.pot_counts, streamed.pot_counts)
+            self.assertEqual(pooled.home_counts, streamed.home_counts)
+            for a, b in zip(pooled.tracked_m2, streamed.tracked_m2):
+                self.assertAlmostEqual(a, b)
+        finally:
+            os.remove(path)
+
+    @unittest.skipUnless(np is not None, "NumPy is not installed")
+    def test_structured_results(self):
+        """Test the structured array output"""
+        aggregate = AggregateStatistics(self.teams)
+        for draw in self.draws:
+            aggregate.add(draw)
+
+        results = aggregate.as_numpy()
+        self.assertEqual(results['teams'].shape, (36,))
+        self.assertEqual(results['teams'][0]['name'], "Real Madrid")
+        self.assertEqual(results['pots'].shape, (4, 4))
+        self.assertEqual(int(results['pots'].sum()), 12 * 36 * 8)
+
+    @unittest.skipUnless(np is not None, "NumPy is not installed")
+    def test_structured_names_are_whole(self):
+        """Test that long team and country names are not cut short"""
+        teams, _ = generate_league(72)
+        teams[0] = Team("A team name well over forty characters long", "C001", teams[0].pot)
+        results = AggregateStatistics(teams).as_numpy()
+        self.assertEqual(list(results['teams']['country']), [team.country for team in teams])
+        self.assertEqual(list(results['teams']['name']), [team.name for team in teams])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Unit tests for the synthetic league generator
+"""
+
+import random
+import unittest
+import sys
+from collections import Counter
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import ChampionsLeagueDraw
+from src.synthetic import concentration_index, country_sizes, generate_league
+
+
+class TestCountrySizes(unittest.TestCase):
+    """Tests for country_sizes"""
+
+    def test_totals_and_order(self):
+        """Test that every team is placed, largest country first"""
+        for concentration in (0.0, 1.0, 2.5):
+            sizes = country_sizes(100, 17, concentration)
+            self.assertEqual(sum(sizes), 100)
+            self.assertEqual(len(sizes), 17)
+            self.assertEqual(sizes, sorted(sizes, reverse=True))
+            self.assertGreaterEqual(min(sizes), 1)
+
+    def test_concentration(self):
+        """Test that a higher concentration makes the biggest country bigger"""
+        self.assertEqual(country_sizes(36, 12, 0.0), [3] * 12)
+        biggest = [country_sizes(144, 40, c)[0] for c in (0.0, 0.5, 1.0, 2.0)]
+        self.assertEqual(biggest, sorted(biggest))
+        self.assertLess(biggest[0], biggest[-1])
+
+        with self.assertRaises(ValueError):
+            country_sizes(10, 11, 1.0)
+
+
+class TestGenerateLeague(unittest.TestCase):
+    """Tests for generate_league"""
+
+    def test_shape(self):
+        """Test pots, constraints and the spread of each country over the pots"""
+        teams, constraints = generate_league(72, num_pots=6, matches_per_team=12,
+                                             rng=random.Random(1))
+        self.assertEqual(len(teams), 72)
+        self.assertEqual(len({team.name for team in teams}), 72)
+        self.assertEqual(Counter(team.pot for team in teams), {pot: 12 for pot in range(1, 7)})
+        self.assertEqual(constraints.matches_per_pot, 2)
+        self.assertEqual(constraints.home_matches, 6)
+        self.assertEqual(constraints.away_matches, 6)
+
+        per_country = Counter(team.country for team in teams)
+        per_pot = Counter((team.country, team.pot) for team in teams)
+        for (country, _), count in per_pot.items():
+            self.assertLessEqual(count, -(-per_country[country] // 6))
+
+    def test_seeded(self):
+        """Test that the same rng seed gives the same league"""
+        first, _ = generate_league(144, rng=random.Random(7))
+        second, _ = generate_league(144, rng=random.Random(7))
+        self.assertEqual([(t.name, t.pot) for t in first], [(t.name, t.pot) for t in second])
+
+    def test_invalid_shapes(self):
+        """Test that leagues no draw could fit are refused"""
+        with self.assertRaises(ValueError):
+            generate_league(30, num_pots=4)
+        with self.assertRaises(ValueError):
+            generate_league(36, num_pots=4, matches_per_team=6)
+        with self.assertRaises(ValueError):
+            generate_league(8, num_pots=4, matches_per_team=8)
+        with self.assertRaises(ValueError):
+            generate_league(36, num_pots=4, matches_per_team=4)
+
+    def test_concentration_index(self):
+        """Test that concentration raises the Herfindahl index"""
+        even, _ = generate_league(72, concentration=0.0, rng=random.Random(0))
+        skewed, _ = generate_league(72, concentration=1.5, rng=random.Random(0))
+        self.assertLess(concentration_index(even), concentration_index(skewed))
+
+    def test_draws(self):
+        """Test that generated leagues are drawn and validated by the engines"""
+        for num_teams, num_pots, matches in ((72, 4, 8), (48, 6, 6)):
+            teams, constraints = generate_league(num_teams, num_pots, matches, rng=random.Random(2))
+            draw = ChampionsLeagueDraw(teams, rng=random.Random(3), constraints=constraints)
+            self.assertTrue(draw.perform_draw(max_attempts=5, method="pot_pairs"))
+            self.assertEqual(draw.state.constraint_errors(), [])
+
+    def test_deep_search(self):
+        """Test that a search deeper than Python's recursion limit completes"""
+        teams, constraints = generate_league(288, rng=random.Random(1))
+        for method in ("two_phase", "backtrack"):
+            with self.subTest(method=method):
+                draw = ChampionsLeagueDraw(teams, rng=random.Random(1), constraints=constraints)
+                self.assertTrue(draw.perform_draw(max_attempts=1, method=method, max_steps=20000))
+                self.assertEqual(draw.state.constraint_errors(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
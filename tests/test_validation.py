@@ -0,0 +1,147 @@
+"""
+Unit tests for the bulk constraint validator
+"""
+
+import os
+import random
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.champions_league_draw import DrawConstraints, create_sample_teams
+from src.draw_pool import DrawPool, DrawPoolWriter
+from src.draw_state import DrawState
+from src.search import solve_two_phase
+from src.synthetic import generate_league
+from src.validation import CHUNK_BYTES, DrawValidator, Violation, describe, np, violation_code
+
+
+class TestValidation(unittest.TestCase):
+    """Tests for DrawValidator"""
+
+    def setUp(self):
+        """Solve a few draws and build a validator"""
+        self.teams = create_sample_teams()
+        self.constraints = DrawConstraints()
+        self.validator = DrawValidator(self.teams, self.constraints)
+        self.draws = []
+        rng = random.Random(11)
+        for _ in range(4):
+            state = DrawState(self.teams, self.constraints)
+            self.assertTrue(solve_two_phase(state, 5000, rng))
+            self.draws.append(state)
+
+    def slots(self, state):
+        """Copy a draw's slot table as plain lists"""
+        return list(state.opponents), [bool(h) for h in state.home]
+
+    def corrupted(self):
+        """Slot tables each breaking the draw in a different way"""
+        state = self.draws[0]
+        m = state.matches_per_team
+        tables = {}
+
+        opponents, home = self.slots(state)
+        home[0] = not home[0]
+        tables['venue'] = (opponents, home)
+
+        opponents, home = self.slots(state)
+        opponents[0] = -1
+        tables['empty'] = (opponents, home)
+
+        opponents, home = self.slots(state)
+        compatriot = next(j for j in range(1, state.num_teams)
+                          if state.team_country[j] == state.team_country[0])
+        opponents[0] = compatriot
+        tables['country'] = (opponents, home)
+
+        opponents, home = self.slots(state)
+        opponents[1] = opponents[0]
+        tables['repeat'] = (opponents, home)
+
+        self.assertEqual(len(opponents), state.num_teams * m)
+        return tables
+
+    def test_valid_draws_pass(self):
+        """Test that solved draws have no violations"""
+        for state in self.draws:
+            counts = self.validator.validate_slots(*self.slots(state))
+            self.assertEqual(counts['code'], Violation.NONE)
+            self.assertEqual(state.constraint_errors(), [])
+
+    def test_corruptions_are_flagged(self):
+        """Test that each corruption sets the expected flags"""
+        tables = self.corrupted()
+        codes = {name: self.validator.validate_slots(*table)['code'] for name, table in tables.items()}
+
+        self.assertTrue(codes['venue'] & Violation.HOME_AWAY)
+        self.assertTrue(codes['venue'] & Violation.ASYMMETRIC)
+        self.assertTrue(codes['empty'] & Violation.DEGREE)
+        self.assertTrue(codes['empty'] & Violation.ASYMMETRIC)
+        self.assertTrue(codes['country'] & Violation.SAME_COUNTRY)
+        self.assertTrue(codes['repeat'] & Violation.ASYMMETRIC)
+        self.assertFalse(codes['venue'] & Violation.SAME_COUNTRY)
+
+    def test_describe(self):
+        """Test converting between counts, codes and names"""
+        counts = {'degree': 1, 'home_away': 0, 'pot_quota': 2,
+                  'same_country': 0, 'country_cap': 0, 'asymmetric': 0}
+        code = violation_code(counts)
+        self.assertEqual(code, Violation.DEGREE | Violation.POT_QUOTA)
+        self.assertEqual(describe(code), ['degree', 'pot_quota'])
+        self.assertEqual(describe(0), [])
+
+    @unittest.skipUnless(np is not None, "NumPy is not installed")
+    def test_batch_matches_slots(self):
+        """Test that validate_batch agrees with validate_slots record by record"""
+        tables = [self.slots(state) for state in self.draws] + list(self.corrupted().values())
+        opponents = np.array([t[0] for t in tables])
+        home = np.array([t[1] for t in tables])
+        results = self.validator.validate_batch(opponents, home)
+
+        self.assertEqual(len(results), len(tables))
+        for record, table in zip(results, tables):
+            expected = self.validator.validate_slots(*table)
+            for name in results.dtype.names:
+                self.assertEqual(int(record[name]), expected[name], name)
+        self.assertTrue((results['code'][:len(self.draws)] == 0).all())
+
+    @unittest.skipUnless(np is not None, "NumPy is not installed")
+    def test_validate_states(self):
+        """Test validating DrawState objects directly"""
+        results = self.validator.validate_states(self.draws)
+        self.assertEqual(results['code'].tolist(), [0] * len(self.draws))
+
+    def test_validate_pool(self):
+        """Test validating every record of a pool file"""
+        handle, path = tempfile.mkstemp(suffix=".pool")
+        os.close(handle)
+        try:
+            with DrawPoolWriter(path, self.teams, self.constraints) as writer:
+                for state in self.draws:
+                    writer.write(state)
+            with DrawPool(path) as pool:
+                results = self.validator.validate_pool(pool, chunk_size=3)
+                codes = [int(record['code']) for record in results]
+                del results
+                default = [int(record['code']) for record in self.validator.validate_pool(pool)]
+            self.assertEqual(codes, [0] * len(self.draws))
+            self.assertEqual(default, codes)
+        finally:
+            os.remove(path)
+
+    def test_chunks_shrink_with_league_size(self):
+        """Test that a chunk's venue matrices stay within the byte budget"""
+        self.assertGreater(self.validator.default_chunk_size(), 1000)
+        teams, constraints = generate_league(1008)
+        validator = DrawValidator(teams, constraints)
+        self.assertLessEqual(validator.default_chunk_size() * 1008 * 1008, CHUNK_BYTES)
+        self.assertGreater(validator.default_chunk_size(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()